@@ -2,12 +2,20 @@
 Memo controller for handling memo generation and validation API endpoints.
 """
 
+import json
 import logging
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from ..config import Config
 from ..core.memo_service import get_memo_service
-from ..utils.error_handling import ApplicationError, ValidationError, handle_application_error
-from ..infrastructure.job_manager import create_job, update_job, get_job
-from ..tasks import memo_queue, generate_memo_task
+from ..utils.error_handling import ApplicationError, ValidationError, ResourceNotFoundError, handle_application_error
+from ..infrastructure.job_manager import create_job, update_job, get_job, read_job_stream
+from ..infrastructure.artifacts import prepared_text_ref, has_prepared_text
+from ..utils.memo_templates import TEMPLATES
+from ..utils.claims import merge_claim_results
+from ..tasks import (
+    memo_queue, validation_queue, generate_memo_task, generate_memo_batch_task, validate_claims_task,
+    memo_fingerprint, claim_memo_flight, finish_memo_flight
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,26 +32,77 @@ def generate_memo_api():
             raise ValidationError("Missing request body")
             
         text = data.get('text')
-        if not text:
+        text_ref = data.get('text_ref')
+        if not text and not text_ref:
             raise ValidationError("Missing 'text' field in request")
+        
+        if text_ref and not has_prepared_text(text_ref):
+            if not text:
+                raise ResourceNotFoundError("Prepared text", text_ref)
+            text_ref = None
+        if not text_ref and has_prepared_text(prepared_text_ref(text)):
+            # Text a PDF job already prepared is sent by reference and not prepared again.
+            # The text is still queued, in case the stored text is evicted before the job runs
+            text_ref = prepared_text_ref(text)
             
         # Get the optional template parameter (default to "default")
         template_key = data.get('template', 'default')
+        stream = bool(data.get('stream', False))
+        # Skip the memo cache when the user asks for a fresh sample
+        use_cache = not data.get('fresh', False)
+        sectioned = data.get('sectioned')
+        if sectioned is not None:
+            sectioned = bool(sectioned)
+        # Seconds the caller is willing to wait; short targets route to faster models
+        latency_target = data.get('latency_target')
+        if latency_target is not None:
+            try:
+                latency_target = float(latency_target)
+            except (TypeError, ValueError):
+                raise ValidationError("'latency_target' must be a number of seconds")
+            if latency_target <= 0:
+                raise ValidationError("'latency_target' must be positive")
         
         # Create a job for tracking
         job_id = create_job()
         update_job(job_id, {"status": "processing"})
         
-        logger.info(f"Starting memo generation for job {job_id} with template '{template_key}'")
+        # An identical request already running gets this job attached to it
+        # instead of a second generation
+        fingerprint = memo_fingerprint(text, template_key, stream, use_cache, sectioned, latency_target, text_ref)
+        leader = claim_memo_flight(fingerprint, job_id)
         
-        # Process in background using Redis Queue with template
-        memo_queue.enqueue(generate_memo_task, text, job_id, template_key)
-        
-        return jsonify({
+        response = {
             "success": True,
             "job_id": job_id,
             "status": "processing"
-        }), 202
+        }
+        
+        if leader != job_id:
+            logger.info(f"Memo job {job_id} attached to identical running job {leader}")
+            update_job(job_id, {"coalesced_with": leader})
+            response["coalesced_with"] = leader
+        else:
+            logger.info(f"Starting memo generation for job {job_id} with template '{template_key}'")
+        
+        # Attached jobs are queued too: their task waits for the leader and
+        # generates the memo itself if the leader dies. The RQ job shares the
+        # job's ID so attached jobs can see whether their leader failed.
+        try:
+            memo_queue.enqueue(generate_memo_task, text, job_id, template_key, stream, use_cache, sectioned,
+                               latency_target, text_ref, job_id=job_id)
+        except Exception as e:
+            if leader == job_id:
+                # Jobs attached in the meantime would otherwise wait forever
+                finish_memo_flight(fingerprint, job_id, {"status": "failed", "error": str(e)}, stream)
+                raise
+            logger.warning(f"Failed to queue attached memo job {job_id}, it relies on its leader: {str(e)}")
+        
+        if stream:
+            # Tokens are streamed into the generating job's stream
+            response["stream_url"] = f"/api/generate-memo/stream?job_id={leader}"
+        
+        return jsonify(response), 202
         
     except ApplicationError as e:
         logger.warning(f"Application error in generate_memo_api: {e.message}")
@@ -55,6 +114,124 @@ def generate_memo_api():
             "error": {"message": str(e), "code": "INTERNAL_ERROR"}
         }), 500
 
+@memo_bp.route('/generate-memo/batch', methods=['POST'])
+def generate_memo_batch_api():
+    """Generate investment memos for several templates from one text."""
+    try:
+        data = request.json
+        if not data:
+            raise ValidationError("Missing request body")
+            
+        text = data.get('text')
+        if not text:
+            raise ValidationError("Missing 'text' field in request")
+        
+        templates = data.get('templates')
+        if not templates or not isinstance(templates, list):
+            raise ValidationError("'templates' must be a non-empty list of template keys")
+        unknown = [key for key in templates if key not in TEMPLATES]
+        if unknown:
+            raise ValidationError(f"Unknown templates: {', '.join(map(str, unknown))}")
+        # Keep the requested order but generate each template only once
+        template_keys = list(dict.fromkeys(templates))
+        
+        use_cache = not data.get('fresh', False)
+        sectioned = data.get('sectioned')
+        if sectioned is not None:
+            sectioned = bool(sectioned)
+        
+        job_id = create_job()
+        update_job(job_id, {"status": "processing", "templates": template_keys})
+        
+        logger.info(f"Starting memo batch for job {job_id} with templates {template_keys}")
+        
+        memo_queue.enqueue(generate_memo_batch_task, text, job_id, template_keys, use_cache, sectioned)
+        
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "processing",
+            "templates": template_keys
+        }), 202
+        
+    except ApplicationError as e:
+        logger.warning(f"Application error in generate_memo_batch_api: {e.message}")
+        return jsonify(handle_application_error(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in generate_memo_batch_api: {str(e)}", exc_info=True)
+        return jsonify({
+            "success": False,
+            "error": {"message": str(e), "code": "INTERNAL_ERROR"}
+        }), 500
+
+@memo_bp.route('/generate-memo/stream', methods=['GET'])
+def generate_memo_stream():
+    """Stream the tokens of a memo generation job as server-sent events."""
+    try:
+        job_id = request.args.get('job_id')
+        if not job_id:
+            raise ValidationError("Missing job_id parameter")
+            
+        if not get_job(job_id):
+            raise ValidationError(f"Job {job_id} not found")
+        
+        # Resume after the last event the client saw on reconnect
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id') or "0"
+        
+        def events(last_id):
+            while True:
+                entries = read_job_stream(job_id, last_id)
+                if not entries:
+                    # Stop if the job expired, otherwise keep the connection alive
+                    if not get_job(job_id):
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                for entry_id, event in entries:
+                    last_id = entry_id
+                    yield f"id: {entry_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                    if event["type"] in ("done", "error"):
+                        return
+        
+        return Response(
+            stream_with_context(events(last_id)),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        
+    except ApplicationError as e:
+        logger.warning(f"Application error in generate_memo_stream: {e.message}")
+        return jsonify(handle_application_error(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in generate_memo_stream: {str(e)}", exc_info=True)
+        return jsonify({
+            "success": False,
+            "error": {"message": str(e), "code": "INTERNAL_ERROR"}
+        }), 500
+
+def _enqueue_validation(text):
+    """
+    Validate a selection in the background so the API worker is not held by the searches.
+    
+    Args:
+        text (str): The selection text
+        
+    Returns:
+        tuple: The JSON response with the job ID and its status code
+    """
+    job_id = create_job()
+    update_job(job_id, {"status": "processing"})
+    
+    logger.info(f"Starting validation for job {job_id}: {text[:50]}...")
+    validation_queue.enqueue(validate_claims_task, text, job_id)
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "processing"
+    }), 202
+
 @memo_bp.route('/validate-selection', methods=['POST'])
 def validate_selection():
     """Validate a selection of text against external sources."""
@@ -68,17 +245,25 @@ def validate_selection():
         if not text:
             raise ValidationError("Missing 'text' field in request")
             
-        logger.info(f"Validating selection: {text[:50]}...")
+        if data.get('async'):
+            return _enqueue_validation(text)
         
-        # Get the memo service
+        # Extracting claims is local, so it is cheap to do before choosing the path
         memo_service = get_memo_service()
+        claims = memo_service.claims_to_validate(text)
+        if len(claims) > Config.VALIDATION_SYNC_MAX_CLAIMS:
+            return _enqueue_validation(text)
+        
+        logger.info(f"Validating selection: {text[:50]}...")
         
-        # Validate the text
-        validation_results = memo_service.validate_memo(text)
+        # Validate each claim in the text
+        claims = memo_service.validate_claims(claims=claims)
         
         return jsonify({
             "success": True,
-            "results": validation_results
+            # Results across all claims, for clients showing a flat list
+            "results": merge_claim_results(claims),
+            "claims": claims
         }), 200
         
     except ApplicationError as e:
@@ -102,12 +287,13 @@ def generate_memo_web():
             
         # Get the optional template parameter
         template_key = request.form.get('template', 'default')
+        use_cache = request.form.get('fresh', 'false').lower() not in ('true', '1')
             
         # Get the memo service
         memo_service = get_memo_service()
         
         # Generate the memo with template
-        memo = memo_service.generate_memo(text, template_key=template_key)
+        memo = memo_service.generate_memo(text, template_key=template_key, use_cache=use_cache)
         
         return jsonify({
             "success": True,
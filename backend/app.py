@@ -70,6 +70,17 @@ def create_app(config=None):
             "version": "1.0.0"
         }), 200
     
+    # Provider status, kept off the liveness check since it reads Redis
+    @app.route('/health/providers')
+    def provider_status():
+        from .core.memo_service import get_memo_service
+        
+        return jsonify({
+            "providers": get_memo_service().provider_health(),
+            "prompt_cache": get_memo_service().prompt_cache_stats(),
+            "validation_cache": get_memo_service().validation_cache_stats()
+        }), 200
+    
     logger.info("Application configuration complete")
     return app
 
@@ -0,0 +1,215 @@
+"""
+Coroutine versions of the background tasks.
+This module defines the tasks run by the async worker, keyed by the RQ task
+they replace, so that jobs enqueued for the regular worker can be picked up
+by either kind of worker. Job state in Redis is read and written from
+threads, so these calls never block the event loop.
+"""
+
+import asyncio
+import logging
+from .config import Config
+from .infrastructure.job_manager import update_job, get_job, AsyncJobStreamWriter
+from .core.async_memo_service import get_async_memo_service
+from .utils.claims import merge_claim_results
+from .tasks import (
+    generate_memo_task, generate_memo_batch_task, validate_claims_task, memo_fingerprint, claim_memo_flight,
+    check_memo_flight, hold_memo_flight, finish_memo_flight, load_memo_text, MEMO_FLIGHT_POLL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+def _error_message(error):
+    """Describe a task failure, including cancellation by the worker's timeout."""
+    if isinstance(error, asyncio.CancelledError):
+        return "Job was cancelled or timed out"
+    return str(error)
+
+async def wait_for_memo_flight_async(fingerprint, leader, job_id):
+    """
+    Wait on the event loop for the leader of an attached memo job.
+    
+    Takes the same arguments and returns the same as
+    tasks.wait_for_memo_flight.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + Config.MEMO_COALESCE_TTL
+    while True:
+        try:
+            state = await asyncio.to_thread(check_memo_flight, fingerprint, leader, job_id)
+        except Exception as e:
+            logger.warning(f"Failed to check on leader {leader} of job {job_id}: {str(e)}")
+            return False
+        if state != "waiting":
+            return state == "done"
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(MEMO_FLIGHT_POLL_SECONDS)
+
+async def generate_memo_task_async(text, job_id, template_key="default", stream=False, use_cache=True,
+                                   sectioned=None, latency_target=None, text_ref=None):
+    """
+    Generate an investment memo on the event loop.
+    
+    Takes the same arguments as tasks.generate_memo_task.
+    """
+    fingerprint = memo_fingerprint(text, template_key, stream, use_cache, sectioned, latency_target, text_ref)
+    orphaned = None
+    leader = await asyncio.to_thread(claim_memo_flight, fingerprint, job_id)
+    while leader != job_id:
+        # Wait for the identical running job, and run this one if it dies
+        logger.info(f"Memo job {job_id} attached to identical running job {leader}")
+        await asyncio.to_thread(update_job, job_id, {"coalesced_with": leader})
+        if await wait_for_memo_flight_async(fingerprint, leader, job_id):
+            job = await asyncio.to_thread(get_job, job_id) or {}
+            # Jobs may have attached to this one while it was the leader
+            await asyncio.to_thread(finish_memo_flight, fingerprint, job_id, job, stream, orphaned)
+            return job.get("result")
+        logger.warning(f"Leader {leader} of memo job {job_id} stopped without finishing, taking over")
+        orphaned = orphaned or leader
+        leader = await asyncio.to_thread(claim_memo_flight, fingerprint, job_id)
+    
+    lease = hold_memo_flight(fingerprint, job_id)
+    writer = AsyncJobStreamWriter(job_id) if stream else None
+    try:
+        logger.info(f"Starting async memo generation task for job {job_id} with template '{template_key}'")
+        await asyncio.to_thread(update_job, job_id, {"status": "processing", "progress": 10})
+        
+        text, refined = await asyncio.to_thread(load_memo_text, text, text_ref)
+        memo = await get_async_memo_service().generate_memo(text, refine=refined, template_key=template_key,
+                                                            stream=writer, use_cache=use_cache, sectioned=sectioned,
+                                                            job_id=job_id, latency_target=latency_target)
+        
+        result = {
+            "memo": memo,
+            "template_used": template_key,
+            "startup_stage": "default"
+        }
+        update = {
+            "status": "completed",
+            "progress": 100,
+            "result": result
+        }
+        await asyncio.to_thread(update_job, job_id, update)
+        if writer:
+            writer.finish(result)
+            await writer.drain()
+        await asyncio.to_thread(finish_memo_flight, fingerprint, job_id, update, stream, orphaned)
+        
+        logger.info(f"Async memo generation task completed for job {job_id}")
+        return result
+        
+    except (Exception, asyncio.CancelledError) as e:
+        error = _error_message(e)
+        logger.error(f"Error in async memo generation task for job {job_id}: {error}", exc_info=True)
+        await asyncio.to_thread(update_job, job_id, {"status": "failed", "error": error})
+        if writer:
+            writer.fail(error)
+            await writer.drain()
+        await asyncio.to_thread(finish_memo_flight, fingerprint, job_id, {"status": "failed", "error": error}, stream,
+                                orphaned)
+        raise
+    finally:
+        if lease:
+            lease.set()
+
+async def generate_memo_batch_task_async(text, job_id, template_keys, use_cache=True, sectioned=None):
+    """
+    Generate memos for several templates on the event loop.
+    
+    Takes the same arguments as tasks.generate_memo_batch_task.
+    """
+    try:
+        logger.info(f"Starting async memo batch task for job {job_id} with templates {template_keys}")
+        
+        results = {key: {"status": "processing", "template_used": key} for key in template_keys}
+        await asyncio.to_thread(update_job, job_id, {"status": "processing", "progress": 10, "results": results})
+        lock = asyncio.Lock()
+        
+        async def on_result(template_key, result):
+            # Updates rewrite the whole job, so write them one at a time
+            async with lock:
+                results[template_key] = result
+                done = sum(1 for r in results.values() if r["status"] != "processing")
+                await asyncio.to_thread(update_job, job_id, {
+                    "progress": 10 + int(90 * done / len(template_keys)),
+                    "results": dict(results)
+                })
+        
+        results = await get_async_memo_service().generate_memos(text, template_keys, use_cache=use_cache,
+                                                                sectioned=sectioned, on_result=on_result)
+        
+        if not any(r["status"] == "completed" for r in results.values()):
+            raise Exception("; ".join(f"{key}: {r['error']}" for key, r in results.items()))
+        
+        result = {"memos": results, "templates": template_keys}
+        await asyncio.to_thread(update_job, job_id, {
+            "status": "completed",
+            "progress": 100,
+            "results": results,
+            "result": result
+        })
+        
+        logger.info(f"Async memo batch task completed for job {job_id}")
+        return result
+        
+    except (Exception, asyncio.CancelledError) as e:
+        error = _error_message(e)
+        logger.error(f"Error in async memo batch task for job {job_id}: {error}", exc_info=True)
+        await asyncio.to_thread(update_job, job_id, {"status": "failed", "error": error})
+        raise
+
+async def validate_claims_task_async(text, job_id):
+    """
+    Validate the claims of a memo or selection on the event loop.
+    
+    Takes the same arguments as tasks.validate_claims_task.
+    """
+    try:
+        logger.info(f"Starting async validation task for job {job_id}")
+        
+        service = get_async_memo_service()
+        claims = service.claims_to_validate(text)
+        results = [dict(claim, status="pending", results=[]) for claim in claims]
+        await asyncio.to_thread(update_job, job_id, {"status": "processing", "progress": 10, "claims": results})
+        lock = asyncio.Lock()
+        
+        async def on_result(index, result):
+            # Updates rewrite the whole job, so write them one at a time
+            async with lock:
+                results[index] = result
+                done = sum(1 for r in results if r["status"] != "pending")
+                await asyncio.to_thread(update_job, job_id, {
+                    "progress": 10 + int(90 * done / len(results)),
+                    "claims": list(results)
+                })
+        
+        results = await service.validate_claims(claims=claims, on_result=on_result)
+        
+        result = {"claims": results, "results": merge_claim_results(results)}
+        await asyncio.to_thread(update_job, job_id, {
+            "status": "completed",
+            "progress": 100,
+            "claims": results,
+            "result": result
+        })
+        
+        logger.info(f"Async validation task completed for job {job_id}")
+        return result
+        
+    except (Exception, asyncio.CancelledError) as e:
+        error = _error_message(e)
+        logger.error(f"Error in async validation task for job {job_id}: {error}", exc_info=True)
+        await asyncio.to_thread(update_job, job_id, {"status": "failed", "error": error})
+        raise
+
+def _task_name(func):
+    """Get the name RQ records for a task function."""
+    return f"{func.__module__}.{func.__qualname__}"
+
+# Async implementations of RQ tasks, by the RQ task's function name
+ASYNC_TASKS = {
+    _task_name(generate_memo_task): generate_memo_task_async,
+    _task_name(generate_memo_batch_task): generate_memo_batch_task_async,
+    _task_name(validate_claims_task): validate_claims_task_async
+}
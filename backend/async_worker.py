@@ -0,0 +1,177 @@
+"""
+Asyncio worker for network-bound background jobs.
+This module runs memo and validation jobs from the RQ queues concurrently on one event loop.
+RQ's worker runs one job per process, which leaves a process idle for most of
+a memo job while it waits on the LLM provider; this worker keeps up to
+ASYNC_WORKER_MAX_JOBS jobs in flight at once instead, while the provider
+in-flight limits keep the calls to each provider bounded.
+
+Run it alongside (or instead of) `rq worker memo_jobs validation_jobs`:
+
+    python -m backend.async_worker --queues memo_jobs validation_jobs --max-jobs 50
+"""
+
+import signal
+import asyncio
+import logging
+import argparse
+import traceback
+from datetime import datetime, timezone
+from rq import Queue
+from rq.job import JobStatus
+from rq.exceptions import DequeueTimeout
+from .config import Config
+from .tasks import redis_conn
+from .async_tasks import ASYNC_TASKS
+from .core.async_memo_service import get_async_memo_service
+
+logger = logging.getLogger(__name__)
+
+class AsyncWorker:
+    """Run jobs from RQ queues concurrently on an asyncio event loop."""
+
+    def __init__(self, queue_names, connection, max_jobs=50, dequeue_timeout=5):
+        """
+        Initialize the worker.
+
+        Args:
+            queue_names (list): Names of the RQ queues to take jobs from
+            connection: Redis connection of the queues
+            max_jobs (int): Maximum number of jobs running at once
+            dequeue_timeout (int): Seconds to wait for a job before checking
+                for shutdown again
+        """
+        self.queues = [Queue(name, connection=connection) for name in queue_names]
+        self.connection = connection
+        self.max_jobs = max_jobs
+        self.dequeue_timeout = dequeue_timeout
+        self._stopping = False
+        self._running = set()
+
+    def stop(self):
+        """Stop taking new jobs; running jobs are allowed to finish."""
+        if not self._stopping:
+            logger.info(f"Stopping async worker, waiting for {len(self._running)} running jobs")
+        self._stopping = True
+
+    async def run(self, burst=False):
+        """
+        Take and run jobs until stopped.
+
+        Args:
+            burst (bool): Stop once the queues are empty
+        """
+        slots = asyncio.Semaphore(self.max_jobs)
+        logger.info(f"Async worker started on {[q.name for q in self.queues]} (max_jobs={self.max_jobs})")
+
+        while not self._stopping:
+            await slots.acquire()
+            dequeued = await asyncio.to_thread(self._dequeue, burst)
+            if dequeued is None:
+                slots.release()
+                if burst:
+                    break
+                continue
+
+            job, queue = dequeued
+            task = asyncio.create_task(self.perform_job(job, queue))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("Async worker stopped")
+
+    def _dequeue(self, burst):
+        """Wait for the next job; returns None if no job arrived in time."""
+        try:
+            return Queue.dequeue_any(self.queues, None if burst else self.dequeue_timeout,
+                                     connection=self.connection)
+        except DequeueTimeout:
+            return None
+
+    async def perform_job(self, job, queue):
+        """
+        Run one job and record its outcome in the RQ registries.
+
+        Jobs with an async implementation run on the event loop; any other
+        job runs in a thread so the worker can still drain mixed queues.
+        Either way the job fails once it runs longer than its timeout.
+
+        Args:
+            job: The RQ job
+            queue: The queue the job was taken from
+        """
+        func = ASYNC_TASKS.get(job.func_name)
+        timeout = job.timeout or queue.DEFAULT_TIMEOUT
+        await asyncio.to_thread(self._start_job, job, queue, timeout)
+        logger.info(f"Running job {job.id} ({job.func_name}){'' if func else ' in a thread'}")
+
+        try:
+            if func is not None:
+                work = func(*job.args, **job.kwargs)
+            else:
+                work = asyncio.to_thread(job.func, *job.args, **job.kwargs)
+            # RQ uses a negative timeout for jobs that may run forever
+            await asyncio.wait_for(work, timeout if timeout > 0 else None)
+        except Exception as e:
+            exc_string = traceback.format_exc()
+            if isinstance(e, asyncio.TimeoutError):
+                logger.error(f"Job {job.id} exceeded its {timeout}s timeout")
+            else:
+                logger.error(f"Job {job.id} failed", exc_info=True)
+            await asyncio.to_thread(self._fail_job, job, queue, exc_string)
+            return
+
+        await asyncio.to_thread(self._finish_job, job, queue)
+        logger.info(f"Job {job.id} finished")
+
+    def _start_job(self, job, queue, timeout):
+        """Mark a job as started in Redis."""
+        job.started_at = datetime.now(timezone.utc)
+        job.set_status(JobStatus.STARTED)
+        # Same registry TTL as RQ's worker: the job timeout plus a minute
+        queue.started_job_registry.add(job, timeout + 60 if timeout > 0 else -1)
+
+    def _fail_job(self, job, queue, exc_string):
+        """Move a job from the started to the failed registry."""
+        job.ended_at = datetime.now(timezone.utc)
+        queue.started_job_registry.remove(job)
+        job.set_status(JobStatus.FAILED)
+        queue.failed_job_registry.add(job, exc_string=exc_string)
+
+    def _finish_job(self, job, queue):
+        """Move a job from the started to the finished registry."""
+        job.ended_at = datetime.now(timezone.utc)
+        queue.started_job_registry.remove(job)
+        job.set_status(JobStatus.FINISHED)
+        queue.finished_job_registry.add(job, job.get_result_ttl(500))
+
+async def _main(args):
+    worker = AsyncWorker(args.queues, redis_conn, max_jobs=args.max_jobs)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run(burst=args.burst)
+    finally:
+        await get_async_memo_service().close()
+
+def main():
+    """Run the async worker from the command line."""
+    parser = argparse.ArgumentParser(description="Run memo and validation jobs concurrently on one event loop")
+    parser.add_argument("--queues", nargs="+", default=["memo_jobs", "validation_jobs"],
+                        help="RQ queues to take jobs from")
+    parser.add_argument("--max-jobs", type=int, default=Config.ASYNC_WORKER_MAX_JOBS,
+                        help="maximum jobs running at once")
+    parser.add_argument("--burst", action="store_true", help="exit once the queues are empty")
+    args = parser.parse_args()
+
+    Config.configure_logging()
+    asyncio.run(_main(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Pitch Deck Analyzer.
+This package contains standalone scripts that measure performance of
+infrastructure components against local stand-in services.
+"""
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Benchmark the pooled provider HTTP client against bare requests calls.
+
+Starts a local HTTPS stub with a self-signed certificate (generated with the
+openssl CLI) and times sequential chat-completion style POSTs, first with a
+new connection per call (requests.post) and then through the shared
+keep-alive session. The difference is the TCP and TLS handshake cost saved
+per call.
+
+Usage:
+    python -m backend.benchmarks.http_client_benchmark --calls 200
+"""
+
+import os
+import ssl
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from urllib3.exceptions import InsecureRequestWarning
+from ..infrastructure.http_client import create_http_session
+
+RESPONSE_BODY = json.dumps({
+    "choices": [{"message": {"role": "assistant", "content": "ok"}}]
+}).encode("utf-8")
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive handler returning a fixed chat completion."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+def _make_certificate(directory):
+    """Generate a self-signed certificate for localhost."""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+def start_https_stub(cert, key):
+    """Start the HTTPS stub on a free port in a background thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _time_calls(post, url, calls):
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = post(url, json=payload, timeout=10, verify=False)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.mean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3)
+    }
+
+def run_benchmark(calls=200):
+    """
+    Run the benchmark and return per-call latency summaries.
+
+    Args:
+        calls (int): Number of sequential calls per client
+
+    Returns:
+        dict: Latency summaries for "bare" and "pooled" clients and the
+            mean milliseconds "saved_per_call_ms"
+    """
+    warnings.simplefilter("ignore", InsecureRequestWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = _make_certificate(directory)
+        server = start_https_stub(cert, key)
+        url = f"https://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+        try:
+            bare = _summary(_time_calls(requests.post, url, calls))
+            session = create_http_session()
+            pooled = _summary(_time_calls(session.post, url, calls))
+            session.close()
+        finally:
+            server.shutdown()
+
+    return {
+        "calls": calls,
+        "bare": bare,
+        "pooled": pooled,
+        "saved_per_call_ms": round(bare["mean_ms"] - pooled["mean_ms"], 3)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200, help="sequential calls per client")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.calls), indent=2))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the LLM and search providers, for offline load tests.
+
+Serves an OpenAI-style chat completions endpoint (including server-sent
+event streaming and usage reporting) on any path ending in
+/chat/completions, and the Google Custom Search response shape on any path
+ending in /customsearch/v1. Latency, token rates and errors are tunable, so
+the memo and validation paths can be benchmarked without provider quota.
+
+Point the backend at it with:
+
+    GROQ_BASE_URL=http://127.0.0.1:8090/groq/v1
+    OPENROUTER_BASE_URL=http://127.0.0.1:8090/openrouter/v1
+    GOOGLE_CSE_URL=http://127.0.0.1:8090/customsearch/v1
+
+Usage:
+    python -m backend.benchmarks.stub_provider --port 8090 \\
+        --first-token-latency lognormal:0.8,0.5 --tokens-per-second 80 \\
+        --error-rate 0.05 --error-status 429,503
+
+Latency distributions are given as "fixed:SECONDS", "uniform:LOW,HIGH",
+"normal:MEAN,STDDEV" or "lognormal:MEDIAN,SIGMA". GET /stats returns request
+and error counts and the peak number of requests in flight.
+"""
+
+import re
+import json
+import math
+import random
+import asyncio
+import argparse
+import threading
+from dataclasses import dataclass
+from aiohttp import web
+
+_WORDS = (
+    "the company targets mid-market retailers with a forecasting platform that reduces "
+    "inventory waste revenue grew quarter over quarter on recurring contracts while "
+    "gross margin improved the team previously built supply chain software at scale "
+    "risks include customer concentration and a long enterprise sales cycle"
+).split()
+
+_SECTION_PATTERN = re.compile(r'Write only the "(.+?)" section')
+
+def parse_distribution(spec):
+    """
+    Parse a latency distribution spec into a sampling function.
+
+    Args:
+        spec (str): "fixed:S", "uniform:LOW,HIGH", "normal:MEAN,STDDEV" or
+            "lognormal:MEDIAN,SIGMA", in seconds
+
+    Returns:
+        callable: Function taking a random.Random and returning seconds (>= 0)
+
+    Raises:
+        ValueError: If the spec is not recognized
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        # Parameterized by the median so specs read in seconds
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+@dataclass
+class StubOptions:
+    """Behaviour of the stub server."""
+
+    first_token_latency: str = "fixed:0.2"
+    tokens_per_second: float = 100.0
+    completion_tokens: int = 800
+    error_rate: float = 0.0
+    error_status: tuple = (503,)
+    stream_error_rate: float = 0.0
+    search_latency: str = "fixed:0.1"
+    search_error_rate: float = 0.0
+    seed: int = None
+
+class StubProvider:
+    """aiohttp application emulating the provider endpoints."""
+
+    def __init__(self, options=None):
+        self.options = options or StubOptions()
+        self.rng = random.Random(self.options.seed)
+        self.first_token_latency = parse_distribution(self.options.first_token_latency)
+        self.search_latency = parse_distribution(self.options.search_latency)
+        self.stats = {"requests": 0, "errors": 0, "stream_errors": 0, "searches": 0,
+                      "in_flight": 0, "peak_in_flight": 0}
+
+    def app(self):
+        """Build the aiohttp application."""
+        app = web.Application()
+        app.router.add_post(r"/{prefix:.*}chat/completions", self.chat_completions)
+        app.router.add_get(r"/{prefix:.*}customsearch/v1", self.custom_search)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+    def _error_response(self):
+        status = self.rng.choice(self.options.error_status)
+        self.stats["errors"] += 1
+        return web.json_response({"error": {"message": f"Injected error {status}", "code": status}},
+                                 status=status)
+
+    def _completion_text(self, body):
+        user = next((m["content"] for m in body.get("messages", []) if m.get("role") == "user"), "")
+        limit = min(self.options.completion_tokens, body.get("max_tokens") or self.options.completion_tokens)
+
+        match = _SECTION_PATTERN.search(user)
+        tokens = [f"## {match.group(1)}\n\n"] if match else ["# Investment Memo\n\n"]
+        while len(tokens) < limit:
+            word = self.rng.choice(_WORDS)
+            tokens.append(word + ("\n\n" if self.rng.random() < 0.05 else " "))
+        return tokens, len(user) // 4
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        try:
+            await asyncio.sleep(self.first_token_latency(self.rng))
+            if self.rng.random() < self.options.error_rate:
+                return self._error_response()
+
+            tokens, prompt_tokens = self._completion_text(body)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+                "prompt_tokens_details": {"cached_tokens": 0}
+            }
+            if body.get("stream"):
+                return await self._stream(request, body, tokens, usage)
+
+            await asyncio.sleep(len(tokens) / self.options.tokens_per_second)
+            return web.json_response({
+                "id": f"stub-{self.stats['requests']}",
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def _stream(self, request, body, tokens, usage):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        fail_at = len(tokens) // 2 if self.rng.random() < self.options.stream_error_rate else None
+        delay = 1.0 / self.options.tokens_per_second
+
+        for i, token in enumerate(tokens):
+            if i == fail_at:
+                self.stats["stream_errors"] += 1
+                error = {"error": {"message": "Injected stream error", "code": 500}}
+                await response.write(f"data: {json.dumps(error)}\n\n".encode())
+                return response
+            chunk = {"object": "chat.completion.chunk", "model": body.get("model"),
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(delay)
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await response.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def custom_search(self, request):
+        self.stats["searches"] += 1
+        await asyncio.sleep(self.search_latency(self.rng))
+        if self.rng.random() < self.options.search_error_rate:
+            return self._error_response()
+
+        query = request.query.get("q", "")
+        return web.json_response({
+            "kind": "customsearch#search",
+            "queries": {"request": [{"searchTerms": query}]},
+            "items": [
+                {
+                    "title": f"Result {i + 1} for {query[:40]}",
+                    "snippet": " ".join(self.rng.choice(_WORDS) for _ in range(25)),
+                    "link": f"https://example.com/{i + 1}"
+                }
+                for i in range(10)
+            ]
+        })
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+def start_stub_server(options=None, host="127.0.0.1", port=0):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        options (StubOptions): Server behaviour
+        host (str): Interface to bind
+        port (int): Port to bind, 0 for a free port
+
+    Returns:
+        tuple: The base URL, the StubProvider (for its stats) and a function
+            that stops the server
+    """
+    provider = StubProvider(options)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def start():
+        runner = web.AppRunner(provider.app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        state["runner"] = runner
+        state["port"] = site._server.sockets[0].getsockname()[1]
+        started.set()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait(10)
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(state["runner"].cleanup(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+
+    return f"http://{host}:{state['port']}", provider, stop
+
+def main():
+    """Run the stub server from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--first-token-latency", default="fixed:0.2",
+                        help="time to first token distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="completion token rate")
+    parser.add_argument("--completion-tokens", type=int, default=800, help="tokens per completion (capped by max_tokens)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing upfront")
+    parser.add_argument("--error-status", default="503", help="comma-separated statuses for injected errors")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="fraction of streams failing midway")
+    parser.add_argument("--search-latency", default="fixed:0.1", help="custom search latency distribution")
+    parser.add_argument("--search-error-rate", type=float, default=0.0, help="fraction of searches failing")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    args = parser.parse_args()
+
+    options = StubOptions(
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_status=tuple(int(s) for s in args.error_status.split(",")),
+        stream_error_rate=args.stream_error_rate,
+        search_latency=args.search_latency,
+        search_error_rate=args.search_error_rate,
+        seed=args.seed
+    )
+    print(f"Stub provider listening on http://{args.host}:{args.port}")
+    web.run_app(StubProvider(options).app(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ a single source of truth for all configuration values.
 """
 
 import os
+import json
 import logging
 from dotenv import load_dotenv
 
@@ -24,6 +25,11 @@ class Config:
     GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     
+    # Provider endpoints, overridable to point at a local stub for load tests
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+    OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+    GOOGLE_CSE_URL = os.getenv("GOOGLE_CSE_URL", "https://www.googleapis.com/customsearch/v1")
+    
     # Application settings
     DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1")
     DEBUG_LOGGING = os.getenv("DEBUG_LOGGING", "False").lower() in ("true", "1")
@@ -36,7 +42,121 @@ class Config:
     # File storage
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", os.path.join(BACKEND_DIR, "uploads"))
     MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", "16777216"))  # 16MB default
-    
+
+    # Text refinement
+    REFINE_CHUNKED = os.getenv("REFINE_CHUNKED", "True").lower() in ("true", "1")
+    REFINE_CHUNK_TOKENS = int(os.getenv("REFINE_CHUNK_TOKENS", "3000"))
+    REFINE_MAX_WORKERS = int(os.getenv("REFINE_MAX_WORKERS", "8"))
+    REFINE_TIMEOUT = int(os.getenv("REFINE_TIMEOUT", "30"))
+    # Noise score (0-1) of the raw extracted text at or above which it is sent for LLM refinement
+    REFINE_QUALITY_THRESHOLD = float(os.getenv("REFINE_QUALITY_THRESHOLD", "0.15"))
+    DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "True").lower() in ("true", "1")
+    # Maximum SimHash Hamming distance (out of 64 bits) for near-duplicate paragraphs
+    DEDUPE_MAX_DISTANCE = int(os.getenv("DEDUPE_MAX_DISTANCE", "6"))
+
+    # Provider circuit breakers, shared across workers through Redis
+    BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "True").lower() in ("true", "1")
+    BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_WINDOW_SECONDS = int(os.getenv("BREAKER_WINDOW_SECONDS", "300"))
+    BREAKER_OPEN_SECONDS = int(os.getenv("BREAKER_OPEN_SECONDS", "60"))
+    BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "45"))
+
+    # Outbound HTTP connection pooling
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+
+    # Memo generation
+    MEMO_MAX_TOKENS = int(os.getenv("MEMO_MAX_TOKENS", "16384"))
+    MEMO_MIN_OUTPUT_TOKENS = int(os.getenv("MEMO_MIN_OUTPUT_TOKENS", "2048"))
+    MEMO_CACHE_ENABLED = os.getenv("MEMO_CACHE_ENABLED", "True").lower() in ("true", "1")
+    MEMO_CACHE_TTL = int(os.getenv("MEMO_CACHE_TTL", "86400"))  # 24 hours
+    MEMO_CACHE_MAX_ENTRIES = int(os.getenv("MEMO_CACHE_MAX_ENTRIES", "1000"))
+    # Prepared deck text stored by PDF jobs, referenced by memo jobs
+    PREPARED_TEXT_TTL = int(os.getenv("PREPARED_TEXT_TTL", "86400"))  # 24 hours
+    ARTIFACT_MAX_ENTRIES = int(os.getenv("ARTIFACT_MAX_ENTRIES", "1000"))
+    # Identical memo requests made while one is running share its job
+    MEMO_COALESCE_ENABLED = os.getenv("MEMO_COALESCE_ENABLED", "True").lower() in ("true", "1")
+    MEMO_COALESCE_TTL = int(os.getenv("MEMO_COALESCE_TTL", "900"))  # 15 minutes
+    # A running leader keeps renewing a claim this short, so a dead one is noticed quickly
+    MEMO_COALESCE_LEASE = int(os.getenv("MEMO_COALESCE_LEASE", "30"))
+    # Hedged requests: also call OpenRouter if Groq is slower than the delay
+    # (or Groq's recent p95 latency, if shorter). The first response wins.
+    MEMO_HEDGING_ENABLED = os.getenv("MEMO_HEDGING_ENABLED", "False").lower() in ("true", "1")
+    MEMO_HEDGE_DELAY = float(os.getenv("MEMO_HEDGE_DELAY", "15"))
+    MEMO_HEDGE_MIN_SAMPLES = int(os.getenv("MEMO_HEDGE_MIN_SAMPLES", "20"))
+    # Sectioned generation: one concurrent request per template section
+    MEMO_SECTIONED = os.getenv("MEMO_SECTIONED", "False").lower() in ("true", "1")
+    MEMO_SECTION_MAX_WORKERS = int(os.getenv("MEMO_SECTION_MAX_WORKERS", "8"))
+    MEMO_SECTION_MAX_TOKENS = int(os.getenv("MEMO_SECTION_MAX_TOKENS", "4096"))
+    # Model routing: the first route whose limits fit a memo request picks its
+    # providers (tried in order), models and completion budget. A route can cap
+    # the estimated input tokens, serve only requests with a latency target of
+    # at most max_latency_target seconds, and list the templates it serves.
+    # Routes match on the deck's size before compression, which then cuts the
+    # deck to the route's compression_tokens (default MEMO_COMPRESSION_TOKENS).
+    # Override the table with a JSON list in MEMO_ROUTES.
+    MEMO_ROUTING_ENABLED = os.getenv("MEMO_ROUTING_ENABLED", "True").lower() in ("true", "1")
+    MEMO_ROUTES = json.loads(os.getenv("MEMO_ROUTES") or "null") or [
+        # Interactive requests and short decks go to fast non-reasoning models
+        {"name": "interactive", "max_input_tokens": 16000, "max_latency_target": 30, "max_tokens": 4096,
+         "providers": [["Groq", "llama-3.3-70b-versatile"], ["OpenRouter", "meta-llama/llama-3.3-70b-instruct:free"]]},
+        {"name": "short", "max_input_tokens": 3000, "max_tokens": 4096,
+         "providers": [["Groq", "llama-3.3-70b-versatile"], ["OpenRouter", "meta-llama/llama-3.3-70b-instruct:free"]]},
+        {"name": "standard", "max_input_tokens": 100000, "max_tokens": 16384,
+         "providers": [["Groq", "deepseek-r1-distill-llama-70b"], ["OpenRouter", "deepseek/deepseek-r1:free"]]},
+        # Decks beyond Groq's context window go to the larger-context model first
+        {"name": "large", "max_tokens": 16384, "compression_tokens": 32000,
+         "providers": [["OpenRouter", "deepseek/deepseek-r1:free"], ["Groq", "deepseek-r1-distill-llama-70b"]]}
+    ]
+    # Batch generation: memos generated concurrently for one deck
+    MEMO_BATCH_MAX_WORKERS = int(os.getenv("MEMO_BATCH_MAX_WORKERS", "4"))
+    # Aggregate provider token usage and prompt cache hits in Redis
+    MEMO_USAGE_STATS_ENABLED = os.getenv("MEMO_USAGE_STATS_ENABLED", "True").lower() in ("true", "1")
+    # Reasoning tokens R1 models may spend before answering (0 = no budget). Sent
+    # to providers that accept a budget; exceeding it is logged and recorded.
+    MEMO_REASONING_MAX_TOKENS = int(os.getenv("MEMO_REASONING_MAX_TOKENS", "4096"))
+    # Extractive compression of deck text longer than the token budget
+    MEMO_COMPRESSION_ENABLED = os.getenv("MEMO_COMPRESSION_ENABLED", "True").lower() in ("true", "1")
+    MEMO_COMPRESSION_TOKENS = int(os.getenv("MEMO_COMPRESSION_TOKENS", "8000"))
+    # Sectioned generation sends each section the top-k deck pages from a BM25 index
+    MEMO_RETRIEVAL_ENABLED = os.getenv("MEMO_RETRIEVAL_ENABLED", "True").lower() in ("true", "1")
+    MEMO_RETRIEVAL_TOP_K = int(os.getenv("MEMO_RETRIEVAL_TOP_K", "4"))
+    MEMO_RETRIEVAL_PAGE_TOKENS = int(os.getenv("MEMO_RETRIEVAL_PAGE_TOKENS", "600"))
+    MEMO_RETRIEVAL_INDEX_TTL = int(os.getenv("MEMO_RETRIEVAL_INDEX_TTL", "86400"))  # 24 hours
+    MEMO_RETRIEVAL_INDEX_MAX_ENTRIES = int(os.getenv("MEMO_RETRIEVAL_INDEX_MAX_ENTRIES", "1000"))
+
+    # Google Custom Search validation results cached by normalized query.
+    # Searches that found nothing are cached for the shorter negative TTL.
+    VALIDATION_CACHE_ENABLED = os.getenv("VALIDATION_CACHE_ENABLED", "True").lower() in ("true", "1")
+    VALIDATION_CACHE_TTL = int(os.getenv("VALIDATION_CACHE_TTL", "86400"))  # 24 hours
+    VALIDATION_CACHE_NEGATIVE_TTL = int(os.getenv("VALIDATION_CACHE_NEGATIVE_TTL", "3600"))  # 1 hour
+    VALIDATION_CACHE_MAX_ENTRIES = int(os.getenv("VALIDATION_CACHE_MAX_ENTRIES", "5000"))
+    # Claims extracted from a memo or selection are validated concurrently
+    VALIDATION_MAX_CLAIMS = int(os.getenv("VALIDATION_MAX_CLAIMS", "20"))
+    VALIDATION_MAX_WORKERS = int(os.getenv("VALIDATION_MAX_WORKERS", "4"))
+    VALIDATION_CLAIM_TIMEOUT = float(os.getenv("VALIDATION_CLAIM_TIMEOUT", "10"))
+    # Selections with more claims are validated as a background job
+    VALIDATION_SYNC_MAX_CLAIMS = int(os.getenv("VALIDATION_SYNC_MAX_CLAIMS", "4"))
+
+    # Async worker: memo and validation jobs running concurrently on one event loop
+    ASYNC_WORKER_MAX_JOBS = int(os.getenv("ASYNC_WORKER_MAX_JOBS", "50"))
+    GROQ_MAX_IN_FLIGHT = int(os.getenv("GROQ_MAX_IN_FLIGHT", "16"))
+    OPENROUTER_MAX_IN_FLIGHT = int(os.getenv("OPENROUTER_MAX_IN_FLIGHT", "16"))
+    GOOGLE_CSE_MAX_IN_FLIGHT = int(os.getenv("GOOGLE_CSE_MAX_IN_FLIGHT", "8"))
+
+    # Provider rate limits shared by all workers through Redis (0 = unlimited).
+    # Calls wait up to RATE_LIMIT_MAX_WAIT seconds for capacity. Each call
+    # reserves its prompt plus RATE_LIMIT_COMPLETION_TOKENS and settles the
+    # difference once the provider reports the tokens actually used.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("true", "1")
+    RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+    RATE_LIMIT_COMPLETION_TOKENS = int(os.getenv("RATE_LIMIT_COMPLETION_TOKENS", "2048"))
+    GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+    GROQ_TPM = int(os.getenv("GROQ_TPM", "0"))
+    OPENROUTER_RPM = int(os.getenv("OPENROUTER_RPM", "20"))
+    OPENROUTER_TPM = int(os.getenv("OPENROUTER_TPM", "0"))
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = os.getenv("LOG_FILE", "app.log")
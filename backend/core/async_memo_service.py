@@ -0,0 +1,517 @@
+"""
+Asyncio investment memo generation service.
+This module provides a memo service whose Groq, OpenRouter and Google Custom
+Search calls run on an asyncio event loop, so that one process can drive many
+memo and validation requests while they wait on the network.
+"""
+
+import time
+import asyncio
+import logging
+import aiohttp
+from ..utils.error_handling import ProcessingError
+from ..infrastructure.async_http_client import create_async_session, ProviderLimiter
+from ..infrastructure.rate_limiter import get_rate_limiter
+from ..utils.text_processing import prepare_text
+from ..prompts import get_compiled_template
+from ..utils.reasoning import ReasoningFilter
+from .memo_service import MemoService, _GenerationMetrics, _job_metrics, _with_heading, _failed_section
+
+logger = logging.getLogger(__name__)
+
+class AsyncMemoService(MemoService):
+    """
+    Memo service with coroutine-based provider calls.
+
+    Prompt building, the memo cache, circuit breakers and usage statistics
+    are shared with MemoService; only the network calls differ. Their Redis
+    calls run in threads so they never block the event loop. Requests to
+    each provider are capped by an in-flight limit, and callers wait for a
+    free slot. Hedged requests are not used: with many memos in flight on
+    one loop, duplicating slow calls would mostly add load to the providers.
+    """
+
+    def __init__(self, config, session=None):
+        """
+        Initialize the service.
+
+        Args:
+            config: Configuration object
+            session: Optional aiohttp session; one is created on first use
+        """
+        super().__init__(config)
+        self._session = session
+        self.limiter = ProviderLimiter({
+            "Groq": config.GROQ_MAX_IN_FLIGHT,
+            "OpenRouter": config.OPENROUTER_MAX_IN_FLIGHT,
+            "GoogleCSE": config.GOOGLE_CSE_MAX_IN_FLIGHT
+        })
+
+    def _get_session(self):
+        """Get the aiohttp session, creating it on the running loop if needed."""
+        if self._session is None:
+            self._session = create_async_session(
+                limit=self.config.HTTP_POOL_MAXSIZE * 5,
+                limit_per_host=self.config.HTTP_POOL_MAXSIZE
+            )
+        return self._session
+
+    async def close(self):
+        """Close the aiohttp session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def generate_memo(self, text, refine=False, template_key="default", stream=None, use_cache=True,
+                            sectioned=None, job_id=None, latency_target=None):
+        """
+        Generate an investment memo from text.
+
+        Args:
+            text (str): The text to generate a memo from
+            refine (bool): Whether the text is already refined
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            use_cache (bool): Whether a cached memo may be returned
+            sectioned (bool): Whether to generate each template section with
+                its own concurrent request (defaults to MEMO_SECTIONED)
+            job_id (str): Optional job whose metadata records the compression,
+                the route and the time and tokens spent on reasoning
+            latency_target (float): Optional seconds the caller is willing to
+                wait, used to route interactive requests to faster models
+
+        Returns:
+            str: The generated investment memo
+
+        Raises:
+            ProcessingError: If memo generation fails
+        """
+        # Tasks started below inherit the context, so sections add to the same totals
+        metrics_token = _job_metrics.set(_GenerationMetrics()) if job_id else None
+        try:
+            # Text preparation is CPU-bound, keep it off the event loop
+            input_text = text if refine else (await asyncio.to_thread(prepare_text, text, False))["cleaned_text"]
+            logger.info(f"Generating memo from {len(input_text)} chars of text using template '{template_key}'")
+
+            if sectioned is None:
+                sectioned = self.config.MEMO_SECTIONED
+            # Route on the full deck so large decks can reach the large route
+            route = self.route_request(input_text, template_key, latency_target)
+            # Sections retrieve their own pages, so the whole deck is only
+            # compressed when it goes into a single prompt
+            if not (sectioned and self.config.MEMO_RETRIEVAL_ENABLED):
+                input_text = await asyncio.to_thread(self._compress_context, input_text, template_key, job_id,
+                                                     route["compression_tokens"])
+            if metrics_token is not None:
+                _job_metrics.get().route = route["name"]
+            if sectioned:
+                return await self._generate_sectioned(input_text, template_key, stream=stream, use_cache=use_cache,
+                                                      route=route)
+
+            return await self._generate_with_fallback(input_text, template_key, stream=stream, use_cache=use_cache,
+                                                      route=route)
+
+        except Exception as e:
+            logger.error(f"Failed to generate memo: {str(e)}", exc_info=True)
+            raise ProcessingError(f"Failed to generate memo: {str(e)}")
+        finally:
+            if metrics_token is not None:
+                await asyncio.to_thread(self._record_job_metrics, job_id, _job_metrics.get())
+                _job_metrics.reset(metrics_token)
+
+    async def generate_memos(self, text, template_keys, refine=False, use_cache=True, sectioned=None,
+                             on_result=None):
+        """
+        Generate memos for several templates from one piece of text.
+
+        Args:
+            text (str): The text to generate memos from
+            template_keys (list): The keys of the templates to use
+            refine (bool): Whether the text is already refined
+            use_cache (bool): Whether cached memos may be returned
+            sectioned (bool): Whether to generate template sections in parallel
+            on_result (callable): Optional coroutine function awaited with the
+                template key and its result as each memo finishes
+
+        Returns:
+            dict: Result per template key, as returned by MemoService.generate_memos
+
+        Raises:
+            ProcessingError: If the text cannot be prepared
+        """
+        try:
+            input_text = text if refine else (await asyncio.to_thread(prepare_text, text, False))["cleaned_text"]
+        except Exception as e:
+            logger.error(f"Failed to prepare text for memo batch: {str(e)}", exc_info=True)
+            raise ProcessingError(f"Failed to prepare text: {str(e)}")
+
+        results = {}
+
+        async def generate(template_key):
+            try:
+                memo = await self.generate_memo(input_text, refine=True, template_key=template_key,
+                                                use_cache=use_cache, sectioned=sectioned)
+                result = {"status": "completed", "memo": memo, "template_used": template_key}
+            except Exception as e:
+                result = {"status": "failed", "error": str(e), "template_used": template_key}
+            results[template_key] = result
+            if on_result is not None:
+                await on_result(template_key, result)
+
+        await asyncio.gather(*(generate(key) for key in template_keys))
+        return {key: results[key] for key in template_keys}
+
+    async def _generate_with_fallback(self, input_text, template_key, stream=None, use_cache=True, section=None,
+                                      route=None):
+        """
+        Generate a memo (or one section) from the cache or the available providers.
+
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            use_cache (bool): Whether a cached result may be returned
+            section (str): Optional section name for sectioned generation
+            route (dict): The route from route_request (defaults to Groq with
+                an OpenRouter fallback)
+
+        Returns:
+            str: The generated memo or section
+
+        Raises:
+            Exception: If no provider produced a result
+        """
+        route = route or self._default_route()
+        providers = self._route_providers(route)
+
+        if use_cache:
+            memo = await asyncio.to_thread(self._get_cached_memo, input_text, template_key,
+                                           [model for _, model in providers], section)
+            if memo is not None:
+                if stream is not None:
+                    stream.token(memo)
+                return memo
+
+        last_error = Exception("No memo provider is configured")
+        for i, (provider, model) in enumerate(providers):
+            if not await self._provider_available(provider):
+                last_error = Exception(f"{provider} circuit breaker is open")
+                continue
+            try:
+                return await self._call_provider(provider, input_text, template_key, stream=stream, section=section,
+                                                 model=model, max_tokens=route["max_tokens"])
+            except Exception as e:
+                if i == len(providers) - 1:
+                    raise
+                logger.warning(f"{provider} API failed: {str(e)}, falling back to {providers[i + 1][0]}")
+                last_error = e
+                if stream is not None:
+                    # Discard any partial output streamed by the failed provider
+                    stream.reset()
+
+        raise last_error
+
+    async def _generate_sectioned(self, input_text, template_key, stream=None, use_cache=True, route=None):
+        """
+        Generate a memo with one concurrent request per template section.
+
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for completed sections
+            use_cache (bool): Whether cached sections may be returned
+            route (dict): Optional route from route_request for every section
+
+        Returns:
+            str: The stitched memo
+
+        Raises:
+            Exception: If every section failed
+        """
+        sections = get_compiled_template(template_key)["sections_order"]
+        # Index lookups and builds hit Redis and are CPU-bound, keep them off the event loop
+        contexts = await asyncio.to_thread(self._section_contexts, input_text, template_key, sections,
+                                           route["compression_tokens"] if route else None)
+        results = [None] * len(sections)
+        errors = []
+        emitted = 0
+
+        async def generate(i, section):
+            nonlocal emitted
+            try:
+                text = await self._generate_with_fallback(contexts[section], template_key, use_cache=use_cache,
+                                                          section=section, route=route)
+                results[i] = _with_heading(section, text)
+            except Exception as e:
+                logger.warning(f"Section '{section}' failed: {str(e)}")
+                errors.append(e)
+                results[i] = _failed_section(section)
+
+            # Release finished sections to the stream in template order
+            while emitted < len(sections) and results[emitted] is not None:
+                if stream is not None:
+                    stream.token(results[emitted] + "\n\n")
+                emitted += 1
+
+        await asyncio.gather(*(generate(i, section) for i, section in enumerate(sections)))
+
+        if len(errors) == len(sections):
+            raise errors[0]
+        return "\n\n".join(result.strip() for result in results)
+
+    async def _provider_available(self, provider):
+        """Check the provider's circuit breaker before calling it."""
+        breaker = self._get_breaker(provider)
+        if breaker is None:
+            return True
+        allowed = await asyncio.to_thread(breaker.allow_request)
+        if allowed and allowed is not True:
+            # The probe token was won in the thread, keep it for record_*
+            breaker.hold_probe(allowed)
+        return bool(allowed)
+
+    async def _call_groq_api(self, input_text, template_key, stream=None, section=None, model=None,
+                             max_tokens=None):
+        """Call the Groq API to generate a memo."""
+        return await self._chat_completion("Groq", self.groq_url, self.config.GROQ_API_KEY,
+                                           model or self.GROQ_MODEL, input_text, template_key,
+                                           stream=stream, section=section, max_tokens=max_tokens)
+
+    async def _call_openrouter_api(self, input_text, template_key, stream=None, section=None, model=None,
+                                   max_tokens=None):
+        """Call the OpenRouter API to generate a memo."""
+        return await self._chat_completion("OpenRouter", self.openrouter_url, self.config.HF_API_KEY,
+                                           model or self.OPENROUTER_MODEL, input_text, template_key,
+                                           stream=stream, section=section, max_tokens=max_tokens)
+
+    async def _chat_completion(self, provider, url, api_key, model, input_text, template_key, stream=None,
+                               section=None, max_tokens=None):
+        """
+        Request a memo from a provider within its rate and in-flight limits,
+        recording the outcome in its circuit breaker.
+
+        Args:
+            provider (str): Provider name used in logs, errors, limits and breaker keys
+            url (str): The chat completions endpoint
+            api_key (str): The provider API key
+            model (str): The model to request
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            section (str): Optional section name for sectioned generation
+            max_tokens (int): Optional completion budget for a whole memo
+
+        Returns:
+            str: The generated memo
+
+        Raises:
+            Exception: If the API call fails
+        """
+        headers, data, prompt_tokens = self._build_completion_request(api_key, model, input_text, template_key,
+                                                                      stream is not None, section, provider,
+                                                                      max_tokens)
+
+        # Wait for rate limit capacity before taking an in-flight slot
+        limiter = get_rate_limiter(provider, model, self.config)
+        granted = 0
+        if limiter:
+            reserved_tokens = self._rate_limit_reservation(prompt_tokens, data["max_tokens"])
+            await limiter.acquire_async(reserved_tokens, self.config.RATE_LIMIT_MAX_WAIT)
+            granted = limiter.cost(reserved_tokens)
+
+        usage, failed = None, True
+        try:
+            async with self.limiter.slot(provider):
+                breaker = self._get_breaker(provider)
+                started = time.monotonic()
+                try:
+                    memo, usage, reasoning = await self._request_completion(provider, url, headers, data, stream)
+                    failed = False
+                except Exception:
+                    if breaker:
+                        await asyncio.to_thread(breaker.record_failure, time.monotonic() - started)
+                    raise
+        finally:
+            await asyncio.to_thread(self._settle_rate_limit, limiter, granted, prompt_tokens, usage, failed)
+
+        latency = time.monotonic() - started
+        if breaker:
+            await asyncio.to_thread(breaker.record_success, latency)
+        await asyncio.to_thread(self._complete_memo, provider, model, input_text, template_key, section, memo,
+                                latency, usage)
+        self._record_reasoning(reasoning.metrics(usage, streamed=stream is not None))
+        return memo
+
+    async def _request_completion(self, provider, url, headers, data, stream=None):
+        """
+        Send a request to an OpenAI-compatible chat completions endpoint.
+
+        Args:
+            provider (str): Provider name used in logs and error messages
+            url (str): The chat completions endpoint
+            headers (dict): The request headers
+            data (dict): The request body
+            stream: Optional stream writer for streamed tokens
+
+        Returns:
+            tuple: The generated memo without reasoning, the reported token
+                usage and the ReasoningFilter holding the reasoning
+
+        Raises:
+            Exception: If the API call fails
+        """
+        logger.debug(f"Sending request to {provider} API")
+        reasoning = ReasoningFilter(stream, self.config.MEMO_REASONING_MAX_TOKENS, data["model"],
+                                    separate=bool(self._reasoning_options(provider)))
+        async with self._get_session().post(url, headers=headers, json=data) as response:
+            if response.status < 400:
+                if stream is not None:
+                    usage = {}
+                    parts = []
+                    async for raw_line in response.content:
+                        line = raw_line.decode("utf-8").rstrip("\r\n")
+                        if not self._handle_stream_line(line, parts, reasoning, usage):
+                            break
+                    reasoning.finish()
+                    memo = reasoning.answer
+                    logger.info(f"Successfully streamed memo with {provider} API ({len(memo)} chars)")
+                    return memo, usage, reasoning
+
+                result = await response.json(content_type=None)
+                if result.get("choices"):
+                    memo = self._read_completion_message(result["choices"][0]["message"], reasoning)
+                    logger.info(f"Successfully generated memo with {provider} API ({len(memo)} chars)")
+                    return memo, result.get("usage"), reasoning
+                logger.error(f"Unexpected {provider} API response format: {result}")
+
+            error_message = self._completion_error(provider, response.status, await response.text())
+
+        logger.error(error_message)
+        raise Exception(error_message)
+
+    async def validate_memo(self, memo, query=None):
+        """
+        Validate memo claims with Google Custom Search.
+
+        Args:
+            memo (str): The memo text
+            query (str): Optional query; the memo text is used if omitted
+
+        Returns:
+            list: Search results
+
+        Raises:
+            ProcessingError: If validation fails
+        """
+        try:
+            return await self._google_custom_search(query or memo)
+        except Exception as e:
+            logger.error(f"Failed to validate memo: {str(e)}", exc_info=True)
+            raise ProcessingError(f"Failed to validate memo: {str(e)}")
+
+    async def validate_claims(self, text=None, on_result=None, claims=None):
+        """
+        Validate the factual claims of a memo or selection concurrently.
+
+        Takes the same arguments as MemoService.validate_claims, except that
+        on_result is a coroutine function; searches run on the event loop, at
+        most VALIDATION_MAX_WORKERS at a time.
+
+        Returns:
+            list: Result per claim in order of appearance
+        """
+        claims = claims or self.claims_to_validate(text)
+        timeout = self.config.VALIDATION_CLAIM_TIMEOUT
+        semaphore = asyncio.Semaphore(max(1, self.config.VALIDATION_MAX_WORKERS))
+        results = [None] * len(claims)
+        logger.info(f"Validating {len(claims)} claims")
+
+        async def validate(index):
+            claim = claims[index]
+            async with semaphore:
+                try:
+                    # The timeout limits the request, not the wait for a GoogleCSE slot
+                    found = await self._google_custom_search(claim["query"], timeout=timeout, raise_errors=True)
+                    result = self._claim_result(claim, results=found)
+                except asyncio.TimeoutError:
+                    result = self._claim_result(claim, error="timeout")
+                except Exception as e:
+                    logger.warning(f"Validation of claim {index} failed: {str(e)}")
+                    result = self._claim_result(claim, error="error")
+            results[index] = result
+            if on_result is not None:
+                await on_result(index, result)
+
+        await asyncio.gather(*(validate(i) for i in range(len(claims))))
+        return results
+
+    async def _google_custom_search(self, query, timeout=10, raise_errors=False):
+        """
+        Perform a Google Custom Search to validate claims.
+
+        Args:
+            query (str): The query to search for
+            timeout (float): Request timeout in seconds
+            raise_errors (bool): Whether to raise on a search error instead of
+                returning no results
+
+        Returns:
+            list: Search results
+
+        Raises:
+            ProcessingError: If the search fails and raise_errors is set
+            asyncio.TimeoutError: If the request times out and raise_errors
+                is set
+        """
+        if not self.config.GOOGLE_API_KEY or not self.config.GOOGLE_CSE_ID:
+            logger.warning("Google API key or CSE ID not configured, skipping validation")
+            return []
+
+        cached = await asyncio.to_thread(self._get_cached_validation, query)
+        if cached is not None:
+            return cached
+
+        params = {
+            "key": self.config.GOOGLE_API_KEY,
+            "cx": self.config.GOOGLE_CSE_ID,
+            "q": query
+        }
+
+        logger.debug(f"Performing Google Custom Search for: {query[:50]}...")
+        async with self.limiter.slot("GoogleCSE"):
+            try:
+                async with self._get_session().get(self.google_cse_url, params=params,
+                                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status < 400:
+                        results = self._parse_search_results(await response.json(content_type=None))
+                        await asyncio.to_thread(self._cache_validation, query, results)
+                        return results
+                    status = response.status
+            except asyncio.TimeoutError:
+                logger.error(f"Google Custom Search request timed out after {timeout}s")
+                if raise_errors:
+                    raise
+                return []
+            except aiohttp.ClientError as e:
+                logger.error(f"Google Custom Search request failed: {str(e)}")
+                if raise_errors:
+                    raise ProcessingError(f"Google Custom Search request failed: {str(e)}")
+                return []
+
+        logger.error(f"Google Custom Search error: {status}")
+        if raise_errors:
+            raise ProcessingError(f"Google Custom Search error: {status}")
+        return []
+
+# Create a singleton instance
+_async_memo_service = None
+
+def get_async_memo_service(config=None):
+    """Get the singleton AsyncMemoService instance."""
+    global _async_memo_service
+
+    if _async_memo_service is None:
+        from ..config import Config
+        _async_memo_service = AsyncMemoService(config or Config)
+
+    return _async_memo_service
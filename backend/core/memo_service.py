@@ -3,24 +3,371 @@ Investment memo generation service.
 This module provides functionality to generate investment memos from pitch deck text.
 """
 
+import json
+import time
 import logging
+import threading
+import contextvars
+import redis
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from ..utils.error_handling import ProcessingError
-from ..infrastructure.job_manager import update_job
+from ..infrastructure.job_manager import update_job, update_job_metadata
+from ..infrastructure.http_client import get_http_session
+from ..infrastructure.cache import RedisCache, make_cache_key
+from ..infrastructure.circuit_breaker import CircuitBreaker
+from ..infrastructure.rate_limiter import get_rate_limiter
 from ..utils.text_processing import prepare_text
-from ..prompts import build_memo_prompt  # New import for consolidated prompts
+from ..utils.context_compression import compress_text
+from ..utils.retrieval import get_deck_index, section_context
+from ..utils.reasoning import ReasoningFilter, is_reasoning_model
+from ..utils.token_budget import estimate_tokens
+from ..utils.claims import extract_claims, normalize_query
+from ..prompts import build_memo_request, get_compiled_template  # New import for consolidated prompts
 
 logger = logging.getLogger(__name__)
 
+class HedgeCancelled(Exception):
+    """Raised inside a hedged provider call that lost the race."""
+
+class _HedgeCollector:
+    """
+    Stream writer for hedged attempts.
+    
+    Hedged attempts are requested with provider streaming so that the losing
+    attempt can be aborted between chunks, closing its connection.
+    """
+    
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+    
+    def token(self, text):
+        if self.cancelled.is_set():
+            raise HedgeCancelled()
+    
+    def reasoning(self, text):
+        # Reasoning can run for minutes, the loser is aborted during it too
+        self.token(text)
+    
+    def reset(self):
+        pass
+
+class _GenerationMetrics:
+    """Reasoning and answer totals over the provider calls of one job."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.route = None
+        self.totals = {"reasoning_tokens": 0, "answer_tokens": 0, "reasoning_seconds": 0.0,
+                       "answer_seconds": 0.0, "reasoning_budget_exceeded": False}
+    
+    def add(self, metrics):
+        with self.lock:
+            for key, value in metrics.items():
+                if isinstance(value, bool):
+                    self.totals[key] = self.totals[key] or value
+                else:
+                    self.totals[key] = round(self.totals[key] + value, 3)
+
+# Metrics of the job being generated; copied into section and hedge threads
+_job_metrics = contextvars.ContextVar("memo_job_metrics", default=None)
+
+def _cached_prompt_tokens(usage):
+    """Get the prompt tokens served from the provider's prompt cache."""
+    details = usage.get("prompt_tokens_details") or {}
+    # OpenAI-style responses report cached_tokens, DeepSeek reports cache hits
+    return details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0
+
+def _with_heading(section, text):
+    """Make sure a generated section starts with its own heading."""
+    if not text.lstrip().startswith("#"):
+        text = f"## {section}\n\n{text}"
+    return text
+
+def _failed_section(section):
+    """Placeholder for a section that could not be generated."""
+    return f"## {section}\n\n_This section could not be generated._"
+
 class MemoService:
     """Service for generating investment memos."""
     
+    GROQ_MODEL = "deepseek-r1-distill-llama-70b"
+    OPENROUTER_MODEL = "deepseek/deepseek-r1:free"
+    TEMPERATURE = 0.7
+    
     def __init__(self, config):
         """Initialize the memo service with configuration."""
         self.config = config
+        self.groq_url = f"{config.GROQ_BASE_URL.rstrip('/')}/chat/completions"
+        self.openrouter_url = f"{config.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
+        self.google_cse_url = config.GOOGLE_CSE_URL
+        self._memo_cache = None
+        self._validation_cache = None
+        # Recent successful call latencies in seconds, per provider
+        self._latencies = {}
+        self._breakers = {}
+        self._redis_client = None
         logger.info("Initialized MemoService")
     
-    def generate_memo(self, text, refine=False, template_key="default"):
+    def _get_redis(self):
+        """Get the Redis client shared by the breakers and usage stats."""
+        if self._redis_client is None:
+            redis_url = f"redis://{self.config.REDIS_HOST}:{self.config.REDIS_PORT}/{self.config.REDIS_DB}"
+            self._redis_client = redis.from_url(redis_url)
+        return self._redis_client
+    
+    def _get_breaker(self, provider):
+        """Get the shared circuit breaker for a provider, or None if disabled."""
+        if not self.config.BREAKER_ENABLED:
+            return None
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(
+                self._get_redis(),
+                provider.lower(),
+                error_rate_threshold=self.config.BREAKER_ERROR_RATE,
+                min_calls=self.config.BREAKER_MIN_CALLS,
+                window_seconds=self.config.BREAKER_WINDOW_SECONDS,
+                open_seconds=self.config.BREAKER_OPEN_SECONDS,
+                slow_call_seconds=self.config.BREAKER_SLOW_CALL_SECONDS
+            )
+        return self._breakers[provider]
+    
+    def _provider_available(self, provider):
+        """Check the provider's circuit breaker before calling it."""
+        breaker = self._get_breaker(provider)
+        return breaker is None or breaker.allow_request()
+    
+    def provider_health(self):
+        """
+        Get the circuit breaker state and health of each memo provider.
+        
+        Returns:
+            dict: Breaker status per provider, or None if breakers are disabled
+        """
+        if not self.config.BREAKER_ENABLED:
+            return None
+        
+        health = {}
+        for provider in ("Groq", "OpenRouter"):
+            try:
+                health[provider] = self._get_breaker(provider).status()
+            except Exception as e:
+                health[provider] = {"state": "unknown", "error": str(e)}
+        return health
+    
+    def _record_usage(self, provider, usage, latency):
+        """
+        Add a call's token usage to the shared prompt cache statistics.
+        
+        Args:
+            provider (str): The provider name
+            usage (dict): The "usage" object of the provider response
+            latency (float): Call duration in seconds
+        """
+        if not self.config.MEMO_USAGE_STATS_ENABLED or not usage:
+            return
+        
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        cached_tokens = _cached_prompt_tokens(usage)
+        logger.info(f"{provider} usage: {prompt_tokens} prompt tokens ({cached_tokens} cached), "
+                    f"{usage.get('completion_tokens') or 0} completion tokens in {latency:.1f}s")
+        
+        # Split latency by cache hit so the savings can be compared
+        kind = "cached" if cached_tokens else "uncached"
+        try:
+            key = f"memo_usage:{provider.lower()}"
+            pipe = self._get_redis().pipeline()
+            pipe.hincrby(key, "requests", 1)
+            pipe.hincrby(key, "prompt_tokens", prompt_tokens)
+            pipe.hincrby(key, "cached_tokens", cached_tokens)
+            pipe.hincrby(key, f"{kind}_requests", 1)
+            pipe.hincrbyfloat(key, f"{kind}_latency", latency)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to record {provider} usage: {str(e)}")
+    
+    def prompt_cache_stats(self):
+        """
+        Get provider-side prompt cache statistics per memo provider.
+        
+        Returns:
+            dict: Requests, prompt and cached token totals, the cached token
+                ratio and the average latency with and without a cache hit,
+                per provider, or None if usage stats are disabled
+        """
+        if not self.config.MEMO_USAGE_STATS_ENABLED:
+            return None
+        
+        stats = {}
+        for provider in ("Groq", "OpenRouter"):
+            try:
+                raw = self._get_redis().hgetall(f"memo_usage:{provider.lower()}")
+                values = {
+                    (k.decode() if isinstance(k, bytes) else k): float(v)
+                    for k, v in raw.items()
+                }
+                prompt_tokens = values.get("prompt_tokens", 0)
+                stats[provider] = {
+                    "requests": int(values.get("requests", 0)),
+                    "prompt_tokens": int(prompt_tokens),
+                    "cached_tokens": int(values.get("cached_tokens", 0)),
+                    "cached_ratio": round(values.get("cached_tokens", 0) / prompt_tokens, 3) if prompt_tokens else 0.0
+                }
+                for kind in ("cached", "uncached"):
+                    count = values.get(f"{kind}_requests", 0)
+                    stats[provider][f"avg_{kind}_latency"] = (
+                        round(values[f"{kind}_latency"] / count, 3) if count else None
+                    )
+            except Exception as e:
+                stats[provider] = {"error": str(e)}
+        return stats
+    
+    def _get_validation_cache(self):
+        """Get the validation result cache, or None if caching is disabled."""
+        if not self.config.VALIDATION_CACHE_ENABLED:
+            return None
+        if self._validation_cache is None:
+            self._validation_cache = RedisCache(
+                self.config, "validation",
+                ttl=self.config.VALIDATION_CACHE_TTL,
+                max_entries=self.config.VALIDATION_CACHE_MAX_ENTRIES
+            )
+        return self._validation_cache
+    
+    def _validation_cache_key(self, query):
+        """Build the cache key for a search from its case- and whitespace-normalized query."""
+        return make_cache_key(normalize_query(query), self.config.GOOGLE_CSE_ID)
+    
+    def _get_cached_validation(self, query):
+        """
+        Look up cached search results for a query and count the hit or miss.
+        
+        Args:
+            query (str): The search query
+            
+        Returns:
+            list: The cached results, empty for a cached search that found
+                nothing, or None on a miss
+        """
+        try:
+            cache = self._get_validation_cache()
+            if cache is None:
+                return None
+            results = cache.get(self._validation_cache_key(query))
+            outcome = "misses" if results is None else ("negative_hits" if not results else "hits")
+            self._get_redis().hincrby("validation_cache_stats", outcome, 1)
+            if results is not None:
+                logger.debug(f"Validation cache hit for: {query[:50]}...")
+            return results
+        except Exception as e:
+            logger.warning(f"Validation cache lookup failed: {str(e)}")
+            return None
+    
+    def _cache_validation(self, query, results):
+        """Store search results, caching empty results for the negative TTL."""
+        try:
+            cache = self._get_validation_cache()
+            if cache is not None:
+                ttl = None if results else self.config.VALIDATION_CACHE_NEGATIVE_TTL
+                cache.set(self._validation_cache_key(query), results, ttl=ttl)
+        except Exception as e:
+            logger.warning(f"Validation cache store failed: {str(e)}")
+    
+    def validation_cache_stats(self):
+        """
+        Get validation cache hit rates.
+        
+        Returns:
+            dict: Hits, negative hits (cached empty results), misses and the
+                hit rate over all lookups, or None if the cache is disabled
+        """
+        if not self.config.VALIDATION_CACHE_ENABLED:
+            return None
+        try:
+            raw = self._get_redis().hgetall("validation_cache_stats")
+            values = {
+                (k.decode() if isinstance(k, bytes) else k): int(v)
+                for k, v in raw.items()
+            }
+        except Exception as e:
+            return {"error": str(e)}
+        
+        stats = {kind: values.get(kind, 0) for kind in ("hits", "negative_hits", "misses")}
+        lookups = sum(stats.values())
+        stats["hit_rate"] = round((stats["hits"] + stats["negative_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+    
+    def _record_latency(self, provider, seconds):
+        """Record the latency of a successful provider call."""
+        self._latencies.setdefault(provider, deque(maxlen=100)).append(seconds)
+    
+    def _latency_percentile(self, provider, percentile=0.95):
+        """
+        Get a latency percentile for a provider from recent calls.
+        
+        Returns:
+            float: The percentile in seconds, or None without enough samples
+        """
+        samples = sorted(self._latencies.get(provider, ()))
+        if len(samples) < self.config.MEMO_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+    
+    def _get_memo_cache(self):
+        """Get the memo result cache, or None if caching is disabled."""
+        if not self.config.MEMO_CACHE_ENABLED:
+            return None
+        if self._memo_cache is None:
+            self._memo_cache = RedisCache(
+                self.config, "memo",
+                ttl=self.config.MEMO_CACHE_TTL,
+                max_entries=self.config.MEMO_CACHE_MAX_ENTRIES
+            )
+        return self._memo_cache
+    
+    def _memo_cache_key(self, input_text, template_key, model, section=None):
+        """Build the cache key for a memo (or one section) from whitespace-normalized input."""
+        normalized = " ".join(input_text.split())
+        return make_cache_key(normalized, template_key, model, self.TEMPERATURE, section or "")
+    
+    def _get_cached_memo(self, input_text, template_key, models, section=None):
+        """
+        Look up a cached memo generated by any of the given models.
+        
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The template key
+            models (list): Models to check, in order of preference
+            section (str): Optional section name for sectioned generation
+            
+        Returns:
+            str: The cached memo, or None on a miss
+        """
+        try:
+            cache = self._get_memo_cache()
+            if cache is None:
+                return None
+            for model in models:
+                memo = cache.get(self._memo_cache_key(input_text, template_key, model, section))
+                if memo is not None:
+                    logger.info(f"Memo cache hit for template '{template_key}' and model '{model}'")
+                    return memo
+        except Exception as e:
+            logger.warning(f"Memo cache lookup failed: {str(e)}")
+        return None
+    
+    def _cache_memo(self, input_text, template_key, model, memo, section=None):
+        """Store a generated memo in the cache, ignoring cache failures."""
+        try:
+            cache = self._get_memo_cache()
+            if cache is not None:
+                cache.set(self._memo_cache_key(input_text, template_key, model, section), memo)
+        except Exception as e:
+            logger.warning(f"Memo cache store failed: {str(e)}")
+    
+    def generate_memo(self, text, refine=False, template_key="default", stream=None, use_cache=True,
+                      sectioned=None, job_id=None, latency_target=None):
         """
         Generate an investment memo from the provided text.
         
@@ -28,6 +375,18 @@ class MemoService:
             text (str): The pitch deck text
             refine (bool): Whether the text is already refined
             template_key (str): The template to use for memo generation
+            stream: Optional stream writer (see JobStreamWriter). When given,
+                the memo is requested with streaming enabled and tokens are
+                written to it as they arrive.
+            use_cache (bool): Whether a cached memo for the same input may be
+                returned. Pass False to force a fresh sample; the new memo
+                still replaces the cached one.
+            sectioned (bool): Whether to generate each template section with
+                its own concurrent request (defaults to MEMO_SECTIONED)
+            job_id (str): Optional job whose metadata records the compression,
+                the route and the time and tokens spent on reasoning
+            latency_target (float): Optional seconds the caller is willing to
+                wait, used to route interactive requests to faster models
             
         Returns:
             str: The generated investment memo
@@ -35,35 +394,450 @@ class MemoService:
         Raises:
             ProcessingError: If memo generation fails
         """
+        metrics_token = _job_metrics.set(_GenerationMetrics()) if job_id else None
         try:
             # Preprocess the text if needed
-            input_text = text if refine else prepare_text(text, refine=False)
+            input_text = text if refine else prepare_text(text, refine=False)["cleaned_text"]
             logger.info(f"Generating memo from {len(input_text)} chars of text using template '{template_key}'")
             
-            # Try with primary service (Groq)
-            if self.config.GROQ_API_KEY:
-                try:
-                    logger.info("Attempting to generate memo with Groq API")
-                    return self._call_groq_api(input_text, template_key)
-                except Exception as e:
-                    logger.warning(f"Groq API failed: {str(e)}, falling back to OpenRouter")
-            else:
-                logger.info("No Groq API key configured, using OpenRouter")
+            if sectioned is None:
+                sectioned = self.config.MEMO_SECTIONED
+            # Route on the full deck so large decks can reach the large route
+            route = self.route_request(input_text, template_key, latency_target)
+            # Sections retrieve their own pages, so the whole deck is only
+            # compressed when it goes into a single prompt
+            if not (sectioned and self.config.MEMO_RETRIEVAL_ENABLED):
+                input_text = self._compress_context(input_text, template_key, job_id=job_id,
+                                                    max_tokens=route["compression_tokens"])
+            
+            if metrics_token is not None:
+                _job_metrics.get().route = route["name"]
+            if sectioned:
+                return self._generate_sectioned(input_text, template_key, stream=stream, use_cache=use_cache,
+                                                route=route)
             
-            # Fallback to secondary service
-            return self._call_openrouter_api(input_text, template_key)
+            return self._generate_with_fallback(input_text, template_key, stream=stream, use_cache=use_cache,
+                                                route=route)
                 
         except Exception as e:
             logger.error(f"Failed to generate memo: {str(e)}", exc_info=True)
             raise ProcessingError(f"Failed to generate memo: {str(e)}")
+        finally:
+            if metrics_token is not None:
+                self._record_job_metrics(job_id, _job_metrics.get())
+                _job_metrics.reset(metrics_token)
+    
+    def _record_job_metrics(self, job_id, metrics):
+        """Write a job's reasoning and answer totals to its metadata, ignoring failures."""
+        try:
+            update_job_metadata(job_id, dict(metrics.totals, route=metrics.route))
+        except Exception as e:
+            logger.warning(f"Failed to record generation metrics for job {job_id}: {str(e)}")
+    
+    def _compress_context(self, input_text, template_key, job_id=None, max_tokens=None):
+        """
+        Compress deck text to a token budget.
+        
+        Args:
+            input_text (str): The prepared deck text
+            template_key (str): The template whose sections the kept text should cover
+            job_id (str): Optional job whose metadata records the compression
+            max_tokens (int): The budget, usually the route's compression
+                budget (defaults to MEMO_COMPRESSION_TOKENS)
+            
+        Returns:
+            str: The compressed text, or the input if compression is disabled
+                or the text already fits
+        """
+        if not self.config.MEMO_COMPRESSION_ENABLED:
+            return input_text
+        
+        sections = get_compiled_template(template_key)["sections_order"]
+        result = compress_text(input_text, max_tokens or self.config.MEMO_COMPRESSION_TOKENS, sections,
+                               model=self.GROQ_MODEL)
+        
+        if job_id:
+            try:
+                update_job_metadata(job_id, {
+                    "compression_ratio": result["ratio"],
+                    "compression_tokens_saved": result["tokens_saved"],
+                    "compression_original_tokens": result["original_tokens"],
+                    "compression_tokens": result["compressed_tokens"]
+                })
+            except Exception as e:
+                logger.warning(f"Failed to record compression for job {job_id}: {str(e)}")
+        return result["text"]
+    
+    def _default_route(self):
+        """The route used when routing is disabled or no route matches."""
+        return {
+            "name": "default",
+            "providers": [["Groq", self.GROQ_MODEL], ["OpenRouter", self.OPENROUTER_MODEL]],
+            "max_tokens": self.config.MEMO_MAX_TOKENS,
+            "compression_tokens": self.config.MEMO_COMPRESSION_TOKENS
+        }
+    
+    def route_request(self, input_text, template_key="default", latency_target=None):
+        """
+        Choose the providers, models and completion budget for a memo.
+        
+        Routes in MEMO_ROUTES are tried in order and the first one whose
+        limits fit the request is used. A route can limit the estimated
+        input tokens ("max_input_tokens"), require a latency target of at
+        most "max_latency_target" seconds, and list the "templates" it
+        serves. Routing uses the size of the text before compression; the
+        text is then compressed to the route's "compression_tokens".
+        
+        Args:
+            input_text (str): The uncompressed text the memo is generated from
+            template_key (str): The key of the template to use
+            latency_target (float): Optional seconds the caller is willing to wait
+            
+        Returns:
+            dict: The route's "name", its "providers" as [provider, model]
+                pairs in the order to try them, its "max_tokens" and its
+                "compression_tokens" budget for the deck text
+        """
+        if not self.config.MEMO_ROUTING_ENABLED:
+            return self._default_route()
+        
+        input_tokens = estimate_tokens(input_text)
+        for route in self.config.MEMO_ROUTES:
+            if route.get("max_input_tokens") is not None and input_tokens > route["max_input_tokens"]:
+                continue
+            if route.get("max_latency_target") is not None and (
+                    latency_target is None or latency_target > route["max_latency_target"]):
+                continue
+            if route.get("templates") and template_key not in route["templates"]:
+                continue
+            
+            logger.info(f"Routing ~{input_tokens} input tokens with template '{template_key}' "
+                        f"to route '{route['name']}'")
+            return {
+                "name": route["name"],
+                "providers": route["providers"],
+                "max_tokens": route.get("max_tokens", self.config.MEMO_MAX_TOKENS),
+                "compression_tokens": route.get("compression_tokens", self.config.MEMO_COMPRESSION_TOKENS)
+            }
+        
+        return self._default_route()
+    
+    def _route_providers(self, route):
+        """The [provider, model] pairs of a route that are configured, in order."""
+        return [(provider, model) for provider, model in route["providers"]
+                if provider != "Groq" or self.config.GROQ_API_KEY]
+    
+    def _call_provider(self, provider, input_text, template_key, stream=None, section=None, model=None,
+                       max_tokens=None):
+        """Call a provider by name; see _call_groq_api."""
+        calls = {"Groq": self._call_groq_api, "OpenRouter": self._call_openrouter_api}
+        if provider not in calls:
+            raise ValueError(f"Unknown memo provider: {provider}")
+        return calls[provider](input_text, template_key, stream=stream, section=section, model=model,
+                               max_tokens=max_tokens)
+    
+    def generate_memos(self, text, template_keys, refine=False, use_cache=True, sectioned=None,
+                       on_result=None):
+        """
+        Generate memos for several templates from one piece of text.
+        
+        The text is prepared once and the memos are generated concurrently.
+        A template that fails does not fail the others.
+        
+        Args:
+            text (str): The text to generate memos from
+            template_keys (list): The keys of the templates to use
+            refine (bool): Whether the text is already refined
+            use_cache (bool): Whether cached memos may be returned
+            sectioned (bool): Whether to generate template sections in parallel
+            on_result (callable): Optional callback called with the template
+                key and its result as each memo finishes
+            
+        Returns:
+            dict: Result per template key, with "status" "completed" and the
+                "memo", or "status" "failed" and the "error"
+            
+        Raises:
+            ProcessingError: If the text cannot be prepared
+        """
+        try:
+            input_text = text if refine else prepare_text(text, refine=False)["cleaned_text"]
+        except Exception as e:
+            logger.error(f"Failed to prepare text for memo batch: {str(e)}", exc_info=True)
+            raise ProcessingError(f"Failed to prepare text: {str(e)}")
+        
+        logger.info(f"Generating {len(template_keys)} memos from {len(input_text)} chars of text")
+        
+        def generate(template_key):
+            return self.generate_memo(input_text, refine=True, template_key=template_key,
+                                      use_cache=use_cache, sectioned=sectioned)
+        
+        results = {}
+        max_workers = max(1, min(self.config.MEMO_BATCH_MAX_WORKERS, len(template_keys)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(generate, key): key for key in template_keys}
+            for future in as_completed(futures):
+                template_key = futures[future]
+                try:
+                    result = {"status": "completed", "memo": future.result(), "template_used": template_key}
+                except Exception as e:
+                    result = {"status": "failed", "error": str(e), "template_used": template_key}
+                results[template_key] = result
+                if on_result is not None:
+                    on_result(template_key, result)
+        
+        return {key: results[key] for key in template_keys}
+    
+    def _generate_with_fallback(self, input_text, template_key, stream=None, use_cache=True, section=None,
+                                route=None):
+        """
+        Generate a memo (or one section) from the cache or the available providers.
+        
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            use_cache (bool): Whether a cached result may be returned
+            section (str): Optional section name for sectioned generation
+            route (dict): The route from route_request (defaults to Groq with
+                an OpenRouter fallback)
+            
+        Returns:
+            str: The generated memo or section
+            
+        Raises:
+            Exception: If no provider produced a result
+        """
+        route = route or self._default_route()
+        providers = self._route_providers(route)
+        
+        if use_cache:
+            memo = self._get_cached_memo(input_text, template_key, [model for _, model in providers], section)
+            if memo is not None:
+                if stream is not None:
+                    stream.token(memo)
+                return memo
+        
+        last_error = Exception("No memo provider is configured")
+        hedged = False
+        for i, (provider, model) in enumerate(providers):
+            if hedged and i == 1:
+                # Already raced against the primary
+                continue
+            if not self._provider_available(provider):
+                logger.info(f"{provider} circuit breaker is open, skipping it")
+                last_error = Exception(f"{provider} circuit breaker is open")
+                continue
+            
+            # Race the first two providers when hedging; streamed memos stay sequential
+            if i == 0 and self.config.MEMO_HEDGING_ENABLED and stream is None and len(providers) > 1:
+                try:
+                    return self._generate_hedged(input_text, template_key, section, providers, route["max_tokens"])
+                except Exception as e:
+                    if len(providers) == 2:
+                        raise
+                    logger.warning(f"Hedged request failed: {str(e)}, falling back to {providers[2][0]}")
+                    last_error = e
+                    hedged = True
+                    continue
+            
+            try:
+                logger.info(f"Attempting to generate memo with {provider} API ({model})")
+                return self._call_provider(provider, input_text, template_key, stream=stream, section=section,
+                                           model=model, max_tokens=route["max_tokens"])
+            except Exception as e:
+                if i == len(providers) - 1:
+                    raise
+                logger.warning(f"{provider} API failed: {str(e)}, falling back to {providers[i + 1][0]}")
+                last_error = e
+                if stream is not None:
+                    # Discard any partial output streamed by the failed provider
+                    stream.reset()
+        
+        raise last_error
+    
+    def _generate_sectioned(self, input_text, template_key, stream=None, use_cache=True, route=None):
+        """
+        Generate a memo with one concurrent request per template section.
+        
+        Every request asks for a single section, so wall time is set by the
+        slowest section rather than the length of the whole memo. With
+        MEMO_RETRIEVAL_ENABLED each section is sent only the deck pages
+        relevant to it. Sections are stitched back in template
+        order; when streaming, each section is written as soon as all the
+        sections before it are done.
+        
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for completed sections
+            use_cache (bool): Whether cached sections may be returned
+            route (dict): Optional route from route_request for every section
+            
+        Returns:
+            str: The stitched memo
+            
+        Raises:
+            Exception: If every section failed
+        """
+        sections = get_compiled_template(template_key)["sections_order"]
+        logger.info(f"Generating {len(sections)} memo sections concurrently")
+        contexts = self._section_contexts(input_text, template_key, sections,
+                                          max_tokens=route["compression_tokens"] if route else None)
+        
+        def generate(section):
+            text = self._generate_with_fallback(contexts[section], template_key, use_cache=use_cache,
+                                                section=section, route=route)
+            return _with_heading(section, text)
+        
+        results = [None] * len(sections)
+        errors = []
+        next_to_emit = 0
+        max_workers = max(1, min(self.config.MEMO_SECTION_MAX_WORKERS, len(sections)))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(contextvars.copy_context().run, generate, section): i
+                       for i, section in enumerate(sections)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logger.warning(f"Section '{sections[i]}' failed: {str(e)}")
+                    errors.append(e)
+                    results[i] = _failed_section(sections[i])
+                
+                # Release finished sections to the stream in template order
+                while next_to_emit < len(sections) and results[next_to_emit] is not None:
+                    if stream is not None:
+                        stream.token(results[next_to_emit] + "\n\n")
+                    next_to_emit += 1
+        
+        if len(errors) == len(sections):
+            raise errors[0]
+        
+        memo = "\n\n".join(result.strip() for result in results)
+        logger.info(f"Stitched {len(sections)} sections into memo ({len(memo)} chars)")
+        return memo
+    
+    def _section_contexts(self, input_text, template_key, sections, max_tokens=None):
+        """
+        Get the deck content to send with each section's prompt.
+        
+        With retrieval the text arrives uncompressed, so it is compressed once
+        for the sections that match no page and for a failed retrieval.
+        
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            sections (tuple): The template's section names
+            max_tokens (int): The compression budget, usually the route's
+            
+        Returns:
+            dict: Deck content per section; the whole text for every section
+                if retrieval is disabled, the compressed text if it fails
+        """
+        if not self.config.MEMO_RETRIEVAL_ENABLED:
+            return {section: input_text for section in sections}
+        
+        fallback = self._compress_context(input_text, template_key, max_tokens=max_tokens)
+        try:
+            index = get_deck_index(input_text)
+            return {
+                section: section_context(index, section, k=self.config.MEMO_RETRIEVAL_TOP_K, fallback=fallback)
+                for section in sections
+            }
+        except Exception as e:
+            logger.warning(f"Section retrieval failed, sending the compressed deck: {str(e)}")
+        return {section: fallback for section in sections}
+    
+    def _generate_hedged(self, input_text, template_key, section=None, providers=None, max_tokens=None):
+        """
+        Generate a memo with a hedged request to the secondary provider.
+        
+        The primary provider (Groq by default) is called first. If it has not
+        answered after the hedge delay (MEMO_HEDGE_DELAY, or the primary's
+        recent p95 latency if that is shorter), the secondary is called as
+        well. The first successful response wins and the other call is
+        cancelled. If the primary fails before the delay, the secondary is
+        called right away as in the sequential fallback.
+        
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            section (str): Optional section name for sectioned generation
+            providers (list): The (provider, model) pairs to race, primary first
+            max_tokens (int): Optional completion budget of the route
+            
+        Returns:
+            str: The generated memo
+            
+        Raises:
+            Exception: If both providers fail
+        """
+        providers = providers or [("Groq", self.GROQ_MODEL), ("OpenRouter", self.OPENROUTER_MODEL)]
+        (primary_provider, _), (secondary_provider, _) = providers[:2]
+        delay = self.config.MEMO_HEDGE_DELAY
+        p95 = self._latency_percentile(primary_provider)
+        if p95 is not None:
+            delay = min(delay, p95)
+        
+        attempts = [(provider, model, threading.Event()) for provider, model in providers[:2]]
+        
+        def run(provider, model, cancelled):
+            return self._call_provider(provider, input_text, template_key, stream=_HedgeCollector(cancelled),
+                                       section=section, model=model, max_tokens=max_tokens)
+        
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary = executor.submit(contextvars.copy_context().run, run, *attempts[0])
+            futures = {primary: attempts[0]}
+            done, _ = wait(futures, timeout=delay)
+            if done and primary.exception() is None:
+                return primary.result()
+            if not self._provider_available(secondary_provider):
+                logger.info(f"{secondary_provider} circuit breaker is open, not hedging")
+                return primary.result()
+            if not done:
+                logger.info(f"{primary_provider} has not answered after {delay:.1f}s, "
+                            f"hedging with {secondary_provider}")
+            futures[executor.submit(contextvars.copy_context().run, run, *attempts[1])] = attempts[1]
+            
+            last_error = None
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    provider = futures[future][0]
+                    try:
+                        memo = future.result()
+                    except Exception as e:
+                        logger.warning(f"{provider} API failed in hedged request: {str(e)}")
+                        last_error = e
+                        continue
+                    
+                    # Cancel the losing attempt
+                    for other in pending:
+                        futures[other][2].set()
+                    logger.info(f"Hedged request won by {provider}")
+                    return memo
+            
+            raise last_error
+        finally:
+            executor.shutdown(wait=False)
     
-    def _call_groq_api(self, input_text, template_key):
+    def _call_groq_api(self, input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
         """
         Call the Groq API to generate a memo.
         
         Args:
             input_text (str): The preprocessed text
             template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            section (str): Optional section name for sectioned generation
+            model (str): Optional model (defaults to GROQ_MODEL)
+            max_tokens (int): Optional completion budget for a whole memo
+                (defaults to MEMO_MAX_TOKENS)
             
         Returns:
             str: The generated memo
@@ -71,105 +845,370 @@ class MemoService:
         Raises:
             Exception: If the API call fails
         """
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.config.GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        return self._chat_completion(
+            "Groq",
+            self.groq_url,
+            self.config.GROQ_API_KEY,
+            model or self.GROQ_MODEL,
+            input_text,
+            template_key,
+            stream=stream,
+            section=section,
+            max_tokens=max_tokens
+        )
+    
+    def _call_openrouter_api(self, input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        """
+        Call the OpenRouter API to generate a memo.
+        
+        Args:
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            section (str): Optional section name for sectioned generation
+            model (str): Optional model (defaults to OPENROUTER_MODEL)
+            max_tokens (int): Optional completion budget for a whole memo
+                (defaults to MEMO_MAX_TOKENS)
+            
+        Returns:
+            str: The generated memo
+            
+        Raises:
+            Exception: If the API call fails
+        """
+        return self._chat_completion(
+            "OpenRouter",
+            self.openrouter_url,
+            self.config.HF_API_KEY,
+            model or self.OPENROUTER_MODEL,
+            input_text,
+            template_key,
+            stream=stream,
+            section=section,
+            max_tokens=max_tokens
+        )
+    
+    def _chat_completion(self, provider, url, api_key, model, input_text, template_key, stream=None,
+                         section=None, max_tokens=None):
+        """
+        Request a memo from a provider within its shared rate limit, recording
+        the outcome in its circuit breaker.
         
-        # Use the consolidated prompt builder to get the system and user messages
-        prompt = build_memo_prompt(input_text, template_key)
+        Args:
+            provider (str): Provider name used in logs, errors and breaker keys
+            url (str): The chat completions endpoint
+            api_key (str): The provider API key
+            model (str): The model to request
+            input_text (str): The preprocessed text
+            template_key (str): The key of the template to use
+            stream: Optional stream writer for streamed tokens
+            section (str): Optional section name for sectioned generation
+            max_tokens (int): Optional completion budget for a whole memo
+            
+        Returns:
+            str: The generated memo
+            
+        Raises:
+            Exception: If the API call fails
+        """
+        headers, data, prompt_tokens = self._build_completion_request(api_key, model, input_text, template_key,
+                                                                      stream is not None, section, provider,
+                                                                      max_tokens)
         
-        data = {
-            "model": "deepseek-r1-distill-llama-70b",
-            "messages": [
-                {"role": "system", "content": prompt["system"]},
-                {"role": "user", "content": prompt["user"]}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 16384
-        }
+        # Wait for capacity in the provider's shared rate limit
+        limiter = get_rate_limiter(provider, model, self.config)
+        granted = 0
+        if limiter:
+            reserved_tokens = self._rate_limit_reservation(prompt_tokens, data["max_tokens"])
+            limiter.acquire(reserved_tokens, self.config.RATE_LIMIT_MAX_WAIT)
+            granted = limiter.cost(reserved_tokens)
+        
+        breaker = self._get_breaker(provider)
+        started = time.monotonic()
+        usage, failed = None, True
+        try:
+            memo, usage, reasoning = self._request_completion(provider, url, headers, data, stream)
+            failed = False
+        except HedgeCancelled:
+            raise
+        except Exception:
+            if breaker:
+                breaker.record_failure(time.monotonic() - started)
+            raise
+        finally:
+            self._settle_rate_limit(limiter, granted, prompt_tokens, usage, failed)
+        
+        latency = time.monotonic() - started
+        if breaker:
+            breaker.record_success(latency)
+        self._complete_memo(provider, model, input_text, template_key, section, memo, latency, usage)
+        self._record_reasoning(reasoning.metrics(usage, streamed=stream is not None))
+        return memo
+    
+    def _rate_limit_reservation(self, prompt_tokens, max_tokens):
+        """
+        Get the tokens to reserve in a provider's rate limit for a request.
+        
+        Memos rarely use the whole completion budget, so only the expected
+        completion size is reserved; the actual usage is settled afterwards.
+        
+        Args:
+            prompt_tokens (int): Estimated prompt tokens
+            max_tokens (int): The request's completion budget
+            
+        Returns:
+            int: The tokens to reserve
+        """
+        return prompt_tokens + min(max_tokens, self.config.RATE_LIMIT_COMPLETION_TOKENS)
+    
+    def _settle_rate_limit(self, limiter, granted, prompt_tokens, usage=None, failed=False):
+        """
+        Correct a rate limit reservation once the request has finished.
+        
+        Unused tokens are returned and tokens used beyond the reservation are
+        charged. Without reported usage a failed request is assumed to have
+        used its prompt, and a successful one its whole reservation.
         
-        logger.debug("Sending request to Groq API")
-        response = requests.post(url, headers=headers, json=data, timeout=60)
+        Args:
+            limiter: The provider's rate limiter, or None
+            granted (int): Tokens the reservation took from the bucket
+            prompt_tokens (int): Estimated prompt tokens
+            usage (dict): Token usage reported by the provider
+            failed (bool): Whether the request failed or was cancelled
+        """
+        if not limiter:
+            return
+        if usage and usage.get("total_tokens"):
+            used = usage["total_tokens"]
+        elif failed:
+            used = min(granted, prompt_tokens)
+        else:
+            return
+        limiter.refund(granted - used)
+    
+    def _request_completion(self, provider, url, headers, data, stream=None):
+        """
+        Send a request to an OpenAI-compatible chat completions endpoint.
+        
+        Args:
+            provider (str): Provider name used in logs and error messages
+            url (str): The chat completions endpoint
+            headers (dict): The request headers
+            data (dict): The request body
+            stream: Optional stream writer for streamed tokens
+            
+        Returns:
+            tuple: The generated memo without reasoning, the reported token
+                usage and the ReasoningFilter holding the reasoning
+            
+        Raises:
+            Exception: If the API call fails
+        """
+        logger.debug(f"Sending request to {provider} API")
+        reasoning = ReasoningFilter(stream, self.config.MEMO_REASONING_MAX_TOKENS, data["model"],
+                                    separate=bool(self._reasoning_options(provider)))
+        response = get_http_session().post(url, headers=headers, json=data, timeout=60,
+                                           stream=stream is not None)
         
         if response.ok:
+            if stream is not None:
+                usage = {}
+                try:
+                    self._read_streamed_completion(response, reasoning, usage)
+                    reasoning.finish()
+                finally:
+                    # Closes the connection if reading was aborted mid-stream
+                    response.close()
+                memo = reasoning.answer
+                logger.info(f"Successfully streamed memo with {provider} API ({len(memo)} chars)")
+                return memo, usage, reasoning
+            
             result = response.json()
             if result.get("choices"):
-                memo = result["choices"][0]["message"]["content"].strip()
-                logger.info(f"Successfully generated memo with Groq API ({len(memo)} chars)")
-                return memo
+                memo = self._read_completion_message(result["choices"][0]["message"], reasoning)
+                logger.info(f"Successfully generated memo with {provider} API ({len(memo)} chars)")
+                return memo, result.get("usage"), reasoning
             else:
-                logger.error(f"Unexpected Groq API response format: {result}")
-        
-        error_message = f"Groq API error: {response.status_code}"
-        if response.text:
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_message += f" - {error_data['error'].get('message', '')}"
-            except:
-                error_message += f" - {response.text[:100]}"
+                logger.error(f"Unexpected {provider} API response format: {result}")
         
+        error_message = self._completion_error(provider, response.status_code, response.text)
         logger.error(error_message)
         raise Exception(error_message)
     
-    def _call_openrouter_api(self, input_text, template_key):
+    def _read_completion_message(self, message, reasoning):
         """
-        Call the OpenRouter API to generate a memo.
+        Separate the reasoning from the answer of a complete response.
         
         Args:
+            message (dict): The response's assistant message
+            reasoning (ReasoningFilter): Filter receiving the content
+            
+        Returns:
+            str: The answer without reasoning
+        """
+        separate = message.get("reasoning") or message.get("reasoning_content")
+        if separate:
+            reasoning.reasoning(separate)
+        reasoning.token(message.get("content") or "")
+        reasoning.finish()
+        return reasoning.answer
+    
+    def _record_reasoning(self, metrics):
+        """Add one call's reasoning metrics to the current job's totals."""
+        job_metrics = _job_metrics.get()
+        if job_metrics is not None:
+            job_metrics.add(metrics)
+        if metrics["reasoning_tokens"]:
+            logger.info(f"Reasoning took {metrics['reasoning_seconds']}s ({metrics['reasoning_tokens']} tokens), "
+                        f"answer {metrics['answer_seconds']}s")
+    
+    def _build_completion_request(self, api_key, model, input_text, template_key, stream=False, section=None,
+                                  provider=None, max_tokens=None):
+        """
+        Build the headers and body of a chat completions request.
+        
+        Args:
+            api_key (str): The provider API key
+            model (str): The model to request
             input_text (str): The preprocessed text
             template_key (str): The key of the template to use
+            stream (bool): Whether to request a streamed completion
+            section (str): Optional section name for sectioned generation
+            provider (str): Optional provider name, used for provider-specific
+                reasoning options
+            max_tokens (int): Optional completion budget for a whole memo
+                (defaults to MEMO_MAX_TOKENS)
             
         Returns:
-            str: The generated memo
-            
-        Raises:
-            Exception: If the API call fails
+            tuple: The request headers, the JSON body and the estimated
+                prompt tokens
         """
-        url = "https://openrouter.ai/api/v1/chat/completions"
         headers = {
-            "Authorization": f"Bearer {self.config.HF_API_KEY}",
-            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
         }
         
-        # Use the consolidated prompt builder to get the system and user messages
-        prompt = build_memo_prompt(input_text, template_key)
+        # Use the consolidated prompt builder, sized to the model's context window
+        if section:
+            prompt = build_memo_request(input_text, template_key, model, self.config.MEMO_SECTION_MAX_TOKENS,
+                                        self.config.MEMO_MIN_OUTPUT_TOKENS, section=section)
+        else:
+            prompt = build_memo_request(input_text, template_key, model, max_tokens or self.config.MEMO_MAX_TOKENS,
+                                        self.config.MEMO_MIN_OUTPUT_TOKENS)
         
         data = {
-            "model": "deepseek/deepseek-r1:free",
+            "model": model,
             "messages": [
                 {"role": "system", "content": prompt["system"]},
                 {"role": "user", "content": prompt["user"]}
             ],
-            "temperature": 0.7,
-            "max_tokens": 16384
+            "temperature": self.TEMPERATURE,
+            "max_tokens": prompt["max_tokens"]
         }
+        if stream:
+            data["stream"] = True
+            # Ask for a final chunk with token usage
+            data["stream_options"] = {"include_usage": True}
+        if is_reasoning_model(model):
+            data.update(self._reasoning_options(provider))
+        return headers, data, prompt["prompt_tokens"]
+    
+    def _reasoning_options(self, provider):
+        """
+        Get the request options that keep reasoning out of the answer content.
         
-        logger.debug("Sending request to OpenRouter API")
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        
-        if response.ok:
-            result = response.json()
-            if result.get("choices"):
-                memo = result["choices"][0]["message"]["content"].strip()
-                logger.info(f"Successfully generated memo with OpenRouter API ({len(memo)} chars)")
-                return memo
-            else:
-                logger.error(f"Unexpected OpenRouter API response format: {result}")
-        
-        error_message = f"OpenRouter API error: {response.status_code}"
-        if response.text:
+        Groq returns the reasoning in a separate field when asked for the
+        parsed format but has no reasoning budget for R1 models; OpenRouter
+        accepts a budget. Other providers leave <think> blocks in the content,
+        which ReasoningFilter removes.
+        """
+        if provider == "Groq":
+            return {"reasoning_format": "parsed"}
+        if provider == "OpenRouter" and self.config.MEMO_REASONING_MAX_TOKENS:
+            return {"reasoning": {"max_tokens": self.config.MEMO_REASONING_MAX_TOKENS}}
+        return {}
+    
+    def _complete_memo(self, provider, model, input_text, template_key, section, memo, latency, usage):
+        """Record a successful completion's latency and usage and cache the memo."""
+        self._record_latency(provider, latency)
+        self._record_usage(provider, usage, latency)
+        self._cache_memo(input_text, template_key, model, memo, section)
+    
+    def _completion_error(self, provider, status_code, text):
+        """Build the error message for a failed completion response."""
+        error_message = f"{provider} API error: {status_code}"
+        if text:
             try:
-                error_data = response.json()
+                error_data = json.loads(text)
                 if "error" in error_data:
                     error_message += f" - {error_data['error'].get('message', '')}"
             except:
-                error_message += f" - {response.text[:100]}"
+                error_message += f" - {text[:100]}"
+        return error_message
+    
+    def _read_streamed_completion(self, response, stream, usage=None):
+        """
+        Read a server-sent events chat completion and forward its tokens.
         
-        logger.error(error_message)
-        raise Exception(error_message)
+        Args:
+            response: The streaming HTTP response
+            stream: Stream writer receiving each content delta
+            usage (dict): Optional dict updated with the token usage reported
+                in the final chunk
+            
+        Returns:
+            str: The full completion text
+            
+        Raises:
+            Exception: If the provider reports an error mid-stream
+        """
+        parts = []
+        for line in response.iter_lines(decode_unicode=True):
+            if not self._handle_stream_line(line, parts, stream, usage):
+                break
+        
+        return "".join(parts)
+    
+    def _handle_stream_line(self, line, parts, stream, usage=None):
+        """
+        Handle one line of a server-sent events chat completion.
+        
+        Args:
+            line (str): The decoded line
+            parts (list): Collected content deltas, appended to
+            stream: Stream writer receiving each content delta, and each
+                reasoning delta if it has a reasoning() method
+            usage (dict): Optional dict updated with reported token usage
+            
+        Returns:
+            bool: False once the stream is done, True otherwise
+            
+        Raises:
+            Exception: If the provider reports an error mid-stream
+        """
+        # Skip keep-alive comments and blank separators
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            return True
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return False
+        
+        chunk = json.loads(payload)
+        if "error" in chunk:
+            raise Exception(f"Stream error: {chunk['error'].get('message', chunk['error'])}")
+        if usage is not None and chunk.get("usage"):
+            usage.update(chunk["usage"])
+        
+        choices = chunk.get("choices") or [{}]
+        delta = choices[0].get("delta") or {}
+        reasoning = delta.get("reasoning") or delta.get("reasoning_content")
+        if reasoning and hasattr(stream, "reasoning"):
+            stream.reasoning(reasoning)
+        token = delta.get("content")
+        if token:
+            parts.append(token)
+            stream.token(token)
+        return True
     
     def validate_memo(self, memo, query=None):
         try:
@@ -184,21 +1223,125 @@ class MemoService:
             raise ProcessingError(f"Failed to validate memo: {str(e)}")
 
     
-    def _google_custom_search(self, query):
+    def claims_to_validate(self, text):
+        """
+        Extract the claims of a text to validate.
+        
+        Args:
+            text (str): The memo or selection text
+            
+        Returns:
+            list: The claims, or the whole text as one "statement" claim if
+                it has none
+        """
+        claims = extract_claims(text, max_claims=self.config.VALIDATION_MAX_CLAIMS)
+        if not claims:
+            statement = " ".join(text.split())
+            claims = [{"claim": statement, "type": "statement", "query": " ".join(statement.split()[:32])}]
+        return claims
+    
+    def _claim_result(self, claim, results=None, error=None):
+        """Build the validation result of one claim."""
+        if error is not None:
+            status = error
+        else:
+            status = "found" if results else "not_found"
+        return dict(claim, status=status, results=results or [])
+    
+    def validate_claims(self, text=None, on_result=None, claims=None):
+        """
+        Validate the factual claims of a memo or selection concurrently.
+        
+        Claims are extracted locally and searched with at most
+        VALIDATION_MAX_WORKERS searches in flight. A claim whose search takes
+        longer than VALIDATION_CLAIM_TIMEOUT seconds is reported as timed out
+        without holding up the others.
+        
+        Args:
+            text (str): The memo or selection text
+            on_result (callable): Optional callback called with the index and
+                result of each claim as it completes
+            claims (list): Optional claims already extracted with
+                claims_to_validate, validated instead of the text's
+            
+        Returns:
+            list: Result per claim in order of appearance: the claim's
+                "claim", "type" and "query", "status" ("found", "not_found",
+                "timeout" or "error") and the search "results"
+        """
+        claims = claims or self.claims_to_validate(text)
+        timeout = self.config.VALIDATION_CLAIM_TIMEOUT
+        logger.info(f"Validating {len(claims)} claims")
+        
+        started = {}
+        
+        def search(index):
+            started[index] = time.monotonic()
+            return self._google_custom_search(claims[index]["query"], timeout=timeout, raise_errors=True)
+        
+        results = [None] * len(claims)
+        
+        def report(index, result):
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+        
+        max_workers = max(1, min(self.config.VALIDATION_MAX_WORKERS, len(claims)))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {executor.submit(search, i): i for i in range(len(claims))}
+            pending = set(futures)
+            while pending:
+                # Wake up when a search finishes or the oldest running one times out
+                now = time.monotonic()
+                deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+                done, pending = wait(pending, timeout=max(0.01, min(deadlines) - now) if deadlines else timeout,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        report(index, self._claim_result(claims[index], results=future.result()))
+                    except Exception as e:
+                        logger.warning(f"Validation of claim {index} failed: {str(e)}")
+                        report(index, self._claim_result(claims[index], error="error"))
+                
+                now = time.monotonic()
+                for future in list(pending):
+                    index = futures[future]
+                    if index in started and now - started[index] >= timeout:
+                        pending.discard(future)
+                        report(index, self._claim_result(claims[index], error="timeout"))
+        finally:
+            # Searches that timed out finish in the background and are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
+    
+    def _google_custom_search(self, query, timeout=10, raise_errors=False):
         """
         Perform a Google Custom Search to validate claims.
         
         Args:
             query (str): The query to search for
+            timeout (float): Request timeout in seconds
+            raise_errors (bool): Whether to raise on a search error instead of
+                returning no results
             
         Returns:
             list: Search results
+            
+        Raises:
+            ProcessingError: If the search fails and raise_errors is set
         """
         if not self.config.GOOGLE_API_KEY or not self.config.GOOGLE_CSE_ID:
             logger.warning("Google API key or CSE ID not configured, skipping validation")
             return []
         
-        url = "https://www.googleapis.com/customsearch/v1"
+        cached = self._get_cached_validation(query)
+        if cached is not None:
+            return cached
+        
+        url = self.google_cse_url
         params = {
             "key": self.config.GOOGLE_API_KEY,
             "cx": self.config.GOOGLE_CSE_ID,
@@ -206,25 +1349,39 @@ class MemoService:
         }
         
         logger.debug(f"Performing Google Custom Search for: {query[:50]}...")
-        response = requests.get(url, params=params, timeout=10)
+        try:
+            response = get_http_session().get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.error(f"Google Custom Search request failed: {str(e)}")
+            if raise_errors:
+                raise ProcessingError(f"Google Custom Search request failed: {str(e)}")
+            return []
         
         if response.ok:
-            result = response.json()
-            items = result.get("items", [])
-            
-            validation_results = []
-            for item in items[:5]:  # Limit to top 5 results
-                validation_results.append({
-                    "title": item.get("title", ""),
-                    "snippet": item.get("snippet", ""),
-                    "link": item.get("link", "")
-                })
-            
-            logger.info(f"Found {len(validation_results)} validation results")
-            return validation_results
+            results = self._parse_search_results(response.json())
+            self._cache_validation(query, results)
+            return results
         
+        # Errors are not cached, so the next request searches again
         logger.error(f"Google Custom Search error: {response.status_code}")
+        if raise_errors:
+            raise ProcessingError(f"Google Custom Search error: {response.status_code}")
         return []
+    
+    def _parse_search_results(self, result):
+        """Extract the top search results from a Google Custom Search response."""
+        items = result.get("items", [])
+        
+        validation_results = []
+        for item in items[:5]:  # Limit to top 5 results
+            validation_results.append({
+                "title": item.get("title", ""),
+                "snippet": item.get("snippet", ""),
+                "link": item.get("link", "")
+            })
+        
+        logger.info(f"Found {len(validation_results)} validation results")
+        return validation_results
 
 # Create a singleton instance
 _memo_service = None
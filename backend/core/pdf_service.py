@@ -12,7 +12,8 @@ import pdfplumber
 from pdf2image import convert_from_path
 import pytesseract
 from ..utils.error_handling import ProcessingError
-from ..infrastructure.job_manager import update_job
+from ..infrastructure.job_manager import update_job, update_job_metadata
+from ..infrastructure.artifacts import store_prepared_text
 
 logger = logging.getLogger(__name__)
 
@@ -40,26 +41,47 @@ class PDFService:
             if job_id:
                 update_job(job_id, {"status": "extracting"})
             
-            extracted_text = self._extract_text(file_path, job_id)
+            pages = []
+            extracted_text = self._extract_text(file_path, job_id, pages)
             
             if job_id:
                 update_job(job_id, {"status": "refining"})
             
             result = self.prepare_text(extracted_text, refine=True)
             
+            if pages and self.config.MEMO_RETRIEVAL_ENABLED:
+                self._index_pages(result["cleaned_text"], pages)
+            
+            # Memo jobs for this deck reference the prepared text instead of
+            # carrying and re-cleaning it
+            text_ref = store_prepared_text(result["cleaned_text"])
+            
+            if job_id and "refined" in result:
+                update_job_metadata(job_id, {
+                    "refinement_ran": result["refined"],
+                    # Scored before clean_text, see text_noise_score
+                    "raw_text_quality": result["quality"],
+                    "dedupe_paragraphs_removed": result["dedupe"]["removed"],
+                    "dedupe_tokens_saved": result["dedupe"]["tokens_saved"]
+                })
+            
             if job_id:
                 update_job(job_id, {
                     "status": "completed",
                     "result": {
                         "cleaned_text": result["cleaned_text"],
-                        "startup_stage": result["startup_stage"]
+                        "startup_stage": result["startup_stage"],
+                        "refined": result.get("refined", False),
+                        "text_ref": text_ref
                     }
                 })
             
             return {
                 "success": True,
                 "cleaned_text": result["cleaned_text"],
-                "startup_stage": result["startup_stage"]
+                "startup_stage": result["startup_stage"],
+                "refined": result.get("refined", False),
+                "text_ref": text_ref
             }
             
         except Exception as e:
@@ -71,13 +93,14 @@ class PDFService:
                 })
             raise
     
-    def _extract_text(self, file_path, job_id):
+    def _extract_text(self, file_path, job_id, pages=None):
         """
         Extract text from PDF using multiple methods.
         
         Args:
             file_path (str): Path to the PDF file
             job_id (str): ID of the job to update progress
+            pages (list): Optional list the text of each kept page is appended to
             
         Returns:
             str: The extracted text
@@ -119,9 +142,12 @@ class PDFService:
                     except Exception as e:
                         logger.warning(f"OCR error on page {i+1}: {str(e)}")
                 
-                # Add page text if it's not noise
+                # Add page text if it's not noise, ending each page with a
+                # form feed so long decks can later be chunked per page
                 if not is_noise_page(page_text):
-                    extracted_text += page_text + "\n"
+                    extracted_text += page_text + "\f"
+                    if pages is not None:
+                        pages.append(page_text)
                 else:
                     logger.debug(f"Skipped noise page {i+1}")
                 
@@ -138,6 +164,26 @@ class PDFService:
         
         return extracted_text
 
+    def _index_pages(self, cleaned_text, pages):
+        """
+        Build the section retrieval index over the deck's pages.
+        
+        The index is cached under the cleaned text, which is what memo jobs
+        for this deck are generated from.
+        
+        Args:
+            cleaned_text (str): The prepared text of the whole deck
+            pages (list): The extracted text of each page
+        """
+        from ..utils.text_processing import clean_text
+        from ..utils.retrieval import BM25Index, store_deck_index
+        
+        try:
+            store_deck_index(cleaned_text, BM25Index([clean_text(page) for page in pages]))
+            logger.info(f"Indexed {len(pages)} pages for section retrieval")
+        except Exception as e:
+            logger.warning(f"Failed to index pages: {str(e)}")
+    
     def prepare_text(self, text, refine=True):
         """
         Prepare the extracted text.
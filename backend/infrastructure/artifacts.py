@@ -0,0 +1,90 @@
+"""
+Content-addressed storage of prepared deck text.
+This module stores the text a PDF job has cleaned and refined in Redis under
+a hash of its content. Memo jobs are enqueued with that reference, so the
+worker can use the text as it is instead of preparing it again. Jobs only
+carry the text itself when the client sent it, as a fallback for stored text
+that expires or is evicted before the job runs.
+"""
+
+import logging
+from .cache import RedisCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+_artifact_cache = None
+
+def _get_artifact_cache():
+    global _artifact_cache
+
+    if _artifact_cache is None:
+        from ..config import Config
+        _artifact_cache = RedisCache(Config, "prepared_text", ttl=Config.PREPARED_TEXT_TTL,
+                                     max_entries=Config.ARTIFACT_MAX_ENTRIES)
+    return _artifact_cache
+
+def prepared_text_ref(text):
+    """
+    Get the content address of a text.
+
+    Texts differing only in whitespace share an address.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        str: The reference the text is or would be stored under
+    """
+    return make_cache_key(" ".join(text.split()))
+
+def store_prepared_text(text):
+    """
+    Store prepared text under its content address.
+
+    Args:
+        text (str): Text that has already been cleaned and refined
+
+    Returns:
+        str: The text's reference, or None if it could not be stored
+    """
+    ref = prepared_text_ref(text)
+    try:
+        _get_artifact_cache().set(ref, {"text": text})
+        logger.info(f"Stored prepared text {ref[:12]} ({len(text)} characters)")
+        return ref
+    except Exception as e:
+        logger.warning(f"Failed to store prepared text: {str(e)}")
+        return None
+
+def has_prepared_text(ref):
+    """
+    Check whether prepared text is stored under a reference.
+
+    Args:
+        ref (str): The text's reference
+
+    Returns:
+        bool: True if the text is stored; False if not or if Redis failed
+    """
+    try:
+        return _get_artifact_cache().exists(ref)
+    except Exception as e:
+        logger.warning(f"Prepared text lookup failed: {str(e)}")
+        return False
+
+def get_prepared_text(ref):
+    """
+    Get the prepared text stored under a reference.
+
+    Args:
+        ref (str): The text's reference
+
+    Returns:
+        str: The text, or None if it is not stored, has expired or Redis failed
+    """
+    try:
+        artifact = _get_artifact_cache().get(ref)
+    except Exception as e:
+        logger.warning(f"Prepared text lookup failed: {str(e)}")
+        return None
+    return artifact["text"] if artifact else None
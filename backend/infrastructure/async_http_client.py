@@ -0,0 +1,91 @@
+"""
+Asynchronous HTTP client for calls to external providers.
+This module provides aiohttp sessions and per-provider in-flight limits for
+code running on an asyncio event loop, such as the async worker.
+"""
+
+import asyncio
+import logging
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+def create_async_session(limit=100, limit_per_host=20, timeout=60):
+    """
+    Create an aiohttp session with a keep-alive connection pool.
+
+    Must be called from within a running event loop.
+
+    Args:
+        limit (int): Maximum open connections in total
+        limit_per_host (int): Maximum open connections per host
+        timeout (int): Default connect and read timeout in seconds. Like the
+            requests timeout it applies to each socket operation, not to the
+            whole request, so long streamed responses are not cut off
+
+    Returns:
+        aiohttp.ClientSession: The configured session
+    """
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+class ProviderLimiter:
+    """
+    Limit the number of concurrent in-flight requests per provider.
+
+    Callers wait for a free slot instead of failing, so a burst of jobs on
+    one event loop never has more than the configured number of requests
+    open against a provider.
+    """
+
+    def __init__(self, limits, default_limit=8):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits (dict): Maximum in-flight requests per provider name
+            default_limit (int): Limit for providers not listed in limits
+        """
+        self.limits = dict(limits)
+        self.default_limit = default_limit
+        self._semaphores = {}
+        self._in_flight = {}
+
+    def slot(self, provider):
+        """
+        Get an async context manager holding one request slot for a provider.
+
+        Args:
+            provider (str): The provider name
+
+        Returns:
+            An async context manager that waits for and releases the slot
+        """
+        return _ProviderSlot(self, provider)
+
+    def in_flight(self, provider):
+        """Get the number of requests currently in flight for a provider."""
+        return self._in_flight.get(provider, 0)
+
+    def _semaphore(self, provider):
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(self.limits.get(provider, self.default_limit))
+        return self._semaphores[provider]
+
+class _ProviderSlot:
+    """Async context manager for one in-flight request slot."""
+
+    def __init__(self, limiter, provider):
+        self.limiter = limiter
+        self.provider = provider
+
+    async def __aenter__(self):
+        await self.limiter._semaphore(self.provider).acquire()
+        self.limiter._in_flight[self.provider] = self.limiter.in_flight(self.provider) + 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.limiter._in_flight[self.provider] -= 1
+        self.limiter._semaphore(self.provider).release()
+        return False
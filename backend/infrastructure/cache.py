@@ -0,0 +1,138 @@
+"""
+Redis-backed result caching.
+This module provides a namespaced JSON cache with per-entry TTL and an
+LRU-style bound on the number of entries.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import redis
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(*parts):
+    """
+    Build a stable cache key from the given parts.
+
+    Args:
+        *parts: Values identifying the cached result
+
+    Returns:
+        str: A SHA-256 hex digest of the parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class RedisCache:
+    """Namespaced JSON cache in Redis with TTL and LRU-style size bounds."""
+
+    def __init__(self, config, namespace, ttl=86400, max_entries=1000):
+        """
+        Initialize the cache.
+
+        Args:
+            config: Configuration object with Redis settings
+            namespace (str): Prefix separating this cache from others
+            ttl (int): Time in seconds until an entry expires
+            max_entries (int): Maximum entries kept; least recently used
+                entries are evicted beyond this
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        redis_url = f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}/{config.REDIS_DB}"
+        self.redis_client = redis.from_url(redis_url)
+        self._lru_key = f"cache:{namespace}:lru"
+        # Expiry time of each entry, so entries that expire on their own stop
+        # counting toward max_entries
+        self._expiry_key = f"cache:{namespace}:expiry"
+        logger.info(f"Initialized RedisCache '{namespace}' (ttl={ttl}s, max_entries={max_entries})")
+
+    def _entry_key(self, key):
+        return f"cache:{self.namespace}:{key}"
+
+    def get(self, key):
+        """
+        Get a cached value and mark it as recently used.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        raw = self.redis_client.get(self._entry_key(key))
+        if raw is None:
+            return None
+
+        self.redis_client.zadd(self._lru_key, {key: time.time()})
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value, evicting least recently used entries beyond the bound.
+
+        Args:
+            key (str): The cache key
+            value: A JSON-serializable value
+            ttl (int): Optional TTL overriding the cache default; 0 skips
+                storing the value
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        pipe.setex(self._entry_key(key), ttl, json.dumps(value))
+        pipe.zadd(self._lru_key, {key: now})
+        pipe.zadd(self._expiry_key, {key: now + ttl})
+        # Forget entries that can only have expired by now
+        pipe.zremrangebyscore(self._lru_key, 0, now - self.ttl)
+        pipe.zrangebyscore(self._expiry_key, 0, now)
+        pipe.zcard(self._lru_key)
+        *_, expired, size = pipe.execute()
+
+        if expired:
+            # Hits do not extend an entry's TTL, so recently used entries expire too
+            pipe = self.redis_client.pipeline()
+            pipe.zrem(self._lru_key, *expired)
+            pipe.zrem(self._expiry_key, *expired)
+            removed = pipe.execute()[0]
+            size -= removed
+
+        if size > self.max_entries:
+            evicted = self.redis_client.zpopmin(self._lru_key, size - self.max_entries)
+            keys = [member.decode() if isinstance(member, bytes) else member for member, _ in evicted]
+            if keys:
+                self.redis_client.delete(*[self._entry_key(k) for k in keys])
+                self.redis_client.zrem(self._expiry_key, *keys)
+                logger.debug(f"Evicted {len(keys)} entries from cache '{self.namespace}'")
+
+    def exists(self, key):
+        """
+        Check whether a value is cached, without reading or touching it.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            bool: True if the key is cached
+        """
+        return bool(self.redis_client.exists(self._entry_key(key)))
+
+    def delete(self, key):
+        """
+        Remove a cached value.
+
+        Args:
+            key (str): The cache key
+        """
+        self.redis_client.delete(self._entry_key(key))
+        self.redis_client.zrem(self._lru_key, key)
+        self.redis_client.zrem(self._expiry_key, key)
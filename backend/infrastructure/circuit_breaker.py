@@ -0,0 +1,208 @@
+"""
+Circuit breakers for external providers.
+This module provides a circuit breaker whose state lives in Redis, so that
+all API and worker processes stop calling a failing provider together and
+share the half-open probes that detect its recovery.
+"""
+
+import json
+import time
+import uuid
+import logging
+import contextvars
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Probe tokens won by the current job or thread, by breaker name
+_probe_tokens = contextvars.ContextVar("breaker_probe_tokens", default={})
+
+# Delete the probe key only if it still holds the caller's token
+_RELEASE_PROBE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class CircuitBreaker:
+    """
+    Redis-backed circuit breaker with rolling error rate and latency.
+
+    The breaker keeps the outcomes of recent calls within a rolling window.
+    Calls that fail or take longer than slow_call_seconds count as errors.
+    Once at least min_calls are recorded and the error rate reaches
+    error_rate_threshold, the breaker opens and requests are skipped. After
+    open_seconds a single caller across all workers is allowed through as a
+    half-open probe: success closes the breaker, failure opens it again.
+    Only the caller holding the probe token can make that transition; calls
+    that started before the breaker opened are recorded as samples only.
+    """
+
+    def __init__(self, redis_client, name, error_rate_threshold=0.5, min_calls=5,
+                 window_seconds=300, open_seconds=60, slow_call_seconds=45, max_samples=100):
+        """Initialize the breaker for a named provider."""
+        self.redis_client = redis_client
+        self.name = name
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.max_samples = max_samples
+        self._calls_key = f"breaker:{name}:calls"
+        self._state_key = f"breaker:{name}:state"
+        self._probe_key = f"breaker:{name}:probe"
+        self._release_probe = redis_client.register_script(_RELEASE_PROBE_SCRIPT)
+
+    def _get_state(self):
+        state = self.redis_client.hgetall(self._state_key)
+        state = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in state.items()
+        }
+        return state.get("state", CLOSED), float(state.get("opened_at", 0))
+
+    def _set_state(self, state, opened_at=0):
+        self.redis_client.hset(self._state_key, mapping={"state": state, "opened_at": opened_at})
+
+    def _recent_calls(self):
+        cutoff = time.time() - self.window_seconds
+        calls = [json.loads(raw) for raw in self.redis_client.lrange(self._calls_key, 0, -1)]
+        return [call for call in calls if call["t"] >= cutoff]
+
+    def allow_request(self):
+        """
+        Check whether a call to the provider may be made now.
+
+        The probe token is also kept in the current context, so the
+        record_* call of the same job or thread finds it without passing it.
+
+        Returns:
+            True if the breaker is closed, the probe token (a non-empty
+                string) if this caller won the half-open probe, or False if
+                the provider should be skipped
+        """
+        try:
+            state, opened_at = self._get_state()
+            if state == CLOSED:
+                return True
+
+            if time.time() - opened_at < self.open_seconds:
+                return False
+
+            # Only one caller across all workers gets to probe the provider
+            token = uuid.uuid4().hex
+            if self.redis_client.set(self._probe_key, token, nx=True, ex=self.open_seconds):
+                self._set_state(HALF_OPEN, opened_at)
+                self.hold_probe(token)
+                logger.info(f"Circuit breaker '{self.name}' half-open, sending probe")
+                return token
+            return False
+        except Exception as e:
+            # Never block provider calls because Redis is unavailable
+            logger.warning(f"Circuit breaker '{self.name}' unavailable: {str(e)}")
+            return True
+
+    def hold_probe(self, token):
+        """
+        Keep a probe token won in another context, such as a worker thread,
+        in the current one so that its record_* call finds it.
+
+        Args:
+            token (str): The probe token returned by allow_request
+        """
+        _probe_tokens.set({**_probe_tokens.get(), self.name: token})
+
+    def record_success(self, latency, probe=None):
+        """
+        Record a successful call.
+
+        Args:
+            latency (float): Call duration in seconds
+            probe (str): Probe token from allow_request, defaulting to the
+                one held in the current context
+        """
+        self._record(latency <= self.slow_call_seconds, latency, probe)
+
+    def record_failure(self, latency, probe=None):
+        """
+        Record a failed call.
+
+        Args:
+            latency (float): Call duration in seconds
+            probe (str): Probe token from allow_request, defaulting to the
+                one held in the current context
+        """
+        self._record(False, latency, probe)
+
+    def _take_probe(self, probe):
+        # Release the probe key if this caller still holds it
+        tokens = _probe_tokens.get()
+        probe = probe or tokens.get(self.name)
+        if self.name in tokens:
+            _probe_tokens.set({name: token for name, token in tokens.items() if name != self.name})
+        return bool(probe) and bool(self._release_probe(keys=[self._probe_key], args=[probe]))
+
+    def _record(self, ok, latency, probe=None):
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.lpush(self._calls_key, json.dumps({"t": time.time(), "ok": ok, "latency": round(latency, 3)}))
+            pipe.ltrim(self._calls_key, 0, self.max_samples - 1)
+            pipe.expire(self._calls_key, self.window_seconds)
+            pipe.execute()
+
+            state, _ = self._get_state()
+            if state == HALF_OPEN:
+                if not self._take_probe(probe):
+                    return
+                if ok:
+                    self.redis_client.delete(self._calls_key)
+                    self._set_state(CLOSED)
+                    logger.info(f"Circuit breaker '{self.name}' closed after successful probe")
+                else:
+                    self._set_state(OPEN, time.time())
+                    logger.warning(f"Circuit breaker '{self.name}' re-opened after failed probe")
+                return
+
+            if state == CLOSED and not ok:
+                calls = self._recent_calls()
+                errors = sum(1 for call in calls if not call["ok"])
+                if len(calls) >= self.min_calls and errors / len(calls) >= self.error_rate_threshold:
+                    self._set_state(OPEN, time.time())
+                    logger.warning(f"Circuit breaker '{self.name}' opened "
+                                   f"({errors}/{len(calls)} recent calls failed)")
+        except Exception as e:
+            logger.warning(f"Failed to record call for circuit breaker '{self.name}': {str(e)}")
+
+    def status(self):
+        """
+        Get the breaker state and health of the provider.
+
+        Returns:
+            dict: The state, number of recent calls, error rate, p95
+                latency and a health score from 0 (failing) to 1 (healthy)
+        """
+        state, opened_at = self._get_state()
+        calls = self._recent_calls()
+        errors = sum(1 for call in calls if not call["ok"])
+        error_rate = errors / len(calls) if calls else 0.0
+
+        latencies = sorted(call["latency"] for call in calls)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+
+        # Health drops with the error rate and as p95 approaches the slow-call limit
+        latency_penalty = min(1.0, p95 / self.slow_call_seconds) * 0.5 if p95 is not None else 0.0
+        health = 0.0 if state == OPEN else max(0.0, (1 - error_rate) * (1 - latency_penalty))
+
+        return {
+            "state": state,
+            "opened_at": opened_at or None,
+            "recent_calls": len(calls),
+            "error_rate": round(error_rate, 3),
+            "p95_latency": p95,
+            "health": round(health, 3)
+        }
@@ -0,0 +1,71 @@
+"""
+Shared HTTP client for calls to external providers.
+This module provides a pooled keep-alive requests session so that LLM and
+search API calls reuse TCP and TLS connections instead of opening a new one
+for every request.
+"""
+
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def create_http_session(pool_connections=10, pool_maxsize=20):
+    """
+    Create a requests session with a per-host connection pool.
+
+    Args:
+        pool_connections (int): Number of hosts to keep connection pools for
+        pool_maxsize (int): Maximum open connections kept alive per host
+
+    Returns:
+        requests.Session: The configured session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=False
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_http_session(config=None):
+    """
+    Get the shared HTTP session for this process.
+
+    The session is created lazily and recreated after a fork, so every
+    worker process gets its own pool instead of sharing sockets with its
+    parent. Note that RQ's default worker forks a fresh work horse per job;
+    use a non-forking worker (e.g. rq.SimpleWorker) to keep connections
+    alive across jobs.
+
+    Args:
+        config: Configuration object to use (defaults to Config)
+
+    Returns:
+        requests.Session: The shared session
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                if config is None:
+                    from ..config import Config
+                    config = Config
+                _session = create_http_session(config.HTTP_POOL_CONNECTIONS, config.HTTP_POOL_MAXSIZE)
+                _session_pid = pid
+                logger.info(f"Created HTTP session for process {pid} "
+                            f"(pools={config.HTTP_POOL_CONNECTIONS}, maxsize={config.HTTP_POOL_MAXSIZE})")
+
+    return _session
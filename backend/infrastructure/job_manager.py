@@ -7,13 +7,58 @@ stored in Redis.
 import os
 import redis
 import json
+import time
 import uuid
+import asyncio
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from ..utils.error_handling import ResourceNotFoundError  # Updated import statement
 
 logger = logging.getLogger(__name__)
 
+# Attach to the fingerprint's leader job if one is in flight, otherwise
+# become the leader. Runs atomically so a job can never attach to a leader
+# that has already released its fingerprint.
+_CLAIM_SCRIPT = """
+local leader = redis.call('GET', KEYS[1])
+if leader then
+    if leader ~= ARGV[1] then
+        redis.call('SADD', 'job_subscribers:' .. leader, ARGV[1])
+        redis.call('EXPIRE', 'job_subscribers:' .. leader, ARGV[2])
+    end
+    return leader
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return ARGV[1]
+"""
+
+# Release the fingerprint if the job still leads it and hand back the jobs
+# that attached to it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+local key = 'job_subscribers:' .. ARGV[1]
+local subscribers = redis.call('SMEMBERS', key)
+redis.call('DEL', key)
+return subscribers
+"""
+
+# Renew the fingerprint's claim if the job still leads it, keeping the jobs
+# attached to it for at least as long
+_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+local key = 'job_subscribers:' .. ARGV[1]
+if redis.call('TTL', key) < tonumber(ARGV[2]) then
+    redis.call('EXPIRE', key, ARGV[2])
+end
+return 1
+"""
+
 class JobManager:
     """Manager for handling job lifecycle in Redis."""
     
@@ -22,6 +67,9 @@ class JobManager:
         self.config = config
         redis_url = f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}/{config.REDIS_DB}"
         self.redis_client = redis.from_url(redis_url)
+        self._claim_script = self.redis_client.register_script(_CLAIM_SCRIPT)
+        self._release_script = self.redis_client.register_script(_RELEASE_SCRIPT)
+        self._refresh_script = self.redis_client.register_script(_REFRESH_SCRIPT)
         logger.info(f"Initialized JobManager with Redis at {redis_url}")
     
     def create_job(self, expiration=3600, metadata=None):
@@ -78,6 +126,32 @@ class JobManager:
         self.redis_client.setex(key, expiration, json.dumps(job_data))
         logger.debug(f"Updated job {job_id}: {data.keys()}")
     
+    def update_job_metadata(self, job_id, metadata, expiration=3600):
+        """
+        Merge values into the metadata of an existing job.
+        
+        Args:
+            job_id (str): The job ID
+            metadata (dict): Metadata values to merge
+            expiration (int): Time in seconds until the job expires
+            
+        Raises:
+            ResourceNotFoundError: If the job does not exist
+        """
+        key = f"job:{job_id}"
+        current_data = self.redis_client.get(key)
+        
+        if not current_data:
+            logger.warning(f"Attempted to update metadata of non-existent job {job_id}")
+            raise ResourceNotFoundError("Job", job_id)
+            
+        job_data = json.loads(current_data)
+        job_data.setdefault("metadata", {}).update(metadata)
+        job_data["updated_at"] = datetime.now().isoformat()
+        
+        self.redis_client.setex(key, expiration, json.dumps(job_data))
+        logger.debug(f"Updated job {job_id} metadata: {metadata.keys()}")
+    
     def get_job(self, job_id):
         """
         Get a job from Redis.
@@ -112,6 +186,182 @@ class JobManager:
         else:
             logger.debug(f"Attempted to delete non-existent job {job_id}")
 
+    def append_job_stream(self, job_id, event, expiration=3600):
+        """
+        Append an event to a job's output stream.
+        
+        Args:
+            job_id (str): The job ID
+            event (dict): Event fields, e.g. {"type": "token", "text": "..."}
+            expiration (int): Time in seconds until the stream expires
+            
+        Returns:
+            str: The stream entry ID
+        """
+        key = f"job_stream:{job_id}"
+        entry_id = self.redis_client.xadd(key, {"event": json.dumps(event)})
+        self.redis_client.expire(key, expiration)
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+    
+    def read_job_stream(self, job_id, last_id="0", block_ms=15000, count=100):
+        """
+        Read events appended to a job's output stream after last_id.
+        
+        Args:
+            job_id (str): The job ID
+            last_id (str): Stream entry ID to read after ("0" for the start)
+            block_ms (int): Milliseconds to wait for new events
+            count (int): Maximum number of events to return
+            
+        Returns:
+            list: (entry_id, event) tuples, empty if none arrived in time
+        """
+        key = f"job_stream:{job_id}"
+        response = self.redis_client.xread({key: last_id}, count=count, block=block_ms)
+        
+        events = []
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                raw = fields.get(b"event", fields.get("event"))
+                events.append((entry_id, json.loads(raw)))
+        return events
+
+    def claim_single_flight(self, fingerprint, job_id, expiration=900):
+        """
+        Make a job the leader of a fingerprint, or attach it to the leader.
+        
+        Jobs attached to a leader are returned by release_single_flight when
+        the leader finishes, so they can be given its result.
+        
+        Args:
+            fingerprint (str): Fingerprint of the work the job would do
+            job_id (str): The job ID
+            expiration (int): Time in seconds after which a leader that never
+                released the fingerprint stops collecting jobs
+            
+        Returns:
+            str: The leader's job ID, which is job_id if the job now leads
+        """
+        leader = self._claim_script(keys=[f"inflight:{fingerprint}"], args=[job_id, expiration])
+        return leader.decode() if isinstance(leader, bytes) else leader
+    
+    def release_single_flight(self, fingerprint, job_id):
+        """
+        Release a fingerprint led by a job.
+        
+        Args:
+            fingerprint (str): The fingerprint the job claimed
+            job_id (str): The leader's job ID
+            
+        Returns:
+            list: IDs of the jobs attached to the leader
+        """
+        subscribers = self._release_script(keys=[f"inflight:{fingerprint}"], args=[job_id])
+        return [s.decode() if isinstance(s, bytes) else s for s in subscribers or []]
+    
+    def refresh_single_flight(self, fingerprint, job_id, expiration):
+        """
+        Renew the claim of a job that leads a fingerprint.
+        
+        Args:
+            fingerprint (str): The fingerprint the job claimed
+            job_id (str): The leader's job ID
+            expiration (int): Time in seconds until the claim expires unless
+                renewed again
+            
+        Returns:
+            bool: True if the job still leads the fingerprint
+        """
+        return bool(self._refresh_script(keys=[f"inflight:{fingerprint}"], args=[job_id, expiration]))
+    
+    def get_single_flight_leader(self, fingerprint):
+        """
+        Get the job currently leading a fingerprint.
+        
+        Args:
+            fingerprint (str): The fingerprint
+            
+        Returns:
+            str: The leader's job ID, or None if the fingerprint was released
+                or its claim expired
+        """
+        leader = self.redis_client.get(f"inflight:{fingerprint}")
+        return leader.decode() if isinstance(leader, bytes) else leader
+
+class JobStreamWriter:
+    """
+    Buffered writer that streams generated tokens into a job's output stream.
+    
+    Tokens are batched and flushed at most every flush_interval seconds so
+    a fast provider does not cause one Redis write per token.
+    """
+    
+    def __init__(self, job_id, flush_interval=0.1, manager=None):
+        """Initialize the writer for a job."""
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.manager = manager or get_job_manager()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+    
+    def token(self, text):
+        """Buffer a generated token and flush if the interval has passed."""
+        self._buffer.append(text)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered tokens to the stream."""
+        if self._buffer:
+            self._append({"type": "token", "text": "".join(self._buffer)})
+            self._buffer = []
+        self._last_flush = time.monotonic()
+    
+    def reset(self):
+        """Tell readers to discard everything streamed so far."""
+        self._buffer = []
+        self._append({"type": "reset"})
+    
+    def finish(self, result=None):
+        """Flush remaining tokens and mark the stream as complete."""
+        self.flush()
+        self._append({"type": "done", "result": result})
+    
+    def fail(self, error):
+        """Mark the stream as failed."""
+        self._buffer = []
+        self._append({"type": "error", "error": error})
+    
+    def _append(self, event):
+        self.manager.append_job_stream(self.job_id, event)
+
+class AsyncJobStreamWriter(JobStreamWriter):
+    """
+    Stream writer for jobs running on an event loop.
+    
+    Events are written to Redis in order by a background thread, so that
+    flushing tokens never blocks the loop. Call drain once the stream is
+    finished or failed.
+    """
+    
+    def __init__(self, job_id, flush_interval=0.1, manager=None):
+        """Initialize the writer for a job."""
+        super().__init__(job_id, flush_interval, manager)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+    
+    def _append(self, event):
+        self._pending = self._executor.submit(self.manager.append_job_stream, self.job_id, event)
+    
+    async def drain(self):
+        """Wait until every event is written, then stop the writer thread."""
+        try:
+            if self._pending is not None:
+                await asyncio.wrap_future(self._pending)
+        finally:
+            self._executor.shutdown(wait=False)
+
 # Create a singleton instance
 _job_manager = None
 
@@ -134,10 +384,38 @@ def update_job(job_id, data, expiration=3600):
     """Update an existing job."""
     return get_job_manager().update_job(job_id, data, expiration)
 
+def update_job_metadata(job_id, metadata, expiration=3600):
+    """Merge values into a job's metadata."""
+    return get_job_manager().update_job_metadata(job_id, metadata, expiration)
+
 def get_job(job_id):
     """Get a job."""
     return get_job_manager().get_job(job_id)
 
 def delete_job(job_id):
     """Delete a job."""
-    return get_job_manager().delete_job(job_id)
\ No newline at end of file
+    return get_job_manager().delete_job(job_id)
+
+def append_job_stream(job_id, event, expiration=3600):
+    """Append an event to a job's output stream."""
+    return get_job_manager().append_job_stream(job_id, event, expiration)
+
+def read_job_stream(job_id, last_id="0", block_ms=15000, count=100):
+    """Read events from a job's output stream."""
+    return get_job_manager().read_job_stream(job_id, last_id, block_ms, count)
+
+def claim_single_flight(fingerprint, job_id, expiration=900):
+    """Make a job the leader of a fingerprint, or attach it to the leader."""
+    return get_job_manager().claim_single_flight(fingerprint, job_id, expiration)
+
+def release_single_flight(fingerprint, job_id):
+    """Release a fingerprint and get the jobs attached to its leader."""
+    return get_job_manager().release_single_flight(fingerprint, job_id)
+
+def refresh_single_flight(fingerprint, job_id, expiration):
+    """Renew the claim of a job that leads a fingerprint."""
+    return get_job_manager().refresh_single_flight(fingerprint, job_id, expiration)
+
+def get_single_flight_leader(fingerprint):
+    """Get the job currently leading a fingerprint."""
+    return get_job_manager().get_single_flight_leader(fingerprint)
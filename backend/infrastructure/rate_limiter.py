@@ -0,0 +1,224 @@
+"""
+Distributed rate limiting for external providers.
+This module provides token-bucket rate limiters whose state lives in Redis,
+so that every API and worker process shares one request and token budget per
+provider and model, and callers wait for capacity instead of getting 429s.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Refill both buckets from the time elapsed since the last call, then take one
+# request and the given tokens if both buckets have enough. Uses the Redis
+# clock so callers on different hosts agree on time. Returns the seconds to
+# wait before retrying, or 0 if the request was granted.
+_ACQUIRE_SCRIPT = """
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok', 'ts')
+local req = tonumber(state[1]) or rpm
+local tok = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+if rpm > 0 then req = math.min(rpm, req + elapsed * rpm / 60) end
+if tpm > 0 then tok = math.min(tpm, tok + elapsed * tpm / 60) end
+
+local wait = 0
+if rpm > 0 and req < 1 then wait = math.max(wait, (1 - req) * 60 / rpm) end
+if tpm > 0 and tok < cost then wait = math.max(wait, (cost - tok) * 60 / tpm) end
+if wait == 0 then
+    if rpm > 0 then req = req - 1 end
+    if tpm > 0 then tok = tok - cost end
+end
+
+redis.call('HSET', KEYS[1], 'req', req, 'tok', tok, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(wait)
+"""
+
+# Return unused tokens to the token bucket, capped at its capacity, or take
+# tokens used beyond the reservation (which may leave the bucket in debt)
+_REFUND_SCRIPT = """
+local tpm = tonumber(ARGV[1])
+local tok = tonumber(redis.call('HGET', KEYS[1], 'tok'))
+if tok then
+    redis.call('HSET', KEYS[1], 'tok', math.min(tpm, tok + tonumber(ARGV[2])))
+end
+return 1
+"""
+
+class RateLimitTimeout(Exception):
+    """Raised when no rate limit slot frees up within the allowed wait."""
+
+class RateLimiter:
+    """
+    Redis-backed token buckets for requests and tokens per minute.
+
+    Both buckets start full and refill continuously at their per-minute
+    rate. A limit of 0 disables that bucket. If Redis is unavailable the
+    limiter lets requests through rather than blocking provider calls.
+    """
+
+    def __init__(self, redis_client, name, rpm=0, tpm=0):
+        """
+        Initialize the limiter.
+
+        Args:
+            redis_client: Redis client holding the shared buckets
+            name (str): Name of the budget, e.g. "groq:deepseek-r1-distill-llama-70b"
+            rpm (int): Requests per minute, 0 for no request limit
+            tpm (int): Tokens per minute, 0 for no token limit
+        """
+        self.redis_client = redis_client
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self._key = f"ratelimit:{name}"
+        self._acquire = redis_client.register_script(_ACQUIRE_SCRIPT)
+        self._refund = redis_client.register_script(_REFUND_SCRIPT)
+
+    def cost(self, tokens):
+        """
+        Get the tokens a reservation actually takes from the token bucket.
+
+        A request larger than the bucket waits for a full bucket and takes
+        all of it, so refunds must be computed from this, not the request.
+
+        Args:
+            tokens (int): Tokens the request is expected to use
+
+        Returns:
+            int: The tokens taken, 0 if tokens are not limited
+        """
+        return min(tokens, self.tpm) if self.tpm > 0 else 0
+
+    def reserve(self, tokens=0):
+        """
+        Take one request and the given tokens if both are available now.
+
+        Args:
+            tokens (int): Tokens the request is expected to use
+
+        Returns:
+            float: 0 if granted, otherwise the seconds until enough capacity
+                should be available
+        """
+        try:
+            return float(self._acquire(keys=[self._key], args=[self.rpm, self.tpm, self.cost(tokens)]))
+        except Exception as e:
+            logger.warning(f"Rate limiter '{self.name}' unavailable: {str(e)}")
+            return 0.0
+
+    def acquire(self, tokens=0, max_wait=60):
+        """
+        Wait until one request and the given tokens are available, then take them.
+
+        Args:
+            tokens (int): Tokens the request is expected to use
+            max_wait (float): Maximum seconds to wait
+
+        Returns:
+            float: The seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: If no slot is expected within max_wait
+        """
+        started = time.monotonic()
+        while True:
+            wait = self.reserve(tokens)
+            waited = time.monotonic() - started
+            if wait == 0:
+                if waited > 0.01:
+                    logger.info(f"Waited {waited:.1f}s for rate limit '{self.name}'")
+                return waited
+            if waited + wait > max_wait:
+                raise RateLimitTimeout(f"Rate limit '{self.name}' has no capacity within {max_wait}s")
+            # Jitter spreads out workers that are waiting on the same bucket
+            time.sleep(wait + random.uniform(0, 0.1))
+
+    async def acquire_async(self, tokens=0, max_wait=60):
+        """
+        Wait on the event loop until one request and the given tokens are available.
+
+        Args:
+            tokens (int): Tokens the request is expected to use
+            max_wait (float): Maximum seconds to wait
+
+        Returns:
+            float: The seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: If no slot is expected within max_wait
+        """
+        started = time.monotonic()
+        while True:
+            # The Redis round trip runs in a thread to keep the loop free
+            wait = await asyncio.to_thread(self.reserve, tokens)
+            waited = time.monotonic() - started
+            if wait == 0:
+                return waited
+            if waited + wait > max_wait:
+                raise RateLimitTimeout(f"Rate limit '{self.name}' has no capacity within {max_wait}s")
+            await asyncio.sleep(wait + random.uniform(0, 0.1))
+
+    def refund(self, tokens):
+        """
+        Return tokens that were reserved but not used.
+
+        Args:
+            tokens (int): The unused tokens; a negative number charges tokens
+                used beyond the reservation
+        """
+        if self.tpm <= 0 or not tokens:
+            return
+        try:
+            self._refund(keys=[self._key], args=[self.tpm, tokens])
+        except Exception as e:
+            logger.warning(f"Failed to refund tokens to rate limiter '{self.name}': {str(e)}")
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider, model, config=None):
+    """
+    Get the shared rate limiter for a provider and model.
+
+    Limits are read from the {PROVIDER}_RPM and {PROVIDER}_TPM settings.
+
+    Args:
+        provider (str): The provider name, e.g. "Groq"
+        model (str): The model name
+        config: Configuration object to use (defaults to Config)
+
+    Returns:
+        RateLimiter: The limiter, or None if rate limiting is disabled or
+            the provider has no limits configured
+    """
+    if config is None:
+        from ..config import Config
+        config = Config
+
+    if not config.RATE_LIMIT_ENABLED:
+        return None
+
+    rpm = getattr(config, f"{provider.upper()}_RPM", 0)
+    tpm = getattr(config, f"{provider.upper()}_TPM", 0)
+    if not rpm and not tpm:
+        return None
+
+    name = f"{provider.lower()}:{model}"
+    if name not in _limiters:
+        with _limiters_lock:
+            if name not in _limiters:
+                redis_url = f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}/{config.REDIS_DB}"
+                _limiters[name] = RateLimiter(redis.from_url(redis_url), name, rpm=rpm, tpm=tpm)
+    return _limiters[name]
@@ -4,41 +4,121 @@ This module consolidates all prompt definitions to avoid duplicates.
 """
 
 from .utils.memo_templates import TEMPLATES
+from .utils.token_budget import estimate_tokens, estimate_prompt_tokens, fit_max_tokens, get_context_limit, truncate_to_tokens
 
-def build_memo_prompt(input_text: str, template_key: str = "default") -> dict:
+MEMO_SYSTEM_MESSAGE = "You are an expert venture capital analyst specializing in creating detailed investment memos."
+
+def compile_memo_template(template: dict) -> dict:
+    """
+    Compile a memo template into byte-stable prompt blocks.
+    
+    Args:
+        template (dict): A template from TEMPLATES.
+        
+    Returns:
+        dict: The template's "sections_order" and its "instructions" block,
+            which is identical for every request using the template.
+    """
+    # Format the sections from the template with section numbers
+    sections = "\n".join(f"{i+1}. {section}" for i, section in enumerate(template["sections_order"]))
+    
+    return {
+        "sections_order": tuple(template["sections_order"]),
+        "instructions": (
+            f"{template['instructions']}\n\n"
+            f"Please structure the memo with the following sections:\n{sections}"
+        )
+    }
+
+# Templates compiled once at import so every request sends identical bytes
+COMPILED_TEMPLATES = {key: compile_memo_template(template) for key, template in TEMPLATES.items()}
+
+def get_compiled_template(template_key: str) -> dict:
+    """
+    Get a compiled template, falling back to the default template.
+    
+    Args:
+        template_key (str): The key of the template.
+        
+    Returns:
+        dict: The compiled template.
+    """
+    return COMPILED_TEMPLATES.get(template_key, COMPILED_TEMPLATES["default"])
+
+def build_memo_prompt(input_text: str, template_key: str = "default", section: str = None) -> dict:
     """
     Build the prompt payload for LLM calls used in investment memo generation.
     
+    Providers cache the longest previously seen prefix of a prompt, so the
+    messages run from the most to the least shared content: the fixed system
+    message, then the compiled template block (identical for every deck and
+    section using the template), then the deck content and finally the
+    section to write. With retrieval every section gets different deck
+    pages, so the deck content cannot be part of the shared prefix.
+    
     Args:
         input_text (str): The pitch deck content to analyze.
         template_key (str): The key of the template to use (default is 'default').
+        section (str): Optional name of the single section to write. The full
+            section list is still included so the model knows what the other
+            sections cover.
         
     Returns:
         dict: A dictionary with two keys:
             - "system": A fixed system message.
-            - "user": The detailed user prompt including template instructions and the input text.
+            - "user": The template instructions followed by the deck content.
     """
-    # Get the appropriate template based on the provided key; fallback to default if key not found
-    template = TEMPLATES.get(template_key, TEMPLATES["default"])
-    
-    # Format the sections from the template with section numbers
-    sections = "\n".join(f"{i+1}. {section}" for i, section in enumerate(template["sections_order"]))
+    template = get_compiled_template(template_key)
     
-    # Define the fixed system message for the VC analyst role
-    system_message = "You are an expert venture capital analyst specializing in creating detailed investment memos."
-    
-    # Construct the user message by combining template instructions, sections, and input content
-    user_message = (
-        f"{template['instructions']}\n\n"
-        f"Please structure the memo with the following sections:\n{sections}\n\n"
-        f"Pitch Deck Content: {input_text}"
-    )
+    user_message = f"{template['instructions']}\n\nPitch Deck Content: {input_text}"
+    if section:
+        user_message += (
+            f"\n\nWrite only the \"{section}\" section. Start with the heading \"## {section}\" "
+            f"and do not repeat content that belongs in the other sections."
+        )
     
     return {
-        "system": system_message,
+        "system": MEMO_SYSTEM_MESSAGE,
         "user": user_message
     }
 
+def build_memo_request(input_text: str, template_key: str, model: str,
+                       max_tokens: int, min_output_tokens: int, section: str = None) -> dict:
+    """
+    Build a memo prompt that fits the model's context window.
+    
+    The completion budget is reduced to what the context leaves after the
+    prompt. If that would drop below min_output_tokens, the deck content is
+    truncated before the request is sent instead of letting the provider
+    reject it.
+    
+    Args:
+        input_text (str): The pitch deck content to analyze.
+        template_key (str): The key of the template to use.
+        model (str): The model the request will be sent to.
+        max_tokens (int): The preferred completion budget.
+        min_output_tokens (int): The smallest acceptable completion budget.
+        section (str): Optional name of the single section to write.
+        
+    Returns:
+        dict: The "system" and "user" messages plus the estimated
+            "prompt_tokens" and the "max_tokens" to request.
+    """
+    prompt = build_memo_prompt(input_text, template_key, section)
+    prompt_tokens = estimate_prompt_tokens(prompt, model)
+    completion_tokens = fit_max_tokens(prompt_tokens, model, max_tokens)
+    
+    if completion_tokens < min_output_tokens:
+        overhead = prompt_tokens - estimate_tokens(input_text, model)
+        input_budget = fit_max_tokens(overhead + min_output_tokens, model, get_context_limit(model))
+        prompt = build_memo_prompt(truncate_to_tokens(input_text, input_budget, model), template_key, section)
+        prompt_tokens = estimate_prompt_tokens(prompt, model)
+        completion_tokens = fit_max_tokens(prompt_tokens, model, max_tokens)
+    
+    prompt["prompt_tokens"] = prompt_tokens
+    prompt["max_tokens"] = completion_tokens
+    return prompt
+
 def build_text_refinement_prompt(text: str) -> dict:
     """
     Build the prompt payload for LLM calls used in text refinement.
@@ -62,3 +142,32 @@ def build_text_refinement_prompt(text: str) -> dict:
         "user": text
     }
 
+
+def build_stage_detection_prompt(summary: str) -> dict:
+    """
+    Build the prompt payload for LLM calls used in startup stage detection.
+    
+    Args:
+        summary (str): A compact summary of the pitch deck content.
+        
+    Returns:
+        dict: A dictionary with two keys:
+            - "system": A fixed system message for stage classification.
+            - "user": The classification instructions followed by the summary.
+    """
+    system_message = "You are a venture capital analyst who classifies startups by funding stage."
+    
+    user_message = (
+        "Based on the pitch deck excerpt below, respond with a single line starting with 'STAGE:' "
+        "followed by one of these exact stages, only provide the stage, no additional text. (case sensitive):\n"
+        "- seed (At this stage, startups are focused on proving product-market fit, developing their MVP, and early customer traction.)\n"
+        "- seriesa (At this stage, the startup has traction, revenue, and a proven business model. The focus is on scaling.)\n"
+        "- growth (for established startups scaling rapidly)\n"
+        "- default (if unable to determine)\n\n"
+        f"{summary}"
+    )
+    
+    return {
+        "system": system_message,
+        "user": user_message
+    }
@@ -3,11 +3,22 @@ Background tasks for asynchronous processing.
 This module defines tasks that can be executed by a task queue (e.g., Redis Queue).
 """
 
+import time
 import logging
+import threading
 from rq import Queue
+from rq.job import Job, JobStatus
+from rq.exceptions import NoSuchJobError
 from redis import Redis
 from .config import Config
-from .infrastructure.job_manager import update_job
+from .infrastructure.job_manager import (
+    update_job, get_job, JobStreamWriter, claim_single_flight, release_single_flight, refresh_single_flight,
+    get_single_flight_leader
+)
+from .infrastructure.cache import make_cache_key
+from .infrastructure.artifacts import prepared_text_ref, get_prepared_text
+from .utils.error_handling import ProcessingError
+from .utils.claims import merge_claim_results
 from .core.pdf_service import get_pdf_service
 from .core.memo_service import get_memo_service
 
@@ -23,6 +34,232 @@ redis_conn = Redis(
 # Create queues
 pdf_queue = Queue('pdf_jobs', connection=redis_conn)
 memo_queue = Queue('memo_jobs', connection=redis_conn)
+validation_queue = Queue('validation_jobs', connection=redis_conn)
+
+# Seconds between checks of an attached memo job on its leader
+MEMO_FLIGHT_POLL_SECONDS = 1
+
+def memo_fingerprint(text, template_key="default", stream=False, use_cache=True, sectioned=None,
+                     latency_target=None, text_ref=None):
+    """
+    Fingerprint a memo request, so identical requests can share one job.
+    
+    Requests with use_cache off ask for a fresh sample, so they are never
+    coalesced.
+    
+    Args:
+        text (str): The text to generate a memo from, or None if text_ref is given
+        template_key (str): The template to use
+        stream (bool): Whether tokens are streamed into the job's output stream
+        use_cache (bool): Whether a cached memo may be returned
+        sectioned (bool): Whether template sections are generated in parallel
+        latency_target (float): Optional latency target used for routing
+        text_ref (str): Optional reference to the prepared text
+        
+    Returns:
+        str: The fingerprint, or None if the request is not coalesced
+    """
+    if not Config.MEMO_COALESCE_ENABLED or not use_cache:
+        return None
+    # Text and its reference are both identified by the content address
+    content = text_ref or prepared_text_ref(text)
+    return make_cache_key("memo", content, template_key, bool(stream), sectioned, latency_target)
+
+def load_memo_text(text, text_ref=None):
+    """
+    Get the text a memo job generates from.
+    
+    Args:
+        text (str): The text sent with the job, or None
+        text_ref (str): Optional reference to text a PDF job already prepared
+        
+    Returns:
+        tuple: The text and whether it is already prepared
+        
+    Raises:
+        ProcessingError: If the referenced text is unavailable and no text was sent
+    """
+    if text_ref:
+        prepared = get_prepared_text(text_ref)
+        if prepared is not None:
+            return prepared, True
+        if text is None:
+            raise ProcessingError(f"Prepared text {text_ref} is unavailable; upload the deck again")
+        logger.warning(f"Prepared text {text_ref} is unavailable, preparing the text sent with the job")
+    return text, False
+
+def claim_memo_flight(fingerprint, job_id):
+    """
+    Make a memo job the leader of its fingerprint, or attach it to the leader.
+    
+    Args:
+        fingerprint (str): The request's fingerprint, or None
+        job_id (str): The job ID
+        
+    Returns:
+        str: The ID of the job that will generate the memo, which is job_id
+            unless an identical request is already in flight
+    """
+    if not fingerprint:
+        return job_id
+    try:
+        return claim_single_flight(fingerprint, job_id, Config.MEMO_COALESCE_TTL)
+    except Exception as e:
+        # Coalescing is an optimization; generate independently without it
+        logger.warning(f"Failed to claim memo fingerprint for job {job_id}: {str(e)}")
+        return job_id
+
+def hold_memo_flight(fingerprint, job_id):
+    """
+    Keep a running leader's claim on its fingerprint alive.
+    
+    The claim is shortened to MEMO_COALESCE_LEASE and renewed from a
+    background thread, so if the leader's worker dies the claim expires
+    within seconds and the attached jobs take over.
+    
+    Args:
+        fingerprint (str): The fingerprint the job leads, or None
+        job_id (str): The leader's job ID
+        
+    Returns:
+        threading.Event: Set it to stop renewing the claim, or None if the
+            job is not coalesced
+    """
+    if not fingerprint:
+        return None
+    stop = threading.Event()
+    
+    def heartbeat():
+        while True:
+            try:
+                if not refresh_single_flight(fingerprint, job_id, Config.MEMO_COALESCE_LEASE):
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew memo fingerprint for job {job_id}: {str(e)}")
+            if stop.wait(Config.MEMO_COALESCE_LEASE / 3):
+                return
+    
+    threading.Thread(target=heartbeat, name=f"memo-flight-{job_id}", daemon=True).start()
+    return stop
+
+def get_queued_job_status(job_id):
+    """
+    Get the RQ status of a queued job.
+    
+    Args:
+        job_id (str): The job ID, which jobs are enqueued under
+        
+    Returns:
+        str: The RQ job status, or None if RQ has no such job
+    """
+    try:
+        return Job.fetch(job_id, connection=redis_conn).get_status()
+    except NoSuchJobError:
+        return None
+
+def check_memo_flight(fingerprint, leader, job_id):
+    """
+    Check on the leader an attached memo job is waiting for.
+    
+    Args:
+        fingerprint (str): The fingerprint both jobs share
+        leader (str): The leader's job ID
+        job_id (str): The attached job's ID
+        
+    Returns:
+        str: "done" once the leader has given the job its outcome, "waiting"
+            while the leader is queued or runs, or "orphaned" if the leader
+            stopped without finishing, e.g. because its worker died
+    """
+    job = get_job(job_id) or {}
+    if job.get("status") in ("completed", "failed"):
+        return "done"
+    # A leader that has finished is about to update its attached jobs
+    leader_job = get_job(leader) or {}
+    if leader_job.get("status") in ("completed", "failed"):
+        return "waiting"
+    status = get_queued_job_status(leader)
+    if status in (JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED):
+        return "orphaned"
+    if get_single_flight_leader(fingerprint) == leader:
+        return "waiting"
+    # A leader still in the queue only renews its claim once it starts
+    if status in (JobStatus.QUEUED, JobStatus.DEFERRED, JobStatus.SCHEDULED):
+        return "waiting"
+    return "orphaned"
+
+def wait_for_memo_flight(fingerprint, leader, job_id):
+    """
+    Wait for the leader of an attached memo job to give it its outcome.
+    
+    Args:
+        fingerprint (str): The fingerprint both jobs share
+        leader (str): The leader's job ID
+        job_id (str): The attached job's ID
+        
+    Returns:
+        bool: True if the job got the leader's outcome, False if the leader
+            stopped without finishing or did not finish within
+            MEMO_COALESCE_TTL, in which case the job should run itself
+    """
+    deadline = time.monotonic() + Config.MEMO_COALESCE_TTL
+    while True:
+        try:
+            state = check_memo_flight(fingerprint, leader, job_id)
+        except Exception as e:
+            logger.warning(f"Failed to check on leader {leader} of job {job_id}: {str(e)}")
+            return False
+        if state != "waiting":
+            return state == "done"
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(MEMO_FLIGHT_POLL_SECONDS)
+
+def _finish_stream(job_id, data):
+    """Finish a job's output stream with a final job update."""
+    writer = JobStreamWriter(job_id)
+    if data.get("status") == "completed":
+        writer.finish(data.get("result"))
+    else:
+        writer.fail(data.get("error"))
+
+def finish_memo_flight(fingerprint, job_id, data, stream=False, orphaned=None):
+    """
+    Release a leader's fingerprint and give its outcome to the attached jobs.
+    
+    Args:
+        fingerprint (str): The fingerprint the leader claimed, or None
+        job_id (str): The leader's job ID
+        data (dict): The leader's final job update, with "status" and either
+            "result" or "error"
+        stream (bool): Whether the attached jobs expect a stream event
+        orphaned (str): Optional leader this job was attached to before it
+            stopped without finishing; its stream, which clients of the
+            attached jobs read, is finished with this outcome too
+    """
+    if stream and orphaned:
+        try:
+            JobStreamWriter(orphaned).reset()
+            _finish_stream(orphaned, data)
+        except Exception as e:
+            logger.warning(f"Failed to finish the stream of orphaned job {orphaned}: {str(e)}")
+    if not fingerprint:
+        return
+    try:
+        subscribers = release_single_flight(fingerprint, job_id)
+    except Exception as e:
+        logger.warning(f"Failed to release memo fingerprint for job {job_id}: {str(e)}")
+        return
+    
+    for subscriber in subscribers:
+        try:
+            update_job(subscriber, dict(data, coalesced_with=job_id))
+            if stream:
+                _finish_stream(subscriber, data)
+        except Exception as e:
+            logger.warning(f"Failed to complete coalesced job {subscriber}: {str(e)}")
+    if subscribers:
+        logger.info(f"Job {job_id} completed {len(subscribers)} coalesced jobs")
 
 def process_pdf_task(file_path, job_id):
     """
@@ -49,15 +286,46 @@ def process_pdf_task(file_path, job_id):
         update_job(job_id, {"status": "failed", "error": str(e)})
         raise
 
-def generate_memo_task(text, job_id, template_key="default"):
+def generate_memo_task(text, job_id, template_key="default", stream=False, use_cache=True, sectioned=None,
+                       latency_target=None, text_ref=None):
     """
     Generate an investment memo in the background.
     
     Args:
-        text (str): The text to generate a memo from
+        text (str): The text to generate a memo from, or None if text_ref is given
         job_id (str): ID of the job to update progress
         template_key (str): The template to use for memo generation (default: "default")
+        stream (bool): Whether to stream tokens into the job's output stream
+        use_cache (bool): Whether a cached memo for the same input may be returned
+        sectioned (bool): Whether to generate template sections in parallel
+            (defaults to MEMO_SECTIONED)
+        latency_target (float): Optional seconds the caller is willing to wait,
+            used to route the memo to a faster model
+        text_ref (str): Optional reference to text a PDF job already prepared,
+            which is used as it is instead of being prepared again
+            
+    Returns:
+        dict: The result, or None if an identical job was already running and
+            failed for this job too
     """
+    fingerprint = memo_fingerprint(text, template_key, stream, use_cache, sectioned, latency_target, text_ref)
+    orphaned = None
+    leader = claim_memo_flight(fingerprint, job_id)
+    while leader != job_id:
+        # Wait for the identical running job, and run this one if it dies
+        logger.info(f"Memo job {job_id} attached to identical running job {leader}")
+        update_job(job_id, {"coalesced_with": leader})
+        if wait_for_memo_flight(fingerprint, leader, job_id):
+            job = get_job(job_id) or {}
+            # Jobs may have attached to this one while it was the leader
+            finish_memo_flight(fingerprint, job_id, job, stream, orphaned)
+            return job.get("result")
+        logger.warning(f"Leader {leader} of memo job {job_id} stopped without finishing, taking over")
+        orphaned = orphaned or leader
+        leader = claim_memo_flight(fingerprint, job_id)
+    
+    lease = hold_memo_flight(fingerprint, job_id)
+    writer = JobStreamWriter(job_id) if stream else None
     try:
         logger.info(f"Starting memo generation task for job {job_id} with template '{template_key}'")
         
@@ -66,9 +334,12 @@ def generate_memo_task(text, job_id, template_key="default"):
         
         # Get the memo service
         memo_service = get_memo_service()
+        text, refined = load_memo_text(text, text_ref)
         
         # Generate the memo with template
-        memo = memo_service.generate_memo(text, template_key=template_key)
+        memo = memo_service.generate_memo(text, refine=refined, template_key=template_key, stream=writer,
+                                          use_cache=use_cache, sectioned=sectioned, job_id=job_id,
+                                          latency_target=latency_target)
         
         # Structure the result as expected by the frontend
         result = {
@@ -78,11 +349,15 @@ def generate_memo_task(text, job_id, template_key="default"):
         }
         
         # Update job with structured result
-        update_job(job_id, {
+        update = {
             "status": "completed",
             "progress": 100,
             "result": result
-        })
+        }
+        update_job(job_id, update)
+        if writer:
+            writer.finish(result)
+        finish_memo_flight(fingerprint, job_id, update, stream, orphaned)
         
         logger.info(f"Memo generation task completed for job {job_id}")
         return result
@@ -90,4 +365,110 @@ def generate_memo_task(text, job_id, template_key="default"):
     except Exception as e:
         logger.error(f"Error in memo generation task for job {job_id}: {str(e)}", exc_info=True)
         update_job(job_id, {"status": "failed", "error": str(e)})
-        raise 
\ No newline at end of file
+        if writer:
+            writer.fail(str(e))
+        finish_memo_flight(fingerprint, job_id, {"status": "failed", "error": str(e)}, stream, orphaned)
+        raise
+    finally:
+        if lease:
+            lease.set()
+
+def generate_memo_batch_task(text, job_id, template_keys, use_cache=True, sectioned=None):
+    """
+    Generate memos for several templates from one text in the background.
+    
+    Each template's result is written to the job as soon as it finishes.
+    
+    Args:
+        text (str): The text to generate memos from
+        job_id (str): ID of the parent job to update progress
+        template_keys (list): The templates to generate memos with
+        use_cache (bool): Whether cached memos for the same input may be returned
+        sectioned (bool): Whether to generate template sections in parallel
+            (defaults to MEMO_SECTIONED)
+    """
+    try:
+        logger.info(f"Starting memo batch task for job {job_id} with templates {template_keys}")
+        
+        results = {key: {"status": "processing", "template_used": key} for key in template_keys}
+        update_job(job_id, {"status": "processing", "progress": 10, "results": results})
+        lock = threading.Lock()
+        
+        def on_result(template_key, result):
+            with lock:
+                results[template_key] = result
+                done = sum(1 for r in results.values() if r["status"] != "processing")
+                update_job(job_id, {
+                    "progress": 10 + int(90 * done / len(template_keys)),
+                    "results": results
+                })
+        
+        memo_service = get_memo_service()
+        results = memo_service.generate_memos(text, template_keys, use_cache=use_cache,
+                                              sectioned=sectioned, on_result=on_result)
+        
+        if not any(r["status"] == "completed" for r in results.values()):
+            raise Exception("; ".join(f"{key}: {r['error']}" for key, r in results.items()))
+        
+        result = {"memos": results, "templates": template_keys}
+        update_job(job_id, {
+            "status": "completed",
+            "progress": 100,
+            "results": results,
+            "result": result
+        })
+        
+        logger.info(f"Memo batch task completed for job {job_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error in memo batch task for job {job_id}: {str(e)}", exc_info=True)
+        update_job(job_id, {"status": "failed", "error": str(e)})
+        raise
+
+def validate_claims_task(text, job_id):
+    """
+    Validate the claims of a memo or selection in the background.
+    
+    The job's "claims" list starts with every claim "pending" and each
+    claim's result replaces its entry as soon as its search completes.
+    
+    Args:
+        text (str): The memo or selection text
+        job_id (str): ID of the job to update progress
+    """
+    try:
+        logger.info(f"Starting validation task for job {job_id}")
+        
+        memo_service = get_memo_service()
+        claims = memo_service.claims_to_validate(text)
+        results = [dict(claim, status="pending", results=[]) for claim in claims]
+        update_job(job_id, {"status": "processing", "progress": 10, "claims": results})
+        lock = threading.Lock()
+        
+        def on_result(index, result):
+            with lock:
+                results[index] = result
+                done = sum(1 for r in results if r["status"] != "pending")
+                update_job(job_id, {
+                    "progress": 10 + int(90 * done / len(results)),
+                    "claims": results
+                })
+        
+        results = memo_service.validate_claims(claims=claims, on_result=on_result)
+        
+        result = {"claims": results, "results": merge_claim_results(results)}
+        update_job(job_id, {
+            "status": "completed",
+            "progress": 100,
+            "claims": results,
+            "result": result
+        })
+        
+        logger.info(f"Validation task completed for job {job_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error in validation task for job {job_id}: {str(e)}", exc_info=True)
+        update_job(job_id, {"status": "failed", "error": str(e)})
+        raise
@@ -0,0 +1,123 @@
+"""Tests for content-addressed prepared text."""
+
+import pytest
+from unittest.mock import Mock, patch
+from flask import Flask
+from ..infrastructure import artifacts
+from ..api.memo_controller import memo_bp
+from ..tasks import generate_memo_task, load_memo_text
+from ..utils.error_handling import ProcessingError
+
+class FakeCache:
+    """Dict-backed stand-in for RedisCache."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.entries[key] = value
+
+    def exists(self, key):
+        return key in self.entries
+
+@pytest.fixture
+def cache():
+    fake = FakeCache()
+    with patch.object(artifacts, "_get_artifact_cache", return_value=fake):
+        yield fake
+
+def test_prepared_text_is_content_addressed(cache):
+    """Test that text is stored under a reference derived from its content."""
+    ref = artifacts.store_prepared_text("Clean deck text")
+
+    assert ref == artifacts.prepared_text_ref("Clean  deck\ntext")
+    assert artifacts.has_prepared_text(ref)
+    assert artifacts.get_prepared_text(ref) == "Clean deck text"
+    assert artifacts.get_prepared_text("missing") is None
+
+def test_load_memo_text(cache):
+    """Test that referenced text is used as prepared and expiry is reported."""
+    ref = artifacts.store_prepared_text("Clean deck")
+
+    assert load_memo_text(None, ref) == ("Clean deck", True)
+    assert load_memo_text("Raw deck", "expired") == ("Raw deck", False)
+    with pytest.raises(ProcessingError):
+        load_memo_text(None, "expired")
+
+def test_redis_failure_falls_back_to_sent_text():
+    """Test that a failed prepared text lookup is treated as a miss."""
+    failing = Mock()
+    failing.get.side_effect = ConnectionError("Redis down")
+
+    with patch.object(artifacts, "_get_artifact_cache", return_value=failing):
+        assert artifacts.get_prepared_text("ref") is None
+        assert load_memo_text("Raw deck", "ref") == ("Raw deck", False)
+
+@patch("backend.tasks.get_memo_service")
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.claim_memo_flight", side_effect=lambda fingerprint, job_id: job_id)
+def test_task_skips_preparing_referenced_text(mock_claim, mock_update_job, mock_get_memo_service, cache):
+    """Test that a memo job generates from the referenced text without preparing it."""
+    ref = artifacts.store_prepared_text("Clean deck")
+    memo_service = mock_get_memo_service.return_value
+    memo_service.generate_memo.return_value = "# Memo"
+
+    generate_memo_task(None, "job123", text_ref=ref)
+
+    args, kwargs = memo_service.generate_memo.call_args
+    assert args == ("Clean deck",)
+    assert kwargs["refine"] is True
+
+@patch("backend.api.memo_controller.memo_queue")
+@patch("backend.api.memo_controller.update_job")
+@patch("backend.api.memo_controller.create_job", return_value="job123")
+@patch("backend.api.memo_controller.claim_memo_flight", side_effect=lambda fingerprint, job_id: job_id)
+def test_api_enqueues_prepared_text_by_reference(mock_claim, mock_create_job, mock_update_job, mock_queue, cache):
+    """Test that text a PDF job prepared is enqueued as a reference."""
+    ref = artifacts.store_prepared_text("Clean deck")
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    response = app.test_client().post("/api/generate-memo", json={"text": "Clean deck"})
+
+    assert response.status_code == 202
+    args = mock_queue.enqueue.call_args.args
+    assert args[1] == "Clean deck"
+    assert args[-1] == ref
+
+@patch("backend.tasks.get_memo_service")
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.claim_memo_flight", side_effect=lambda fingerprint, job_id: job_id)
+@patch("backend.api.memo_controller.memo_queue")
+@patch("backend.api.memo_controller.update_job")
+@patch("backend.api.memo_controller.create_job", return_value="job123")
+@patch("backend.api.memo_controller.claim_memo_flight", side_effect=lambda fingerprint, job_id: job_id)
+def test_text_evicted_before_job_runs(mock_claim, mock_create_job, mock_update_job, mock_queue,
+                                      mock_task_claim, mock_task_update_job, mock_get_memo_service, cache):
+    """Test that a job whose stored text was evicted after enqueueing prepares the text sent with it."""
+    artifacts.store_prepared_text("Clean deck")
+    memo_service = mock_get_memo_service.return_value
+    memo_service.generate_memo.return_value = "# Memo"
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    app.test_client().post("/api/generate-memo", json={"text": "Clean deck"})
+    cache.entries.clear()
+    func, *args = mock_queue.enqueue.call_args.args
+    func(*args)
+
+    args, kwargs = memo_service.generate_memo.call_args
+    assert args == ("Clean deck",)
+    assert kwargs["refine"] is False
+
+def test_api_rejects_unknown_reference(cache):
+    """Test that an unknown reference without text is reported as not found."""
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    response = app.test_client().post("/api/generate-memo", json={"text_ref": "missing"})
+
+    assert "RESOURCE_NOT_FOUND" in response.get_data(as_text=True)
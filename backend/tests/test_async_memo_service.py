@@ -0,0 +1,223 @@
+"""Tests for the asyncio memo service and worker."""
+
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import Mock
+from aiohttp import web
+from ..core.async_memo_service import AsyncMemoService
+from ..infrastructure.async_http_client import create_async_session
+from ..async_worker import AsyncWorker
+
+@pytest.fixture
+def mock_config():
+    """Create a mock configuration."""
+    return Mock(
+        GROQ_API_KEY="test_groq_key",
+        HF_API_KEY="test_hf_key",
+        GOOGLE_API_KEY="test_google_key",
+        GOOGLE_CSE_ID="test_cse_id",
+        GROQ_BASE_URL="https://api.groq.com/openai/v1",
+        OPENROUTER_BASE_URL="https://openrouter.ai/api/v1",
+        GOOGLE_CSE_URL="https://www.googleapis.com/customsearch/v1",
+        MEMO_MAX_TOKENS=16384,
+        MEMO_MIN_OUTPUT_TOKENS=2048,
+        MEMO_CACHE_ENABLED=False,
+        MEMO_SECTIONED=False,
+        MEMO_SECTION_MAX_TOKENS=4096,
+        MEMO_ROUTING_ENABLED=False,
+        MEMO_USAGE_STATS_ENABLED=False,
+        MEMO_REASONING_MAX_TOKENS=0,
+        MEMO_COMPRESSION_ENABLED=False,
+        MEMO_COMPRESSION_TOKENS=8000,
+        MEMO_RETRIEVAL_ENABLED=False,
+        MEMO_RETRIEVAL_TOP_K=4,
+        VALIDATION_CACHE_ENABLED=False,
+        VALIDATION_MAX_CLAIMS=20,
+        VALIDATION_MAX_WORKERS=2,
+        VALIDATION_CLAIM_TIMEOUT=5,
+        BREAKER_ENABLED=False,
+        RATE_LIMIT_ENABLED=False,
+        RATE_LIMIT_MAX_WAIT=60,
+        RATE_LIMIT_COMPLETION_TOKENS=2048,
+        HTTP_POOL_MAXSIZE=20,
+        GROQ_MAX_IN_FLIGHT=2,
+        OPENROUTER_MAX_IN_FLIGHT=2,
+        GOOGLE_CSE_MAX_IN_FLIGHT=2
+    )
+
+class StubProvider:
+    """Local server answering chat completions and custom search requests."""
+
+    def __init__(self, delay=0.0, fail_groq=False, token_delay=0.0, search_delay=0.0):
+        self.delay = delay
+        self.fail_groq = fail_groq
+        self.token_delay = token_delay
+        self.search_delay = search_delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def completions(self, request):
+        body = await request.json()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        if self.fail_groq and request.match_info["provider"] == "groq":
+            return web.json_response({"error": {"message": "overloaded"}}, status=503)
+
+        if body.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for token in ("Streamed ", "memo"):
+                await asyncio.sleep(self.token_delay)
+                chunk = {"choices": [{"delta": {"content": token}}]}
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            return response
+
+        return web.json_response({"choices": [{"message": {"content": f"Memo from {body['model']}"}}]})
+
+    async def search(self, request):
+        await asyncio.sleep(self.search_delay)
+        return web.json_response({"items": [{"title": request.query["q"], "snippet": "s", "link": "l"}]})
+
+async def _serve(stub, service):
+    app = web.Application()
+    app.router.add_post("/{provider}/chat/completions", stub.completions)
+    app.router.add_get("/search", stub.search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    service.groq_url = f"http://127.0.0.1:{port}/groq/chat/completions"
+    service.openrouter_url = f"http://127.0.0.1:{port}/openrouter/chat/completions"
+    service.google_cse_url = f"http://127.0.0.1:{port}/search"
+    return runner
+
+def _run(stub, service, coro_factory):
+    async def main():
+        runner = await _serve(stub, service)
+        try:
+            return await coro_factory()
+        finally:
+            await service.close()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+def test_generate_memo(mock_config):
+    """Test that a memo is generated with the primary provider."""
+    service = AsyncMemoService(mock_config)
+    memo = _run(StubProvider(), service, lambda: service.generate_memo("Deck", refine=True))
+
+    assert memo == f"Memo from {AsyncMemoService.GROQ_MODEL}"
+
+def test_in_flight_limit_per_provider(mock_config):
+    """Test that concurrent memos never exceed the provider's in-flight limit."""
+    stub = StubProvider(delay=0.05)
+    service = AsyncMemoService(mock_config)
+
+    async def many():
+        return await asyncio.gather(*(service.generate_memo(f"Deck {i}", refine=True) for i in range(8)))
+
+    memos = _run(stub, service, many)
+
+    assert len(memos) == 8
+    assert stub.max_in_flight == mock_config.GROQ_MAX_IN_FLIGHT
+
+def test_streaming_fallback_resets(mock_config):
+    """Test that a failed primary resets the stream and the fallback is streamed."""
+    stream = Mock()
+    # With a budget OpenRouter sends reasoning separately, so its answer streams as it arrives
+    mock_config.MEMO_REASONING_MAX_TOKENS = 4096
+    service = AsyncMemoService(mock_config)
+    memo = _run(StubProvider(fail_groq=True), service,
+                lambda: service.generate_memo("Deck", refine=True, stream=stream))
+
+    stream.reset.assert_called_once()
+    assert [c.args[0] for c in stream.token.call_args_list] == ["Streamed ", "memo"]
+    assert memo == "Streamed memo"
+
+def test_slow_stream_outlives_session_timeout(mock_config):
+    """Test that the session timeout limits each read, not the whole streamed response."""
+    stream = Mock()
+    service = AsyncMemoService(mock_config)
+
+    async def generate():
+        service._session = create_async_session(timeout=0.3)
+        return await service.generate_memo("Deck", refine=True, stream=stream)
+
+    memo = _run(StubProvider(token_delay=0.2), service, generate)
+
+    assert memo == "Streamed memo"
+
+def test_validate_memo(mock_config):
+    """Test that validation runs a custom search on the event loop."""
+    service = AsyncMemoService(mock_config)
+    results = _run(StubProvider(), service, lambda: service.validate_memo("memo", query="claim"))
+
+    assert results == [{"title": "claim", "snippet": "s", "link": "l"}]
+
+def test_worker_records_job_outcomes():
+    """Test that the worker runs jobs and records success and failure."""
+    worker = AsyncWorker([], connection=Mock())
+    queue = Mock(DEFAULT_TIMEOUT=180)
+
+    succeeded = Mock(id="ok", func_name="builtins.len", args=(), kwargs={}, timeout=None)
+    succeeded.func = Mock(return_value="done")
+    failed = Mock(id="bad", func_name="builtins.len", args=(), kwargs={}, timeout=None)
+    failed.func = Mock(side_effect=RuntimeError("boom"))
+
+    asyncio.run(worker.perform_job(succeeded, queue))
+    asyncio.run(worker.perform_job(failed, queue))
+
+    succeeded.func.assert_called_once()
+    queue.finished_job_registry.add.assert_called_once()
+    queue.failed_job_registry.add.assert_called_once()
+    assert queue.failed_job_registry.add.call_args[0][0] is failed
+
+def test_worker_fails_job_after_timeout():
+    """Test that a job running longer than its timeout is recorded as failed."""
+    worker = AsyncWorker([], connection=Mock())
+    queue = Mock(DEFAULT_TIMEOUT=180)
+
+    slow = Mock(id="slow", func_name="builtins.len", args=(), kwargs={}, timeout=0.05)
+    slow.func = Mock(side_effect=lambda: time.sleep(0.2))
+
+    asyncio.run(worker.perform_job(slow, queue))
+
+    queue.finished_job_registry.add.assert_not_called()
+    assert queue.failed_job_registry.add.call_args[0][0] is slow
+
+def test_generate_memos(mock_config):
+    """Test that a batch generates one memo per template."""
+    service = AsyncMemoService(mock_config)
+    results = _run(StubProvider(), service,
+                   lambda: service.generate_memos("Deck", ["seed", "growth"], refine=True))
+
+    assert [results[key]["status"] for key in ("seed", "growth")] == ["completed", "completed"]
+
+def test_validate_claims(mock_config):
+    """Test that each claim is searched on the event loop."""
+    service = AsyncMemoService(mock_config)
+    results = _run(StubProvider(), service,
+                   lambda: service.validate_claims("The market is $4 billion. Competitors include Flexport."))
+
+    assert [r["status"] for r in results] == ["found", "found"]
+    assert results[1]["results"] == [{"title": '"Flexport"', "snippet": "s", "link": "l"}]
+
+def test_claim_timeout_excludes_slot_wait(mock_config):
+    """Test that waiting for a search slot does not count against a claim's timeout."""
+    mock_config.GOOGLE_CSE_MAX_IN_FLIGHT = 1
+    mock_config.VALIDATION_CLAIM_TIMEOUT = 0.3
+    service = AsyncMemoService(mock_config)
+    results = _run(StubProvider(search_delay=0.2), service,
+                   lambda: service.validate_claims("The market is $4 billion. Competitors include Flexport."))
+
+    assert [r["status"] for r in results] == ["found", "found"]
@@ -0,0 +1,69 @@
+"""Tests for the Redis-backed result cache."""
+
+import json
+from unittest.mock import Mock, patch
+from ..infrastructure.cache import RedisCache, make_cache_key
+
+def _cache(max_entries=2):
+    with patch("redis.from_url") as mock_from_url:
+        cache = RedisCache(Mock(REDIS_HOST="localhost", REDIS_PORT=6379, REDIS_DB=0),
+                           "test", ttl=60, max_entries=max_entries)
+    return cache, mock_from_url.return_value
+
+def test_make_cache_key_is_stable():
+    """Test that keys depend on every part and their boundaries."""
+    assert make_cache_key("text", "seed") == make_cache_key("text", "seed")
+    assert make_cache_key("text", "seed") != make_cache_key("text", "growth")
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+
+def test_get_hit_touches_lru():
+    """Test that a hit returns the value and refreshes its recency."""
+    cache, client = _cache()
+    client.get.return_value = json.dumps({"memo": "text"})
+    
+    assert cache.get("key") == {"memo": "text"}
+    client.get.assert_called_once_with("cache:test:key")
+    assert client.zadd.call_args.args[0] == "cache:test:lru"
+
+def test_get_miss():
+    """Test that a miss returns None without touching the LRU index."""
+    cache, client = _cache()
+    client.get.return_value = None
+    
+    assert cache.get("key") is None
+    client.zadd.assert_not_called()
+
+def test_set_honors_explicit_ttl():
+    """Test that an explicit TTL is used as given and 0 stores nothing."""
+    cache, client = _cache()
+    client.pipeline.return_value.execute.return_value = [True, 1, 1, 0, [], 1]
+    
+    cache.set("short", "value", ttl=5)
+    cache.set("never", "value", ttl=0)
+    
+    client.pipeline.return_value.setex.assert_called_once_with("cache:test:short", 5, json.dumps("value"))
+
+def test_set_evicts_least_recently_used():
+    """Test that entries beyond max_entries are evicted oldest first."""
+    cache, client = _cache(max_entries=2)
+    client.pipeline.return_value.execute.return_value = [True, 1, 1, 0, [], 3]
+    client.zpopmin.return_value = [(b"old", 1.0)]
+    
+    cache.set("new", "value")
+    
+    client.pipeline.return_value.setex.assert_called_once_with("cache:test:new", 60, json.dumps("value"))
+    client.zpopmin.assert_called_once_with("cache:test:lru", 1)
+    client.delete.assert_called_once_with("cache:test:old")
+
+def test_set_forgets_expired_entries_before_evicting():
+    """Test that entries that expired on their own do not cause live entries to be evicted."""
+    cache, client = _cache(max_entries=2)
+    pipe = client.pipeline.return_value
+    pipe.execute.side_effect = [[True, 1, 1, 0, [b"negative"], 3], [1, 1]]
+    
+    cache.set("new", "value")
+    
+    pipe.zrangebyscore.assert_called_once()
+    pipe.zrem.assert_any_call("cache:test:lru", b"negative")
+    pipe.zrem.assert_any_call("cache:test:expiry", b"negative")
+    client.zpopmin.assert_not_called()
@@ -0,0 +1,134 @@
+"""Tests for the Redis-backed provider circuit breaker."""
+
+import time
+import contextvars
+from unittest.mock import patch
+from ..infrastructure.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by the breaker."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def pipeline(self):
+        return self
+    
+    def execute(self):
+        return []
+    
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+    
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+    
+    def lpush(self, key, value):
+        self.data.setdefault(key, []).insert(0, value)
+    
+    def ltrim(self, key, start, end):
+        self.data[key] = self.data.get(key, [])[start:end + 1]
+    
+    def lrange(self, key, start, end):
+        return list(self.data.get(key, []))
+    
+    def expire(self, key, seconds):
+        pass
+    
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+    
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+    
+    def register_script(self, script):
+        # The only script is the probe release: compare and delete
+        def release(keys, args):
+            if self.data.get(keys[0]) == args[0]:
+                del self.data[keys[0]]
+                return 1
+            return 0
+        return release
+
+def _breaker(**kwargs):
+    options = dict(error_rate_threshold=0.5, min_calls=4, open_seconds=30, slow_call_seconds=10)
+    options.update(kwargs)
+    return CircuitBreaker(FakeRedis(), "groq", **options)
+
+def test_breaker_opens_on_error_rate():
+    """Test that the breaker opens once enough recent calls fail."""
+    breaker = _breaker()
+    breaker.record_success(1.0)
+    breaker.record_failure(1.0)
+    breaker.record_failure(1.0)
+    assert breaker.allow_request()
+    
+    breaker.record_failure(1.0)
+    assert breaker.status()["state"] == OPEN
+    assert not breaker.allow_request()
+    assert breaker.status()["health"] == 0.0
+
+def test_slow_calls_count_as_errors():
+    """Test that calls slower than the slow-call limit count as errors."""
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_success(30.0)
+    
+    assert breaker.status()["state"] == OPEN
+
+def test_half_open_probe_closes_breaker():
+    """Test that a single probe is allowed after the open period and closes on success."""
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(1.0)
+    
+    with patch("time.time", return_value=time.time() + 31):
+        assert breaker.allow_request()
+        # Other workers are still blocked while the probe is in flight
+        assert not breaker.allow_request()
+        assert breaker.status()["state"] == HALF_OPEN
+        
+        breaker.record_success(1.0)
+    
+    assert breaker.status()["state"] == CLOSED
+    assert breaker.allow_request()
+
+def test_only_probe_holder_closes_breaker():
+    """Test that a call that is not the probe cannot close a half-open breaker."""
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(1.0)
+    
+    with patch("time.time", return_value=time.time() + 31):
+        probe = contextvars.Context().run(breaker.allow_request)
+        assert probe
+        
+        # A call from another job finishes first
+        contextvars.Context().run(breaker.record_success, 1.0)
+        assert breaker.status()["state"] == HALF_OPEN
+        
+        contextvars.Context().run(breaker.record_success, 1.0, probe)
+    
+    assert breaker.status()["state"] == CLOSED
+
+def test_failed_probe_reopens_breaker():
+    """Test that a failed probe opens the breaker for another period."""
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(1.0)
+    
+    with patch("time.time", return_value=time.time() + 31):
+        assert breaker.allow_request()
+        breaker.record_failure(1.0)
+        assert breaker.status()["state"] == OPEN
+        assert not breaker.allow_request()
+
+def test_breaker_allows_requests_when_redis_fails():
+    """Test that Redis errors never block provider calls."""
+    breaker = _breaker()
+    with patch.object(breaker.redis_client, "hgetall", side_effect=ConnectionError("down")):
+        assert breaker.allow_request()
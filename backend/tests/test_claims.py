@@ -0,0 +1,40 @@
+"""Tests for claim extraction."""
+
+from ..utils.claims import extract_claims, normalize_query
+
+MEMO = """## Market Opportunity
+The global logistics software market is $12.5 billion, growing at 14% CAGR.
+- **Revenue** reached $2.4M ARR in 2024; net retention is 130%.
+Competitors include Flexport, Project44 and FourKites.
+The team is experienced.
+The global logistics software market is $12.5 billion, growing at 14% CAGR.
+"""
+
+def test_extracts_typed_claims():
+    """Test that market sizes, figures and competitors become separate claims."""
+    claims = extract_claims(MEMO)
+
+    assert [(c["type"], c["claim"]) for c in claims] == [
+        ("market_size", "The global logistics software market is $12.5 billion, growing at 14% CAGR."),
+        ("figure", "Revenue reached $2.4M ARR in 2024"),
+        ("figure", "net retention is 130%."),
+        ("competitor", "Flexport"),
+        ("competitor", "Project44"),
+        ("competitor", "FourKites")
+    ]
+    assert claims[3]["query"] == '"Flexport"'
+
+def test_claims_are_deduplicated_and_bounded():
+    """Test that repeated claims are validated once and the count is capped."""
+    claims = extract_claims(MEMO + "\nThe global  logistics software market is $12.5 billion, growing at 14% CAGR")
+
+    assert sum(c["type"] == "market_size" for c in claims) == 1
+    assert len(extract_claims(MEMO, max_claims=2)) == 2
+
+def test_text_without_claims():
+    """Test that text with no figures or competitors yields no claims."""
+    assert extract_claims("The team is experienced and the product is loved.") == []
+
+def test_normalize_query():
+    """Test that case, whitespace and surrounding punctuation are ignored."""
+    assert normalize_query('  Market is  $4B. ') == normalize_query("market is $4b")
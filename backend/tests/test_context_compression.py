@@ -0,0 +1,62 @@
+"""Tests for extractive context compression."""
+
+from ..utils.context_compression import compress_text, split_sentences, score_sentences
+from ..utils.token_budget import estimate_tokens
+
+SECTIONS = ("Market Opportunity", "Team and Vision", "Financial Highlights")
+
+def _deck():
+    filler = [f"Our platform feature number {i} makes dashboards easier to configure for every user."
+              for i in range(200)]
+    facts = [
+        "The total addressable market is $40 billion and growing at a 12% CAGR.",
+        "Our founders previously built the supply chain team at a public retailer.",
+        "Revenue reached $2.1M ARR with 68% gross margin and 18 months of runway."
+    ]
+    return "\n".join(filler[:100] + facts[:1] + filler[100:150] + facts[1:] + filler[150:])
+
+def test_split_sentences():
+    """Test that lines and sentence ends both split units."""
+    text = "Revenue grew 3x. Churn fell to 2%.\n\n- Team of 12\n"
+    assert split_sentences(text) == ["Revenue grew 3x.", "Churn fell to 2%.", "- Team of 12"]
+
+def test_short_text_is_unchanged():
+    """Test that text within the budget is returned as is."""
+    result = compress_text("A short deck.", 1000, SECTIONS)
+    assert result["text"] == "A short deck."
+    assert result["ratio"] == 1.0
+    assert result["tokens_saved"] == 0
+
+def test_compression_respects_budget_and_order():
+    """Test that the result fits the budget and keeps sentences in order."""
+    text = _deck()
+    result = compress_text(text, 600, SECTIONS)
+
+    assert estimate_tokens(result["text"]) <= 600
+    assert result["tokens_saved"] == result["original_tokens"] - result["compressed_tokens"] > 0
+    assert 0 < result["ratio"] < 1
+    kept = result["text"].split("\n")
+    positions = [text.index(sentence) for sentence in kept]
+    assert positions == sorted(positions)
+
+def test_compression_covers_sections():
+    """Test that the sentences covering each section's topics are kept."""
+    result = compress_text(_deck(), 600, SECTIONS)
+
+    assert "addressable market" in result["text"]
+    assert "founders previously built" in result["text"]
+    assert "ARR with 68% gross margin" in result["text"]
+
+def test_duplicate_sentences_kept_once():
+    """Test that repeated sentences do not use the budget twice."""
+    text = "\n".join(["Revenue grew to $5M ARR this year."] * 50 + ["Short filler line here."] * 50)
+    result = compress_text(text, 100, SECTIONS)
+    assert result["text"].count("Revenue grew") == 1
+
+def test_score_sentences_rewards_rare_terms():
+    """Test that salience favours distinctive sentences over boilerplate."""
+    sentences = ["the product is great"] * 5 + ["Gross margin reached 72% on enterprise contracts"]
+    salience, coverage = score_sentences(sentences, ["Financial Highlights"])
+    assert salience[-1] == max(salience)
+    assert coverage["Financial Highlights"][-1] > 0
+    assert coverage["Financial Highlights"][0] == 0
@@ -0,0 +1,30 @@
+"""Tests for the shared provider HTTP client."""
+
+from unittest.mock import Mock, patch
+from ..infrastructure import http_client
+from ..infrastructure.http_client import create_http_session, get_http_session
+
+def _config(connections=4, maxsize=8):
+    return Mock(HTTP_POOL_CONNECTIONS=connections, HTTP_POOL_MAXSIZE=maxsize)
+
+def test_create_http_session_pool_sizes():
+    """Test that the session mounts a pooled adapter for both schemes."""
+    session = create_http_session(pool_connections=3, pool_maxsize=7)
+    adapter = session.get_adapter("https://api.groq.com")
+    
+    assert adapter is session.get_adapter("http://localhost")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+
+def test_get_http_session_is_shared():
+    """Test that the same session is returned within a process."""
+    with patch.object(http_client, "_session", None):
+        first = get_http_session(_config())
+        assert get_http_session(_config()) is first
+
+def test_get_http_session_recreated_after_fork():
+    """Test that a forked process gets its own session."""
+    with patch.object(http_client, "_session", None):
+        first = get_http_session(_config())
+        with patch("os.getpid", return_value=-1):
+            assert get_http_session(_config()) is not first
@@ -0,0 +1,64 @@
+"""Tests for streaming job output."""
+
+import json
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+from ..infrastructure.job_manager import JobManager, JobStreamWriter, AsyncJobStreamWriter
+
+def test_writer_batches_tokens():
+    """Test that tokens are buffered until the flush interval passes."""
+    manager = Mock()
+    writer = JobStreamWriter("job123", flush_interval=60, manager=manager)
+    
+    writer.token("Hello")
+    writer.token(", world")
+    manager.append_job_stream.assert_not_called()
+    
+    writer.finish({"memo": "Hello, world"})
+    assert manager.append_job_stream.call_args_list[0].args == ("job123", {"type": "token", "text": "Hello, world"})
+    assert manager.append_job_stream.call_args_list[1].args == ("job123", {"type": "done", "result": {"memo": "Hello, world"}})
+
+def test_writer_reset_discards_buffer():
+    """Test that a reset drops unflushed tokens and emits a reset event."""
+    manager = Mock()
+    writer = JobStreamWriter("job123", flush_interval=60, manager=manager)
+    
+    writer.token("partial")
+    writer.reset()
+    writer.flush()
+    
+    manager.append_job_stream.assert_called_once_with("job123", {"type": "reset"})
+
+def test_async_writer_writes_in_order_off_the_loop():
+    """Test that the async writer appends from another thread, in order."""
+    manager = Mock()
+    threads = []
+    manager.append_job_stream.side_effect = lambda job_id, event: threads.append(threading.get_ident())
+    
+    async def stream():
+        writer = AsyncJobStreamWriter("job123", flush_interval=0, manager=manager)
+        writer.token("Hello")
+        writer.token(", world")
+        writer.finish({"memo": "Hello, world"})
+        await writer.drain()
+        return threading.get_ident()
+    
+    loop_thread = asyncio.run(stream())
+    
+    assert [c.args[1]["type"] for c in manager.append_job_stream.call_args_list] == ["token", "token", "done"]
+    assert loop_thread not in threads
+
+def test_read_job_stream_decodes_entries():
+    """Test that stream entries are decoded into (id, event) tuples."""
+    with patch("redis.from_url") as mock_from_url:
+        client = mock_from_url.return_value
+        client.xread.return_value = [
+            (b"job_stream:job123", [(b"1-0", {b"event": json.dumps({"type": "token", "text": "Hi"}).encode()})])
+        ]
+        manager = JobManager(Mock(REDIS_HOST="localhost", REDIS_PORT=6379, REDIS_DB=0))
+        
+        events = manager.read_job_stream("job123", last_id="0", block_ms=10)
+    
+    client.xread.assert_called_once_with({"job_stream:job123": "0"}, count=100, block=10)
+    assert events == [("1-0", {"type": "token", "text": "Hi"})]
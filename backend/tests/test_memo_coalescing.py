@@ -0,0 +1,157 @@
+"""Tests for coalescing identical memo requests into one job."""
+
+import threading
+from unittest.mock import Mock, patch
+from flask import Flask
+from rq.job import JobStatus
+from ..infrastructure.job_manager import JobManager
+from ..api.memo_controller import memo_bp
+from ..tasks import generate_memo_task, memo_fingerprint, check_memo_flight, hold_memo_flight
+
+def test_claim_and_release_decode_job_ids():
+    """Test that the single-flight scripts' replies are decoded."""
+    with patch("redis.from_url") as mock_from_url:
+        claim, release = Mock(return_value=b"leader"), Mock(return_value=[b"a", b"b"])
+        refresh = Mock(return_value=0)
+        mock_from_url.return_value.register_script.side_effect = [claim, release, refresh]
+        manager = JobManager(Mock(REDIS_HOST="localhost", REDIS_PORT=6379, REDIS_DB=0))
+
+        assert manager.claim_single_flight("fp", "job123", expiration=60) == "leader"
+        assert manager.release_single_flight("fp", "leader") == ["a", "b"]
+        assert manager.refresh_single_flight("fp", "job123", 30) is False
+
+    claim.assert_called_once_with(keys=["inflight:fp"], args=["job123", 60])
+    release.assert_called_once_with(keys=["inflight:fp"], args=["leader"])
+    refresh.assert_called_once_with(keys=["inflight:fp"], args=["job123", 30])
+
+def test_fingerprint_ignores_whitespace():
+    """Test that requests differing only in whitespace share a fingerprint."""
+    assert memo_fingerprint("Deck  text\n") == memo_fingerprint("Deck text")
+    assert memo_fingerprint("Deck text") != memo_fingerprint("Deck text", template_key="seed")
+
+def test_fresh_requests_are_not_coalesced():
+    """Test that requests bypassing the cache never share a job."""
+    assert memo_fingerprint("Deck text", use_cache=False) is None
+
+@patch("backend.tasks.get_memo_service")
+@patch("backend.tasks.get_job", return_value={"status": "completed", "result": {"memo": "# Memo"}})
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.release_single_flight", return_value=[])
+@patch("backend.tasks.claim_single_flight", return_value="leader")
+def test_attached_task_does_not_generate(mock_claim, mock_release, mock_update_job, mock_get_job,
+                                         mock_get_memo_service):
+    """Test that a task for an in-flight request takes its leader's result."""
+    assert generate_memo_task("Deck", "job123") == {"memo": "# Memo"}
+
+    mock_get_memo_service.assert_not_called()
+    mock_update_job.assert_called_once_with("job123", {"coalesced_with": "leader"})
+    # Jobs that attached to this one while it led get the result too
+    mock_release.assert_called_once_with(mock_claim.call_args[0][0], "job123")
+
+@patch("backend.tasks.get_job", return_value={"status": "processing"})
+@patch("backend.tasks.get_single_flight_leader", return_value="leader")
+@patch("backend.tasks.get_queued_job_status", return_value=JobStatus.FAILED)
+def test_failed_leader_is_orphaned_before_its_claim_expires(mock_status, mock_get_leader, mock_get_job):
+    """Test that an attached job notices a failed leader that still holds its claim."""
+    assert check_memo_flight("fp", "leader", "job123") == "orphaned"
+
+@patch("backend.tasks.get_job", return_value={"status": "processing"})
+@patch("backend.tasks.get_single_flight_leader", return_value=None)
+@patch("backend.tasks.get_queued_job_status", return_value=JobStatus.QUEUED)
+def test_queued_leader_is_waited_for(mock_status, mock_get_leader, mock_get_job):
+    """Test that a leader whose claim expired while it was queued is not taken over."""
+    assert check_memo_flight("fp", "leader", "job123") == "waiting"
+
+    mock_status.return_value = JobStatus.STARTED
+    assert check_memo_flight("fp", "leader", "job123") == "orphaned"
+
+def test_running_leader_renews_its_claim():
+    """Test that a running leader keeps a short claim alive until it is stopped."""
+    renewed = threading.Event()
+
+    def refresh(fingerprint, job_id, expiration):
+        renewed.set()
+        return True
+
+    with patch("backend.tasks.refresh_single_flight", side_effect=refresh) as mock_refresh:
+        stop = hold_memo_flight("fp", "job123")
+        assert renewed.wait(5)
+        stop.set()
+
+    mock_refresh.assert_called_with("fp", "job123", 30)
+    assert hold_memo_flight(None, "job123") is None
+
+@patch("backend.tasks.get_memo_service")
+@patch("backend.tasks.get_queued_job_status", return_value=None)
+@patch("backend.tasks.get_single_flight_leader", return_value=None)
+@patch("backend.tasks.get_job", return_value={"status": "processing"})
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.release_single_flight", return_value=[])
+@patch("backend.tasks.claim_single_flight", side_effect=["leader", "job123"])
+def test_attached_task_takes_over_from_dead_leader(mock_claim, mock_release, mock_update_job, mock_get_job,
+                                                   mock_get_leader, mock_get_status, mock_get_memo_service):
+    """Test that an attached task generates the memo itself once its leader's claim is gone."""
+    mock_get_memo_service.return_value.generate_memo.return_value = "# Memo"
+
+    result = generate_memo_task("Deck", "job123")
+
+    assert result["memo"] == "# Memo"
+    assert mock_claim.call_count == 2
+    mock_get_memo_service.return_value.generate_memo.assert_called_once()
+
+@patch("backend.tasks.get_memo_service")
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.release_single_flight", return_value=["follower"])
+@patch("backend.tasks.claim_single_flight", return_value="job123")
+def test_leader_completes_attached_jobs(mock_claim, mock_release, mock_update_job, mock_get_memo_service):
+    """Test that a leader's result is given to the jobs attached to it."""
+    mock_get_memo_service.return_value.generate_memo.return_value = "# Memo"
+
+    result = generate_memo_task("Deck", "job123")
+
+    mock_release.assert_called_once_with(mock_claim.call_args[0][0], "job123")
+    mock_update_job.assert_called_with("follower", {
+        "status": "completed",
+        "progress": 100,
+        "result": result,
+        "coalesced_with": "job123"
+    })
+
+@patch("backend.tasks.get_memo_service")
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.release_single_flight", return_value=["follower"])
+@patch("backend.tasks.claim_single_flight", return_value="job123")
+def test_leader_failure_fails_attached_jobs(mock_claim, mock_release, mock_update_job, mock_get_memo_service):
+    """Test that a failed leader fails the jobs attached to it."""
+    mock_get_memo_service.return_value.generate_memo.side_effect = RuntimeError("providers down")
+
+    try:
+        generate_memo_task("Deck", "job123")
+    except RuntimeError:
+        pass
+
+    mock_update_job.assert_called_with("follower", {
+        "status": "failed",
+        "error": "providers down",
+        "coalesced_with": "job123"
+    })
+
+@patch("backend.api.memo_controller.memo_queue")
+@patch("backend.api.memo_controller.update_job")
+@patch("backend.api.memo_controller.create_job", return_value="job456")
+@patch("backend.tasks.claim_single_flight", return_value="job123")
+def test_api_attaches_identical_request(mock_claim, mock_create_job, mock_update_job, mock_queue):
+    """Test that the API attaches a request that is already in flight to its leader."""
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    response = app.test_client().post("/api/generate-memo", json={"text": "Deck", "stream": True})
+    data = response.get_json()
+
+    assert response.status_code == 202
+    assert data["job_id"] == "job456"
+    assert data["coalesced_with"] == "job123"
+    assert data["stream_url"] == "/api/generate-memo/stream?job_id=job123"
+    # The attached job is still queued so it can take over if the leader dies
+    assert mock_queue.enqueue.call_args.args[2] == "job456"
+    assert mock_queue.enqueue.call_args.kwargs["job_id"] == "job456"
@@ -1,10 +1,16 @@
 """Tests for memo generation service."""
 
+import json
+import threading
+import time
 import pytest
+import requests
 from unittest.mock import Mock, patch
-from ..core.memo_service import MemoService
+from ..core.memo_service import MemoService, HedgeCancelled, _HedgeCollector
 from ..utils.error_handling import ProcessingError
 from ..utils.memo_templates import TEMPLATES
+from ..prompts import build_memo_prompt, get_compiled_template
+from ..utils.context_compression import compress_text
 
 @pytest.fixture
 def mock_config():
@@ -13,7 +19,35 @@ def mock_config():
         GROQ_API_KEY="test_groq_key",
         HF_API_KEY="test_hf_key",
         GOOGLE_API_KEY="test_google_key",
-        GOOGLE_CSE_ID="test_cse_id"
+        GOOGLE_CSE_ID="test_cse_id",
+        GROQ_BASE_URL="https://api.groq.com/openai/v1",
+        OPENROUTER_BASE_URL="https://openrouter.ai/api/v1",
+        GOOGLE_CSE_URL="https://www.googleapis.com/customsearch/v1",
+        MEMO_MAX_TOKENS=16384,
+        MEMO_MIN_OUTPUT_TOKENS=2048,
+        MEMO_CACHE_ENABLED=False,
+        MEMO_HEDGING_ENABLED=False,
+        MEMO_HEDGE_DELAY=15,
+        MEMO_HEDGE_MIN_SAMPLES=20,
+        MEMO_SECTIONED=False,
+        MEMO_SECTION_MAX_WORKERS=8,
+        MEMO_SECTION_MAX_TOKENS=4096,
+        MEMO_ROUTING_ENABLED=False,
+        MEMO_BATCH_MAX_WORKERS=4,
+        MEMO_USAGE_STATS_ENABLED=False,
+        MEMO_REASONING_MAX_TOKENS=0,
+        MEMO_COMPRESSION_ENABLED=False,
+        MEMO_COMPRESSION_TOKENS=8000,
+        MEMO_RETRIEVAL_ENABLED=False,
+        MEMO_RETRIEVAL_TOP_K=4,
+        VALIDATION_CACHE_ENABLED=False,
+        VALIDATION_MAX_CLAIMS=20,
+        VALIDATION_MAX_WORKERS=2,
+        VALIDATION_CLAIM_TIMEOUT=5,
+        BREAKER_ENABLED=False,
+        RATE_LIMIT_ENABLED=False,
+        RATE_LIMIT_MAX_WAIT=60,
+        RATE_LIMIT_COMPLETION_TOKENS=2048
     )
 
 @pytest.fixture
@@ -23,7 +57,7 @@ def memo_service(mock_config):
 
 def test_generate_memo_with_default_template(memo_service):
     """Test memo generation with default template."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         # Mock successful API response
         mock_post.return_value.ok = True
         mock_post.return_value.json.return_value = {
@@ -45,7 +79,7 @@ def test_generate_memo_with_default_template(memo_service):
 
 def test_generate_memo_with_custom_template(memo_service):
     """Test memo generation with a custom template."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.ok = True
         mock_post.return_value.json.return_value = {
             "choices": [{"message": {"content": "Test memo content"}}]
@@ -65,7 +99,7 @@ def test_generate_memo_with_custom_template(memo_service):
 
 def test_generate_memo_with_invalid_template(memo_service):
     """Test memo generation with invalid template falls back to default."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.ok = True
         mock_post.return_value.json.return_value = {
             "choices": [{"message": {"content": "Test memo content"}}]
@@ -85,7 +119,7 @@ def test_generate_memo_with_invalid_template(memo_service):
 
 def test_generate_memo_api_error(memo_service):
     """Test error handling when API call fails."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.ok = False
         mock_post.return_value.status_code = 500
         mock_post.return_value.text = "API Error"
@@ -95,7 +129,7 @@ def test_generate_memo_api_error(memo_service):
 
 def test_template_instructions_in_prompt(memo_service):
     """Test that template instructions are included in the prompt."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.ok = True
         mock_post.return_value.json.return_value = {
             "choices": [{"message": {"content": "Test memo content"}}]
@@ -108,3 +142,579 @@ def test_template_instructions_in_prompt(memo_service):
         call_args = mock_post.call_args[1]["json"]
         content = call_args["messages"][1]["content"]
         assert TEMPLATES[template_key]["instructions"] in content
+
+def test_max_tokens_sized_to_context(memo_service):
+    """Test that large decks get a smaller completion budget and are truncated to fit."""
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            "choices": [{"message": {"content": "Test memo content"}}]
+        }
+        
+        memo_service.generate_memo("Revenue grew quickly.\n" * 30000, refine=True)
+        
+        call_args = mock_post.call_args[1]["json"]
+        assert 2048 <= call_args["max_tokens"] < 16384
+        assert len(call_args["messages"][1]["content"]) < len("Revenue grew quickly.\n" * 30000)
+
+def _sse_lines(*tokens):
+    """Build server-sent event lines for a streamed chat completion."""
+    lines = [": OPENROUTER PROCESSING", ""]
+    for token in tokens:
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": token}}]}))
+        lines.append("")
+    lines.append("data: [DONE]")
+    return lines
+
+def test_generate_memo_streaming(memo_service):
+    """Test that streamed tokens are forwarded and assembled into the memo."""
+    stream = Mock()
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.ok = True
+        mock_post.return_value.iter_lines.return_value = _sse_lines("# Memo", "\n\nStrong ", "team.")
+        
+        result = memo_service.generate_memo("Test input", refine=True, stream=stream)
+        
+        assert mock_post.call_args[1]["json"]["stream"] is True
+        assert mock_post.call_args[1]["stream"] is True
+        assert [c.args[0] for c in stream.token.call_args_list] == ["# Memo", "\n\nStrong ", "team."]
+        assert result == "# Memo\n\nStrong team."
+
+def test_generate_memo_streaming_fallback_resets(memo_service):
+    """Test that a failed primary provider resets the stream before falling back."""
+    stream = Mock()
+    failed = Mock(ok=False, status_code=503, text="")
+    succeeded = Mock(ok=True)
+    succeeded.iter_lines.return_value = _sse_lines("Fallback memo")
+    
+    with patch('requests.Session.post', side_effect=[failed, succeeded]):
+        result = memo_service.generate_memo("Test input", refine=True, stream=stream)
+    
+    stream.reset.assert_called_once()
+    assert result == "Fallback memo"
+
+def test_generate_memo_cache_hit(memo_service):
+    """Test that a cached memo is returned without calling a provider."""
+    memo_service.config.MEMO_CACHE_ENABLED = True
+    cache = Mock()
+    cache.get.return_value = "Cached memo"
+    memo_service._memo_cache = cache
+    
+    with patch('requests.Session.post') as mock_post:
+        result = memo_service.generate_memo("Test  input", refine=True)
+    
+    mock_post.assert_not_called()
+    assert result == "Cached memo"
+    # Whitespace differences map to the same key
+    assert cache.get.call_args_list[0] == ((memo_service._memo_cache_key("Test input", "default", MemoService.GROQ_MODEL),),)
+
+def test_generate_memo_cache_bypass(memo_service):
+    """Test that use_cache=False skips the lookup but refreshes the entry."""
+    memo_service.config.MEMO_CACHE_ENABLED = True
+    cache = Mock()
+    cache.get.return_value = "Cached memo"
+    memo_service._memo_cache = cache
+    
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            "choices": [{"message": {"content": "Fresh memo"}}]
+        }
+        result = memo_service.generate_memo("Test input", refine=True, use_cache=False)
+    
+    cache.get.assert_not_called()
+    cache.set.assert_called_once_with(
+        memo_service._memo_cache_key("Test input", "default", MemoService.GROQ_MODEL), "Fresh memo"
+    )
+    assert result == "Fresh memo"
+
+def test_hedged_request_secondary_wins(memo_service):
+    """Test that a slow primary is hedged and the faster secondary wins."""
+    memo_service.config.MEMO_HEDGING_ENABLED = True
+    memo_service.config.MEMO_HEDGE_DELAY = 0.05
+    release = threading.Event()
+    
+    def slow_groq(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        release.wait(5)
+        stream.token("late")
+        return "Groq memo"
+    
+    def fast_openrouter(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        return "OpenRouter memo"
+    
+    with patch.object(memo_service, "_call_groq_api", side_effect=slow_groq), \
+            patch.object(memo_service, "_call_openrouter_api", side_effect=fast_openrouter):
+        result = memo_service.generate_memo("Test input", refine=True)
+        release.set()
+    
+    assert result == "OpenRouter memo"
+
+def test_hedged_request_fast_primary_not_hedged(memo_service):
+    """Test that the secondary is not called when the primary answers in time."""
+    memo_service.config.MEMO_HEDGING_ENABLED = True
+    
+    with patch.object(memo_service, "_call_groq_api", return_value="Groq memo"), \
+            patch.object(memo_service, "_call_openrouter_api") as mock_openrouter:
+        result = memo_service.generate_memo("Test input", refine=True)
+    
+    mock_openrouter.assert_not_called()
+    assert result == "Groq memo"
+
+def test_hedged_failure_falls_back_to_remaining_providers(memo_service):
+    """Test that providers after the hedged pair are tried when both hedged calls fail."""
+    memo_service.config.MEMO_HEDGING_ENABLED = True
+    route = {"name": "test", "max_tokens": 1024, "providers": [
+        ["Groq", "fast-model"], ["OpenRouter", "second-model"], ["OpenRouter", "third-model"]
+    ]}
+    
+    def call(provider, input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        if model != "third-model":
+            raise RuntimeError(f"{model} is down")
+        return "Third memo"
+    
+    with patch.object(memo_service, "_call_provider", side_effect=call) as mock_call:
+        result = memo_service._generate_with_fallback("Test input", "default", use_cache=False, route=route)
+    
+    assert result == "Third memo"
+    assert sorted(c.kwargs["model"] for c in mock_call.call_args_list) == ["fast-model", "second-model", "third-model"]
+
+def test_hedge_collector_cancels_loser():
+    """Test that a cancelled hedged attempt aborts on its next token."""
+    cancelled = threading.Event()
+    collector = _HedgeCollector(cancelled)
+    collector.token("fine")
+    
+    cancelled.set()
+    with pytest.raises(HedgeCancelled):
+        collector.token("aborted")
+
+def test_open_breaker_skips_primary(memo_service):
+    """Test that an open Groq breaker skips straight to OpenRouter."""
+    with patch.object(memo_service, "_provider_available", side_effect=lambda p: p != "Groq"), \
+            patch.object(memo_service, "_call_groq_api") as mock_groq, \
+            patch.object(memo_service, "_call_openrouter_api", return_value="OpenRouter memo"):
+        result = memo_service.generate_memo("Test input", refine=True)
+    
+    mock_groq.assert_not_called()
+    assert result == "OpenRouter memo"
+
+def test_breaker_records_outcomes(memo_service):
+    """Test that provider calls report success and failure to the breaker."""
+    breaker = Mock()
+    failed = Mock(ok=False, status_code=503, text="")
+    succeeded = Mock(ok=True)
+    succeeded.json.return_value = {"choices": [{"message": {"content": "Memo"}}]}
+    
+    with patch.object(memo_service, "_get_breaker", return_value=breaker), \
+            patch('requests.Session.post', side_effect=[failed, succeeded]):
+        memo_service.generate_memo("Test input", refine=True)
+    
+    breaker.record_failure.assert_called_once()
+    breaker.record_success.assert_called_once()
+
+def test_sectioned_generation_stitches_in_template_order(memo_service):
+    """Test that sections generated concurrently are stitched in template order."""
+    sections = TEMPLATES["seed"]["sections_order"]
+    
+    def fake_groq(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        # Finish later sections first to exercise reordering
+        time.sleep(0.01 * (len(sections) - sections.index(section)))
+        return f"## {section}\n\nBody of {section}"
+    
+    stream = Mock()
+    with patch.object(memo_service, "_call_groq_api", side_effect=fake_groq) as mock_groq:
+        result = memo_service.generate_memo("Test input", refine=True, template_key="seed",
+                                            stream=stream, sectioned=True)
+    
+    assert mock_groq.call_count == len(sections)
+    positions = [result.index(f"## {section}") for section in sections]
+    assert positions == sorted(positions)
+    streamed = "".join(call.args[0] for call in stream.token.call_args_list)
+    assert [streamed.index(f"## {section}") for section in sections] == sorted(
+        streamed.index(f"## {section}") for section in sections)
+
+def test_sectioned_generation_tolerates_failed_section(memo_service):
+    """Test that a failed section becomes a placeholder instead of failing the memo."""
+    def fake_groq(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        if section == "Market Opportunity":
+            raise Exception("boom")
+        return f"Body of {section}"
+    
+    with patch.object(memo_service, "_call_groq_api", side_effect=fake_groq), \
+            patch.object(memo_service, "_call_openrouter_api", side_effect=Exception("down")):
+        result = memo_service.generate_memo("Test input", refine=True, sectioned=True)
+    
+    assert "## Executive Summary\n\nBody of Executive Summary" in result
+    assert "## Market Opportunity\n\n_This section could not be generated._" in result
+
+def test_section_prompt_targets_single_section():
+    """Test that a section prompt lists all sections but asks for one."""
+    prompt = build_memo_prompt("Deck", "default", section="Investment Thesis")
+    
+    assert "Write only the \"Investment Thesis\" section" in prompt["user"]
+    assert "6. Risks and Mitigations" in prompt["user"]
+
+def test_generate_memos_prepares_text_once(memo_service):
+    """Test that a batch prepares the text once and reports each template."""
+    def fake_groq(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        if template_key == "growth":
+            raise Exception("boom")
+        return f"{template_key} memo"
+    
+    reported = []
+    with patch('backend.core.memo_service.prepare_text',
+               return_value={"cleaned_text": "Clean input"}) as mock_prepare, \
+            patch.object(memo_service, "_call_groq_api", side_effect=fake_groq) as mock_groq, \
+            patch.object(memo_service, "_call_openrouter_api", side_effect=Exception("down")):
+        results = memo_service.generate_memos("Raw input", ["seed", "seriesA", "growth"],
+                                              on_result=lambda key, result: reported.append(key))
+    
+    mock_prepare.assert_called_once()
+    assert all(call.args[0] == "Clean input" for call in mock_groq.call_args_list)
+    assert list(results) == ["seed", "seriesA", "growth"]
+    assert results["seed"] == {"status": "completed", "memo": "seed memo", "template_used": "seed"}
+    assert results["growth"]["status"] == "failed"
+    assert sorted(reported) == ["growth", "seed", "seriesA"]
+
+def test_memo_prompts_share_template_prefix():
+    """Test that prompts using one template share everything up to the deck content."""
+    seed = build_memo_prompt("Deck content", "seed")
+    prefix = get_compiled_template("seed")["instructions"] + "\n\nPitch Deck Content: "
+    # Sections with retrieval are each sent different pages of the deck
+    team = build_memo_prompt("Page about the founders", "seed", section="Team and Vision")
+    market = build_memo_prompt("Page about the market", "seed", section="Market Opportunity")
+    
+    assert seed["system"] == team["system"] == market["system"]
+    for prompt in (seed, team, market):
+        assert prompt["user"].startswith(prefix)
+    assert build_memo_prompt("Deck content", "seed", section="Team and Vision")["user"].startswith(seed["user"])
+    assert build_memo_prompt("Deck content", "seed") == seed
+
+def test_usage_with_cached_tokens_is_recorded(memo_service):
+    """Test that cached prompt tokens reported by the provider are recorded."""
+    memo_service.config.MEMO_USAGE_STATS_ENABLED = True
+    redis_client = Mock()
+    memo_service._redis_client = redis_client
+    
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            "choices": [{"message": {"content": "Memo"}}],
+            "usage": {"prompt_tokens": 3000, "completion_tokens": 900,
+                      "prompt_tokens_details": {"cached_tokens": 2048}}
+        }
+        memo_service.generate_memo("Test input", refine=True)
+    
+    pipe = redis_client.pipeline.return_value
+    pipe.hincrby.assert_any_call("memo_usage:groq", "prompt_tokens", 3000)
+    pipe.hincrby.assert_any_call("memo_usage:groq", "cached_tokens", 2048)
+    pipe.hincrby.assert_any_call("memo_usage:groq", "cached_requests", 1)
+
+def test_streamed_usage_is_read_from_final_chunk(memo_service):
+    """Test that streamed requests ask for usage and read it from the last chunk."""
+    usage = {}
+    response = Mock()
+    response.iter_lines.return_value = [
+        'data: {"choices": [{"delta": {"content": "Memo"}}]}',
+        'data: {"choices": [], "usage": {"prompt_tokens": 10, "prompt_cache_hit_tokens": 8}}',
+        "data: [DONE]"
+    ]
+    
+    assert memo_service._read_streamed_completion(response, Mock(), usage) == "Memo"
+    assert usage == {"prompt_tokens": 10, "prompt_cache_hit_tokens": 8}
+
+def test_rate_limit_slot_taken_and_unused_tokens_refunded(memo_service):
+    """Test that a call reserves its expected size and refunds what the grant did not use."""
+    limiter = Mock()
+    limiter.cost.side_effect = lambda tokens: min(tokens, 2000)
+    with patch('backend.core.memo_service.get_rate_limiter', return_value=limiter), \
+            patch('requests.Session.post') as mock_post:
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            "choices": [{"message": {"content": "Memo"}}],
+            "usage": {"total_tokens": 1000}
+        }
+        memo_service.generate_memo("Test input", refine=True)
+    
+    reserved = limiter.acquire.call_args[0][0]
+    assert 2048 < reserved < mock_post.call_args[1]["json"]["max_tokens"]
+    # The bucket only granted 2000 tokens, so only the rest of those is returned
+    limiter.refund.assert_called_once_with(2000 - 1000)
+
+def test_rate_limit_refunded_when_call_fails(memo_service):
+    """Test that a failed call returns its reservation except for the prompt."""
+    limiter = Mock()
+    limiter.cost.side_effect = lambda tokens: tokens
+    with patch('backend.core.memo_service.get_rate_limiter', return_value=limiter), \
+            patch('requests.Session.post', side_effect=requests.ConnectionError("down")):
+        with pytest.raises(Exception):
+            memo_service.generate_memo("Test input", refine=True)
+    
+    # One refund of the reserved completion tokens per attempted provider
+    assert limiter.refund.call_count == limiter.acquire.call_count > 0
+    assert {c[0][0] for c in limiter.refund.call_args_list} == {2048}
+
+def test_long_deck_compressed_and_recorded(memo_service):
+    """Test that long text is compressed before generation and the savings recorded."""
+    memo_service.config.MEMO_COMPRESSION_ENABLED = True
+    memo_service.config.MEMO_COMPRESSION_TOKENS = 200
+    text = "\n".join(f"Slide {i}: revenue grew {i}% while the team expanded." for i in range(300))
+    
+    with patch.object(memo_service, "_call_groq_api", return_value="Memo") as mock_groq, \
+            patch('backend.core.memo_service.update_job_metadata') as mock_metadata:
+        memo_service.generate_memo(text, refine=True, job_id="job-1")
+    
+    sent = mock_groq.call_args.args[0]
+    assert len(sent) < len(text)
+    metadata = mock_metadata.call_args_list[0].args[1]
+    assert mock_metadata.call_args_list[0].args[0] == "job-1"
+    assert 0 < metadata["compression_ratio"] < 1
+    assert metadata["compression_tokens_saved"] > 0
+
+def test_sectioned_generation_retrieves_pages_per_section(memo_service):
+    """Test that each section is sent the deck pages matching its topics."""
+    from ..utils.retrieval import BM25Index
+    memo_service.config.MEMO_RETRIEVAL_ENABLED = True
+    memo_service.config.MEMO_RETRIEVAL_TOP_K = 1
+    index = BM25Index([
+        "The market for retail analytics is a $12 billion industry.",
+        "Revenue reached $3M ARR with 70% gross margin.",
+        "Competitors include incumbents with legacy tools."
+    ])
+    sent = {}
+    
+    def fake_groq(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        sent[section] = input_text
+        return f"Body of {section}"
+    
+    with patch('backend.core.memo_service.get_deck_index', return_value=index), \
+            patch.object(memo_service, "_call_groq_api", side_effect=fake_groq):
+        memo_service.generate_memo("Deck", refine=True, template_key="default", sectioned=True)
+    
+    assert sent["Financial Highlights"] == index.pages[1]
+    assert sent["Market Opportunity"] == index.pages[0]
+    assert sent["Competitive Landscape"] == index.pages[2]
+
+def test_sectioned_retrieval_failure_sends_compressed_deck(memo_service):
+    """Test that sections fall back to the compressed deck, not the whole deck."""
+    memo_service.config.MEMO_RETRIEVAL_ENABLED = True
+    memo_service.config.MEMO_COMPRESSION_ENABLED = True
+    memo_service.config.MEMO_COMPRESSION_TOKENS = 200
+    text = "\n".join(f"Slide {i}: revenue grew {i}% while the team expanded." for i in range(300))
+    sent = {}
+    
+    def fake_groq(input_text, template_key, stream=None, section=None, model=None, max_tokens=None):
+        sent[section] = input_text
+        return f"Body of {section}"
+    
+    with patch('backend.core.memo_service.get_deck_index', side_effect=RuntimeError("Redis down")), \
+            patch.object(memo_service, "_call_groq_api", side_effect=fake_groq), \
+            patch('backend.core.memo_service.compress_text', wraps=compress_text) as mock_compress:
+        memo_service.generate_memo(text, refine=True, template_key="default", sectioned=True)
+    
+    assert len(set(sent.values())) == 1
+    assert len(next(iter(sent.values()))) < len(text)
+    mock_compress.assert_called_once()
+
+def test_streamed_reasoning_kept_out_of_memo(memo_service):
+    """Test that <think> blocks are neither streamed nor part of the memo."""
+    stream = Mock(spec=["token", "reset"])
+    with patch('requests.Session.post') as mock_post, \
+            patch('backend.core.memo_service.update_job_metadata') as mock_metadata:
+        mock_post.return_value.ok = True
+        mock_post.return_value.iter_lines.return_value = _sse_lines(
+            "<thi", "nk>Weigh the market", " size.</th", "ink>\n\n# Memo", "\n\nStrong team.")
+        
+        result = memo_service.generate_memo("Test input", refine=True, stream=stream, job_id="job-1")
+    
+    assert mock_post.call_args[1]["json"]["reasoning_format"] == "parsed"
+    assert "".join(c.args[0] for c in stream.token.call_args_list) == "# Memo\n\nStrong team."
+    assert result == "# Memo\n\nStrong team."
+    metrics = mock_metadata.call_args.args[1]
+    assert metrics["reasoning_tokens"] > 0
+    assert metrics["reasoning_seconds"] >= 0 and metrics["answer_seconds"] >= 0
+
+def test_streamed_reasoning_without_opening_tag_not_streamed(memo_service):
+    """Test that reasoning whose <think> was in the prompt never reaches the stream."""
+    stream = Mock(spec=["token", "reset"])
+    with patch('requests.Session.post') as mock_post, \
+            patch.object(memo_service, '_reasoning_options', return_value={}):
+        mock_post.return_value.ok = True
+        mock_post.return_value.iter_lines.return_value = _sse_lines(
+            "Weigh the market", " size.</th", "ink>\n\n# Memo", "\n\nStrong team.")
+        
+        result = memo_service.generate_memo("Test input", refine=True, stream=stream)
+    
+    assert "".join(c.args[0] for c in stream.token.call_args_list) == "# Memo\n\nStrong team."
+    assert result == "# Memo\n\nStrong team."
+
+def test_separate_reasoning_field_ignored_in_memo(memo_service):
+    """Test that reasoning returned beside the content is not part of the memo."""
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            "choices": [{"message": {"content": "Memo", "reasoning": "Long deliberation"}}]
+        }
+        
+        assert memo_service.generate_memo("Test input", refine=True) == "Memo"
+
+ROUTES = [
+    {"name": "interactive", "max_input_tokens": 1000, "max_latency_target": 30, "max_tokens": 2048,
+     "providers": [["Groq", "fast-model"]]},
+    {"name": "growth", "templates": ["growth"], "max_tokens": 8192,
+     "providers": [["Groq", "deep-model"]]},
+    {"name": "large", "max_tokens": 16384,
+     "providers": [["OpenRouter", "long-model"], ["Groq", "deep-model"]]}
+]
+
+def test_route_request_matches_first_fitting_route(memo_service):
+    """Test that routes are matched on input size, latency target and template."""
+    memo_service.config.MEMO_ROUTING_ENABLED = True
+    memo_service.config.MEMO_ROUTES = ROUTES
+    
+    assert memo_service.route_request("Short deck", "default", latency_target=10)["name"] == "interactive"
+    assert memo_service.route_request("Short deck", "default", latency_target=120)["name"] == "large"
+    assert memo_service.route_request("Short deck", "default")["name"] == "large"
+    assert memo_service.route_request("word " * 5000, "growth", latency_target=10)["name"] == "growth"
+    
+    memo_service.config.MEMO_ROUTING_ENABLED = False
+    assert memo_service.route_request("Short deck", "growth", latency_target=10)["providers"][0] == [
+        "Groq", MemoService.GROQ_MODEL]
+
+def test_routed_memo_uses_route_providers_and_budget(memo_service):
+    """Test that a routed memo calls the route's providers in order with its budget."""
+    memo_service.config.MEMO_ROUTING_ENABLED = True
+    memo_service.config.MEMO_ROUTES = ROUTES
+    failed = Mock(ok=False, status_code=503, text="")
+    succeeded = Mock(ok=True)
+    succeeded.json.return_value = {"choices": [{"message": {"content": "Memo"}}]}
+    
+    with patch('requests.Session.post', side_effect=[failed, succeeded]) as mock_post:
+        result = memo_service.generate_memo("Test input", refine=True, latency_target=120)
+    
+    bodies = [call.kwargs["json"] for call in mock_post.call_args_list]
+    assert [body["model"] for body in bodies] == ["long-model", "deep-model"]
+    assert bodies[0]["max_tokens"] == 16384
+    assert mock_post.call_args_list[0].args[0] == memo_service.openrouter_url
+    assert result == "Memo"
+
+def test_large_deck_routed_before_compression(memo_service):
+    """Test that a large deck reaches the large route and is compressed to its budget."""
+    memo_service.config.MEMO_ROUTING_ENABLED = True
+    memo_service.config.MEMO_ROUTES = [
+        {"name": "standard", "max_input_tokens": 1000, "providers": [["Groq", "deep-model"]]},
+        {"name": "large", "compression_tokens": 600, "providers": [["OpenRouter", "long-model"]]}
+    ]
+    memo_service.config.MEMO_COMPRESSION_ENABLED = True
+    memo_service.config.MEMO_COMPRESSION_TOKENS = 200
+    text = "\n".join(f"Slide {i}: revenue grew {i}% while the team expanded." for i in range(300))
+    
+    with patch.object(memo_service, "_call_openrouter_api", return_value="Memo") as mock_openrouter, \
+            patch.object(memo_service, "_call_groq_api") as mock_groq, \
+            patch('backend.core.memo_service.update_job_metadata') as mock_metadata:
+        memo_service.generate_memo(text, refine=True, job_id="job-1")
+    
+    mock_groq.assert_not_called()
+    assert mock_openrouter.call_args.kwargs["model"] == "long-model"
+    metadata = {}
+    for call in mock_metadata.call_args_list:
+        metadata.update(call.args[1])
+    assert metadata["route"] == "large"
+    assert 200 < metadata["compression_tokens"] <= 600
+
+def test_validation_cache_hit_skips_search(memo_service):
+    """Test that a cached search is returned for a normalized query without searching."""
+    memo_service.config.VALIDATION_CACHE_ENABLED = True
+    cache = Mock()
+    cache.get.return_value = [{"title": "t", "snippet": "s", "link": "l"}]
+    memo_service._validation_cache = cache
+    memo_service._redis_client = Mock()
+    
+    with patch('requests.Session.get') as mock_get:
+        results = memo_service.validate_memo("memo", query="  Market is $4B. ")
+    
+    mock_get.assert_not_called()
+    assert results == [{"title": "t", "snippet": "s", "link": "l"}]
+    assert cache.get.call_args.args[0] == memo_service._validation_cache_key("market is $4b")
+    memo_service._redis_client.hincrby.assert_called_once_with("validation_cache_stats", "hits", 1)
+
+def test_validation_cache_stores_empty_results_briefly(memo_service):
+    """Test that empty results get the negative TTL and search errors are not cached."""
+    memo_service.config.VALIDATION_CACHE_ENABLED = True
+    memo_service.config.VALIDATION_CACHE_NEGATIVE_TTL = 60
+    cache = Mock()
+    cache.get.return_value = None
+    memo_service._validation_cache = cache
+    memo_service._redis_client = Mock()
+    
+    with patch('requests.Session.get') as mock_get:
+        mock_get.return_value.ok = True
+        mock_get.return_value.json.return_value = {"items": []}
+        assert memo_service.validate_memo("memo", query="obscure claim") == []
+        
+        mock_get.return_value.ok = False
+        mock_get.return_value.status_code = 429
+        assert memo_service.validate_memo("memo", query="another claim") == []
+    
+    cache.set.assert_called_once_with(memo_service._validation_cache_key("obscure claim"), [], ttl=60)
+
+def test_validation_cache_stats(memo_service):
+    """Test that hit rates count cached empty results as hits."""
+    memo_service.config.VALIDATION_CACHE_ENABLED = True
+    memo_service._redis_client = Mock()
+    memo_service._redis_client.hgetall.return_value = {b"hits": b"6", b"negative_hits": b"2", b"misses": b"2"}
+    
+    assert memo_service.validation_cache_stats() == {
+        "hits": 6, "negative_hits": 2, "misses": 2, "hit_rate": 0.8
+    }
+
+def test_validate_claims_reports_each_claim(memo_service):
+    """Test that claims are searched concurrently and slow or failed searches are reported."""
+    memo_service.config.VALIDATION_CLAIM_TIMEOUT = 0.2
+    release = threading.Event()
+    
+    def search(query, timeout=10, raise_errors=False):
+        if "Flexport" in query:
+            release.wait(2)
+            return []
+        if "Project44" in query:
+            raise ProcessingError("Google Custom Search error: 500")
+        return [{"title": query, "snippet": "s", "link": query}]
+    
+    completed = []
+    with patch.object(memo_service, "_google_custom_search", side_effect=search):
+        start = time.monotonic()
+        results = memo_service.validate_claims(
+            "The market is $4 billion. Competitors include Flexport and Project44.",
+            on_result=lambda index, result: completed.append(index)
+        )
+        elapsed = time.monotonic() - start
+    release.set()
+    
+    assert [(r["claim"], r["status"]) for r in results] == [
+        ("The market is $4 billion.", "found"),
+        ("Flexport", "timeout"),
+        ("Project44", "error")
+    ]
+    assert sorted(completed) == [0, 1, 2]
+    assert elapsed < 1
+
+def test_validate_claims_reports_connection_errors(memo_service):
+    """Test that a search that cannot connect is reported as that claim's error."""
+    memo_service.config.VALIDATION_CACHE_ENABLED = False
+    
+    with patch('requests.Session.get', side_effect=requests.ConnectionError("refused")):
+        results = memo_service.validate_claims("The team is experienced.")
+        assert memo_service.validate_memo("memo", query="claim") == []
+    
+    assert results[0]["type"] == "statement"
+    assert results[0]["status"] == "error"
+
+def test_validate_claims_without_claims_searches_text(memo_service):
+    """Test that text with no extractable claims is validated as one statement."""
+    with patch.object(memo_service, "_google_custom_search", return_value=[]) as mock_search:
+        results = memo_service.validate_claims("The team is experienced.")
+    
+    mock_search.assert_called_once_with("The team is experienced.", timeout=5, raise_errors=True)
+    assert results[0]["type"] == "statement"
+    assert results[0]["status"] == "not_found"
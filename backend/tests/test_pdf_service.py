@@ -69,5 +69,56 @@ class TestPDFService(unittest.TestCase):
         mock_update_job.assert_any_call("job123", {"status": "processing", "progress": 10})
         mock_update_job.assert_any_call("job123", {"status": "failed", "error": "Test error"})
 
+    @patch('backend.utils.retrieval.store_deck_index')
+    @patch('backend.core.pdf_service.PDFService.prepare_text')
+    @patch('backend.core.pdf_service.PDFService._extract_text')
+    def test_process_pdf_indexes_pages(self, mock_extract_text, mock_prepare_text, mock_store_index):
+        """Test that the extracted pages are indexed under the cleaned text."""
+        def extract(file_path, job_id, pages):
+            pages.extend(["Market size is $4B.", "Revenue is $1M ARR."])
+            return "\f".join(pages) + "\f"
+        mock_extract_text.side_effect = extract
+        mock_prepare_text.return_value = {"cleaned_text": "Clean deck", "startup_stage": "seed"}
+        
+        self.pdf_service.process_pdf("test.pdf")
+        
+        text, index = mock_store_index.call_args.args
+        self.assertEqual(text, "Clean deck")
+        self.assertEqual(index.pages, ["Market size is $4B.", "Revenue is $1M ARR."])
+
+    @patch('backend.core.pdf_service.store_prepared_text', return_value="ref123")
+    @patch('backend.core.pdf_service.PDFService.prepare_text')
+    @patch('backend.core.pdf_service.PDFService._extract_text')
+    def test_process_pdf_stores_prepared_text(self, mock_extract_text, mock_prepare_text, mock_store_text):
+        """Test that the prepared text is stored and returned by reference."""
+        mock_extract_text.return_value = "Raw text"
+        mock_prepare_text.return_value = {"cleaned_text": "Clean deck", "startup_stage": "seed"}
+        
+        result = self.pdf_service.process_pdf("test.pdf")
+        
+        mock_store_text.assert_called_once_with("Clean deck")
+        self.assertEqual(result["text_ref"], "ref123")
+
+    @patch('backend.core.pdf_service.update_job_metadata')
+    @patch('backend.core.pdf_service.update_job')
+    @patch('backend.core.pdf_service.store_prepared_text', return_value="ref123")
+    @patch('backend.core.pdf_service.PDFService.prepare_text')
+    @patch('backend.core.pdf_service.PDFService._extract_text')
+    def test_process_pdf_records_skipped_refinement(self, mock_extract_text, mock_prepare_text, mock_store_text,
+                                                    mock_update_job, mock_update_metadata):
+        """Test that a deck the quality gate let through is marked as not refined."""
+        mock_extract_text.return_value = "Raw text"
+        quality = {"score": 0.02}
+        mock_prepare_text.return_value = {"cleaned_text": "Clean deck", "startup_stage": "seed", "refined": False,
+                                          "quality": quality, "dedupe": {"removed": 0, "tokens_saved": 0}}
+        
+        result = self.pdf_service.process_pdf("test.pdf", "job123")
+        
+        self.assertFalse(result["refined"])
+        self.assertFalse(mock_update_job.call_args.args[1]["result"]["refined"])
+        metadata = mock_update_metadata.call_args.args[1]
+        self.assertFalse(metadata["refinement_ran"])
+        self.assertEqual(metadata["raw_text_quality"], quality)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
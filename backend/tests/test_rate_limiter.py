@@ -0,0 +1,72 @@
+"""Tests for the Redis-backed provider rate limiter."""
+
+import pytest
+from unittest.mock import Mock, patch
+from ..infrastructure.rate_limiter import RateLimiter, RateLimitTimeout, get_rate_limiter
+
+def _limiter(waits, rpm=30, tpm=6000):
+    """Create a limiter whose acquire script returns the given waits in turn."""
+    redis_client = Mock()
+    acquire_script, refund_script = Mock(side_effect=[str(w) for w in waits]), Mock()
+    redis_client.register_script.side_effect = [acquire_script, refund_script]
+    return RateLimiter(redis_client, "groq:model", rpm=rpm, tpm=tpm), acquire_script, refund_script
+
+def test_acquire_waits_for_capacity():
+    """Test that acquire sleeps for the reported wait and retries."""
+    limiter, acquire_script, _ = _limiter([2.5, 0])
+    
+    with patch("backend.infrastructure.rate_limiter.time.sleep") as mock_sleep:
+        limiter.acquire(1000, max_wait=60)
+    
+    assert acquire_script.call_count == 2
+    assert 2.5 <= mock_sleep.call_args[0][0] < 2.7
+    assert acquire_script.call_args[1]["args"] == [30, 6000, 1000]
+
+def test_acquire_times_out():
+    """Test that acquire gives up when capacity is not expected within max_wait."""
+    limiter, _, _ = _limiter([90])
+    
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(1000, max_wait=60)
+
+def test_oversized_request_waits_for_full_bucket():
+    """Test that a request above the token capacity is clamped to a full bucket."""
+    limiter, acquire_script, _ = _limiter([0])
+    limiter.acquire(20000)
+    
+    assert acquire_script.call_args[1]["args"] == [30, 6000, 6000]
+
+def test_reserve_fails_open():
+    """Test that Redis errors let requests through."""
+    limiter, acquire_script, _ = _limiter([])
+    acquire_script.side_effect = ConnectionError("redis down")
+    
+    assert limiter.reserve(100) == 0.0
+
+def test_refund_only_with_token_limit():
+    """Test that unused tokens are refunded only when tokens are limited."""
+    limiter, _, refund_script = _limiter([], tpm=0)
+    limiter.refund(500)
+    refund_script.assert_not_called()
+    
+    limiter, _, refund_script = _limiter([])
+    limiter.refund(500)
+    assert refund_script.call_args[1]["args"] == [6000, 500]
+    
+    # Usage beyond the reservation is charged
+    limiter.refund(-200)
+    assert refund_script.call_args[1]["args"] == [6000, -200]
+
+def test_cost_capped_at_bucket():
+    """Test that a reservation larger than the bucket takes the whole bucket."""
+    limiter, _, _ = _limiter([])
+    assert limiter.cost(1000) == 1000
+    assert limiter.cost(20000) == 6000
+    
+    limiter, _, _ = _limiter([], tpm=0)
+    assert limiter.cost(1000) == 0
+
+def test_get_rate_limiter_respects_config():
+    """Test that no limiter is used when disabled or without configured limits."""
+    assert get_rate_limiter("Groq", "model", Mock(RATE_LIMIT_ENABLED=False)) is None
+    assert get_rate_limiter("Groq", "model", Mock(RATE_LIMIT_ENABLED=True, GROQ_RPM=0, GROQ_TPM=0)) is None
@@ -0,0 +1,79 @@
+"""Tests for reasoning output handling."""
+
+from unittest.mock import Mock
+from ..utils.reasoning import ReasoningFilter, split_reasoning, is_reasoning_model
+
+def test_split_reasoning():
+    """Test that closed, unterminated and open-less think blocks are split off."""
+    assert split_reasoning("<think>Plan it.</think>\n\n# Memo") == ("Plan it.", "# Memo")
+    assert split_reasoning("Plan it.</think># Memo") == ("Plan it.", "# Memo")
+    assert split_reasoning("<think>Ran out of tokens") == ("Ran out of tokens", "")
+    assert split_reasoning("# Memo without reasoning") == ("", "# Memo without reasoning")
+    assert split_reasoning(None) == ("", "")
+
+def test_is_reasoning_model():
+    """Test that R1 models and distillations are recognized."""
+    assert is_reasoning_model("deepseek-r1-distill-llama-70b")
+    assert is_reasoning_model("deepseek/deepseek-r1:free")
+    assert not is_reasoning_model("llama-3.1-8b-instant")
+
+def test_filter_handles_tags_split_across_tokens():
+    """Test that tags split over deltas never reach the stream."""
+    stream = Mock(spec=["token"])
+    reasoning = ReasoningFilter(stream)
+    for token in ("<", "think>Che", "ck TAM</", "think>", "\n\n## Summary", " <b>ok</b>"):
+        reasoning.token(token)
+
+    assert "".join(c.args[0] for c in stream.token.call_args_list) == "## Summary <b>ok</b>"
+    assert reasoning.reasoning_text == "Check TAM"
+    assert reasoning.answer == "## Summary <b>ok</b>"
+
+def test_filter_holds_reasoning_without_opening_tag():
+    """Test that a reasoning model's output is held until its block closes."""
+    stream = Mock(spec=["token"])
+    reasoning = ReasoningFilter(stream, model="deepseek-r1-distill-llama-70b")
+    for token in ("Weigh the ", "market.</th", "ink>\n\n# Memo", " text"):
+        reasoning.token(token)
+
+    assert "".join(c.args[0] for c in stream.token.call_args_list) == "# Memo text"
+    assert reasoning.reasoning_text == "Weigh the market."
+
+def test_filter_releases_held_answer_when_finished():
+    """Test that a short answer without tags is forwarded once complete."""
+    stream = Mock(spec=["token"])
+    reasoning = ReasoningFilter(stream, model="deepseek-r1-distill-llama-70b")
+    reasoning.token("# Memo")
+    stream.token.assert_not_called()
+
+    reasoning.finish()
+    stream.token.assert_called_once_with("# Memo")
+    assert reasoning.answer == "# Memo"
+
+def test_filter_forwards_separate_reasoning():
+    """Test that a reasoning field goes to the writer's reasoning hook only."""
+    stream = Mock(spec=["token", "reasoning"])
+    reasoning = ReasoningFilter(stream)
+    reasoning.reasoning("Thinking")
+    reasoning.token("Answer")
+
+    stream.reasoning.assert_called_once_with("Thinking")
+    stream.token.assert_called_once_with("Answer")
+
+def test_budget_exceeded_is_flagged():
+    """Test that reasoning over the budget is flagged in the metrics."""
+    reasoning = ReasoningFilter(budget_tokens=10)
+    reasoning.token("<think>" + "considering the deck carefully " * 20 + "</think>Memo")
+
+    metrics = reasoning.metrics()
+    assert metrics["reasoning_budget_exceeded"] is True
+    assert metrics["reasoning_tokens"] > 10
+
+def test_unstreamed_time_split_by_tokens():
+    """Test that complete responses split time by reported reasoning tokens."""
+    reasoning = ReasoningFilter()
+    reasoning.token("<think>x</think>" + "word " * 100)
+    reasoning.started_at -= 10
+
+    metrics = reasoning.metrics({"completion_tokens_details": {"reasoning_tokens": 900}}, streamed=False)
+    assert metrics["reasoning_tokens"] == 900
+    assert metrics["reasoning_seconds"] > metrics["answer_seconds"] > 0
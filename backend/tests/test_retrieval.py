@@ -0,0 +1,77 @@
+"""Tests for section-targeted deck retrieval."""
+
+import json
+from unittest.mock import Mock, patch
+from ..config import Config
+from ..utils import retrieval
+from ..utils.retrieval import BM25Index, section_context, section_query, get_deck_index
+
+PAGES = [
+    "Acme builds forecasting software for mid-market retailers.",
+    "The market for retail analytics is $12 billion, growing 9% a year.",
+    "Revenue grew to $1.8M ARR; gross margin is 71% and burn is $150k a month.",
+    "CAC is $4k with LTV of $60k, a 9 month payback.",
+    "Our founders previously led the supply chain team at a large retailer."
+]
+
+def test_search_ranks_matching_pages_first():
+    """Test that pages sharing rare query terms rank first."""
+    index = BM25Index(PAGES)
+    assert index.search("revenue margin burn", k=2)[0] == 2
+    assert index.search("quantum cryptography") == []
+
+def test_section_context_keeps_deck_order():
+    """Test that a section gets its top pages in deck order."""
+    index = BM25Index(PAGES)
+    context = section_context(index, "Unit Economics", k=2)
+    assert PAGES[3] in context
+    parts = context.split("\n\n")
+    assert [PAGES.index(part) for part in parts] == sorted(PAGES.index(part) for part in parts)
+
+def test_section_without_matches_gets_whole_deck():
+    """Test that a section matching no page falls back to the whole deck."""
+    index = BM25Index(PAGES)
+    assert section_context(index, "Regulatory Sandbox Status", k=2) == "\n\n".join(PAGES)
+    assert section_context(index, "Regulatory Sandbox Status", k=2, fallback="Compressed") == "Compressed"
+
+def test_section_query_includes_topics():
+    """Test that known sections expand to their topic terms."""
+    assert {"unit", "economics", "cac", "ltv"} <= section_query("Unit Economics")
+
+def test_index_round_trip():
+    """Test that a serialized index scores like the original without recounting terms."""
+    index = BM25Index(PAGES)
+    data = json.loads(json.dumps(index.to_dict()))
+    with patch('backend.utils.retrieval.extract_terms') as mock_extract:
+        restored = BM25Index.from_dict(data)
+    mock_extract.assert_not_called()
+    assert restored.score("market billion") == index.score("market billion")
+    assert BM25Index.from_dict({"pages": PAGES, "k1": 1.5, "b": 0.75}).idf == index.idf
+
+def test_deck_index_built_once_and_reused():
+    """Test that the index is cached under the deck text and reused on a hit."""
+    cache = Mock()
+    cache.get.return_value = None
+    text = "\n\n".join(PAGES)
+
+    with patch('backend.utils.retrieval._deck_index_cache', return_value=cache):
+        built = get_deck_index(text)
+        cache.set.assert_called_once()
+        key, stored = cache.set.call_args.args
+
+        cache.get.return_value = stored
+        with patch('backend.utils.text_processing.split_into_chunks') as mock_split:
+            reused = get_deck_index("  " + text.replace("\n\n", " \n\n "))
+
+    mock_split.assert_not_called()
+    assert cache.get.call_args.args[0] == key
+    assert reused.pages == built.pages
+
+def test_deck_index_cache_is_shared():
+    """Test that the index cache and its Redis pool are created once."""
+    with patch('backend.utils.retrieval._index_cache', None), patch('redis.from_url') as mock_from_url:
+        first = retrieval._deck_index_cache()
+        assert retrieval._deck_index_cache() is first
+
+    mock_from_url.assert_called_once()
+    assert first.max_entries == Config.MEMO_RETRIEVAL_INDEX_MAX_ENTRIES
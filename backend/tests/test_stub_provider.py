@@ -0,0 +1,89 @@
+"""Tests for the local stub provider server against the memo service."""
+
+import pytest
+from unittest.mock import Mock
+from ..core.memo_service import MemoService
+from ..utils.error_handling import ProcessingError
+from ..benchmarks.stub_provider import StubOptions, parse_distribution, start_stub_server
+
+def _config(base_url):
+    """Create a configuration pointing every provider at the stub."""
+    return Mock(
+        GROQ_API_KEY="stub",
+        HF_API_KEY="stub",
+        GOOGLE_API_KEY="stub",
+        GOOGLE_CSE_ID="stub",
+        GROQ_BASE_URL=f"{base_url}/groq/v1",
+        OPENROUTER_BASE_URL=f"{base_url}/openrouter/v1",
+        GOOGLE_CSE_URL=f"{base_url}/customsearch/v1",
+        MEMO_MAX_TOKENS=16384,
+        MEMO_MIN_OUTPUT_TOKENS=2048,
+        MEMO_CACHE_ENABLED=False,
+        MEMO_HEDGING_ENABLED=False,
+        MEMO_SECTIONED=False,
+        MEMO_SECTION_MAX_WORKERS=8,
+        MEMO_SECTION_MAX_TOKENS=4096,
+        MEMO_ROUTING_ENABLED=False,
+        MEMO_USAGE_STATS_ENABLED=False,
+        MEMO_REASONING_MAX_TOKENS=0,
+        MEMO_COMPRESSION_ENABLED=False,
+        MEMO_COMPRESSION_TOKENS=8000,
+        MEMO_RETRIEVAL_ENABLED=False,
+        MEMO_RETRIEVAL_TOP_K=4,
+        VALIDATION_CACHE_ENABLED=False,
+        VALIDATION_MAX_CLAIMS=20,
+        VALIDATION_MAX_WORKERS=2,
+        VALIDATION_CLAIM_TIMEOUT=5,
+        BREAKER_ENABLED=False,
+        RATE_LIMIT_ENABLED=False
+    )
+
+@pytest.fixture
+def stub():
+    """Start a fast stub server for the duration of a test."""
+    options = StubOptions(first_token_latency="fixed:0", tokens_per_second=10000, completion_tokens=50, seed=1)
+    base_url, provider, stop = start_stub_server(options)
+    yield base_url, provider
+    stop()
+
+def test_memo_generated_against_stub(stub):
+    """Test that a memo is generated end to end through the stub."""
+    base_url, provider = stub
+    memo = MemoService(_config(base_url)).generate_memo("Deck", refine=True)
+    
+    assert memo.startswith("# Investment Memo")
+    assert provider.stats["requests"] == 1
+
+def test_streamed_sections_against_stub(stub):
+    """Test that streamed, sectioned generation works through the stub."""
+    base_url, provider = stub
+    stream = Mock()
+    memo = MemoService(_config(base_url)).generate_memo("Deck", refine=True, template_key="seed",
+                                                        stream=stream, sectioned=True)
+    
+    assert "## Team and Vision" in memo
+    assert provider.stats["requests"] == 6
+    assert stream.token.called
+
+def test_injected_errors_fail_both_providers(stub):
+    """Test that injected errors surface as provider failures."""
+    base_url, provider = stub
+    provider.options.error_rate = 1.0
+    
+    with pytest.raises(ProcessingError):
+        MemoService(_config(base_url)).generate_memo("Deck", refine=True)
+    assert provider.stats["errors"] == 2
+
+def test_search_against_stub(stub):
+    """Test that validation parses the stub's custom search results."""
+    base_url, _ = stub
+    results = MemoService(_config(base_url)).validate_memo("memo", query="claim")
+    
+    assert len(results) == 5
+    assert results[0]["link"] == "https://example.com/1"
+
+def test_parse_distribution():
+    """Test the latency distribution specs."""
+    assert parse_distribution("fixed:0.5")(None) == 0.5
+    with pytest.raises(ValueError):
+        parse_distribution("pareto:1")
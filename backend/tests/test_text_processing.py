@@ -12,7 +12,17 @@ from ..utils.text_processing import (
     insert_line_breaks,
     clean_text,
     needs_ocr,
-    prepare_text
+    prepare_text,
+    split_into_chunks,
+    _split_with_separators,
+    refine_text_chunked,
+    clean_text_chunks,
+    text_noise_score,
+    guess_startup_stage,
+    estimate_tokens,
+    REFINEMENT_MODEL,
+    simhash,
+    remove_near_duplicates
 )
 
 class TestTextProcessing(unittest.TestCase):
@@ -133,6 +143,162 @@ class TestTextProcessing(unittest.TestCase):
             "cleaned_text": "Refined text",
             "startup_stage": "seed"
         })
+    
+    def test_split_into_chunks(self):
+        # Short text stays in one chunk
+        self.assertEqual(split_into_chunks("Short text", max_tokens=100), ["Short text"])
+        
+        # Long text is split on line boundaries, in order, within budget
+        lines = [f"Sentence number {i} about the market." for i in range(50)]
+        text = "\n".join(lines)
+        chunks = split_into_chunks(text, max_tokens=50)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("\n".join(chunks), text)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk, REFINEMENT_MODEL), 50)
+        
+        # Text without boundaries is hard split
+        chunks = split_into_chunks("x" * 1000, max_tokens=50)
+        self.assertEqual("".join(chunks), "x" * 1000)
+    
+    @patch('backend.utils.text_processing.detect_startup_stage')
+    @patch('backend.utils.text_processing._call_refinement_llm')
+    def test_refine_text_chunked(self, mock_call, mock_detect):
+        """Chunks are refined independently and reassembled in order."""
+        mock_call.side_effect = lambda prompt, api_key, max_tokens: prompt["user"].upper()
+        mock_detect.return_value = "seed"
+        
+        text = "\n".join(f"line {i}" for i in range(200))
+        with patch('backend.config.Config.REFINE_CHUNK_TOKENS', 100):
+            result = refine_text_chunked(text, api_key="key")
+        
+        self.assertGreater(mock_call.call_count, 1)
+        self.assertEqual(result["cleaned_text"], text.upper())
+        self.assertEqual(result["startup_stage"], "seed")
+    
+    @patch('backend.utils.text_processing.detect_startup_stage')
+    @patch('backend.utils.text_processing._call_refinement_llm')
+    def test_refine_text_chunked_failed_chunk(self, mock_call, mock_detect):
+        """A failed chunk keeps its cleaned text instead of failing the job."""
+        mock_call.side_effect = Exception("timeout")
+        mock_detect.return_value = "default"
+        
+        text = "\n".join(f"line {i}" for i in range(200))
+        with patch('backend.config.Config.REFINE_CHUNK_TOKENS', 100):
+            result = refine_text_chunked(text, api_key="key")
+        
+        self.assertEqual(result["cleaned_text"], text)
+    
+    @patch('backend.utils.text_processing.detect_startup_stage')
+    @patch('backend.utils.text_processing._call_refinement_llm')
+    def test_refine_text_chunked_keeps_page_breaks(self, mock_call, mock_detect):
+        """Raw text is chunked per page, cleaned once and pages are rejoined with form feeds."""
+        mock_call.side_effect = lambda prompt, api_key, max_tokens: prompt["user"]
+        mock_detect.return_value = "seed"
+        
+        pages = [f"Page {i} covers the market. It has enough words to fill a chunk." for i in range(6)]
+        raw_text = "\f".join(pages) + "\f"
+        with patch('backend.config.Config.REFINE_CHUNK_TOKENS', 20), \
+                patch('backend.config.Config.DEDUPE_ENABLED', False):
+            pieces, _ = clean_text_chunks(raw_text)
+            with patch('backend.utils.text_processing.clean_text') as mock_clean:
+                result = refine_text_chunked("Cleaned deck", api_key="key", pieces=pieces)
+        
+        mock_clean.assert_not_called()
+        self.assertEqual(mock_call.call_count, len(pages))
+        self.assertEqual(result["cleaned_text"].split("\f"), [clean_text(page) for page in pages])
+    
+    def test_hard_split_keeps_words_whole(self):
+        """Text without line breaks is split between words and rejoined with spaces."""
+        text = " ".join(["growth", "Series", "revenue"] * 30)
+        pieces = _split_with_separators(text, max_tokens=10)
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(chunk + separator for chunk, separator in pieces), text)
+        for chunk, separator in pieces:
+            self.assertEqual(chunk, chunk.strip())
+            self.assertLessEqual(len(chunk), 30)
+        self.assertEqual({separator for _, separator in pieces[:-1]}, {" "})
+    
+    def test_split_into_chunks_separators(self):
+        """Chunks and their separators give back the original text."""
+        text = "\n\n".join(f"Paragraph {i}.\nIt spans two lines of text." for i in range(20))
+        pieces = _split_with_separators(text, max_tokens=30)
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(chunk + separator for chunk, separator in pieces), text)
+        self.assertEqual({separator for _, separator in pieces[:-1]}, {"\n\n"})
+        self.assertEqual(pieces[-1][1], "")
+    
+    def test_text_noise_score(self):
+        clean = "Our platform serves 200 enterprise customers.\nRevenue grew 3x last year to $4M ARR."
+        self.assertLess(text_noise_score(clean)["score"], 0.15)
+        
+        damaged = "P l a t f o r m serves enter- prise customers\nR e v e n u e grew to $4M"
+        result = text_noise_score(damaged)
+        self.assertGreaterEqual(result["score"], 0.15)
+        self.assertGreater(result["spaced_letters"], 0)
+        self.assertGreater(result["broken_hyphenation"], 0)
+        
+        self.assertEqual(text_noise_score("")["score"], 0.0)
+    
+    @patch('backend.utils.text_processing.detect_startup_stage')
+    @patch('backend.utils.text_processing.refine_text_with_stage')
+    def test_prepare_text_quality_gate(self, mock_refine, mock_detect):
+        """Clean text makes no LLM call but still gets a stage."""
+        result = prepare_text("Revenue grew 3x last year to $4M ARR.\nWe are raising a Series B.", refine=True)
+        
+        mock_refine.assert_not_called()
+        mock_detect.assert_not_called()
+        self.assertFalse(result["refined"])
+        self.assertEqual(result["startup_stage"], "growth")
+        
+        mock_refine.return_value = {"cleaned_text": "Refined", "startup_stage": "seed"}
+        with patch('backend.config.Config.REFINE_QUALITY_THRESHOLD', 0.0):
+            result = prepare_text("Revenue grew 3x last year to $4M ARR.", refine=True)
+        
+        mock_refine.assert_called_once()
+        self.assertTrue(result["refined"])
+    
+    @patch('backend.utils.text_processing.refine_text_with_stage')
+    def test_prepare_text_scores_raw_text(self, mock_refine):
+        """Damage that cleaning hides still sends the deck to refinement."""
+        mock_refine.return_value = {"cleaned_text": "Refined", "startup_stage": "seed"}
+        raw_text = "R e v e n u e grew 3x last year to $4M ARR across enter-\nprise accounts."
+        
+        result = prepare_text(raw_text, refine=True)
+        
+        self.assertTrue(result["refined"])
+        self.assertGreater(result["quality"]["spaced_letters"], 0)
+        self.assertEqual(mock_refine.call_args.kwargs["pieces"], [(clean_text(raw_text), "")])
+    
+    def test_guess_startup_stage(self):
+        self.assertEqual(guess_startup_stage("We are raising a $2M seed round."), "seed")
+        self.assertEqual(guess_startup_stage("After our pre-seed round we are raising a Series A."), "seriesa")
+        self.assertEqual(guess_startup_stage("Backed by Series C investors"), "growth")
+        self.assertEqual(guess_startup_stage("Seed-to-harvest analytics for farms."), "default")
+    
+    def test_simhash(self):
+        text = "Acme helps mid-market retailers cut inventory costs with AI forecasting"
+        self.assertEqual(simhash(text), simhash("ACME helps mid market retailers cut inventory costs with AI forecasting!"))
+        self.assertNotEqual(simhash(text), simhash("Our founding team has twenty years of logistics experience"))
+    
+    def test_remove_near_duplicates(self):
+        value_prop = "Acme helps mid-market retailers cut inventory costs with AI forecasting."
+        text = "\n".join([
+            value_prop,
+            "Revenue grew three times year over year to reach 2.4M ARR.",
+            "Team",
+            "Team",
+            "ACME helps mid market retailers cut inventory costs with AI forecasting",
+            "Our founding team has twenty years of logistics experience."
+        ])
+        result = remove_near_duplicates(text)
+        
+        self.assertEqual(result["removed"], 1)
+        self.assertGreater(result["tokens_saved"], 0)
+        self.assertEqual(result["text"].count("inventory costs"), 1)
+        self.assertTrue(result["text"].startswith(value_prop))
+        # Short lines are left to remove_noise
+        self.assertEqual(result["text"].count("Team\n"), 2)
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
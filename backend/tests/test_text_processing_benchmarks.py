@@ -0,0 +1,184 @@
+"""
+Performance regression tests for the text processing utilities.
+
+Two kinds of checks live here:
+- Scaling checks run on adversarial inputs (long runs of spaced letters,
+  giant sentences, repeated noise lines) at two sizes and fail if the time
+  grows much faster than the input, which catches catastrophic regex
+  backtracking. They are fast and always run.
+- Baseline benchmarks run each function on realistic 50KB-2MB deck texts and
+  compare against stored baselines in benchmark_baselines.json. They only
+  run with RUN_BENCHMARKS=1.
+
+Timings are stored relative to a fixed calibration workload so baselines
+carry over between machines. Set UPDATE_BENCHMARK_BASELINES=1 to rewrite the
+baselines and BENCHMARK_TOLERANCE to change the allowed slowdown (default
+0.5, i.e. 50% slower than baseline fails).
+"""
+
+import os
+import json
+import time
+import random
+import pytest
+from ..utils.text_processing import (
+    is_noise_page,
+    fix_spaced_text,
+    remove_noise,
+    insert_line_breaks,
+    clean_text,
+    needs_ocr
+)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baselines.json")
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.5"))
+RUN_BENCHMARKS = os.getenv("RUN_BENCHMARKS", "").lower() in ("true", "1")
+UPDATE_BASELINES = os.getenv("UPDATE_BENCHMARK_BASELINES", "").lower() in ("true", "1")
+
+# Maximum allowed growth in run time when the input grows SCALE_FACTOR times
+SCALE_FACTOR = 8
+MAX_SCALING_RATIO = SCALE_FACTOR * 3
+
+FUNCTIONS = {
+    "clean_text": clean_text,
+    "remove_noise": remove_noise,
+    "fix_spaced_text": fix_spaced_text,
+    "insert_line_breaks": insert_line_breaks,
+    "needs_ocr": needs_ocr,
+    "is_noise_page": is_noise_page
+}
+
+SIZES = {
+    "50KB": 50 * 1024,
+    "500KB": 500 * 1024,
+    "2MB": 2 * 1024 * 1024
+}
+
+_WORDS = (
+    "market customers revenue growth platform enterprise retail inventory forecasting "
+    "pipeline margin churn acquisition team founders product engineering scale pilot "
+    "contract recurring subscription analytics demand supply chain partners channel "
+    "expansion europe north america pricing unit economics payback retention cohort"
+).split()
+
+def generate_deck_text(size, seed=0):
+    """
+    Generate deterministic text shaped like PDF-extracted pitch deck content.
+
+    Pages mix headings, bullets and prose with figures, letter-spaced titles,
+    page numbers and a repeated confidentiality footer.
+    """
+    rng = random.Random(seed)
+    pages = []
+    length = 0
+    page_number = 1
+
+    while length < size:
+        lines = []
+        if rng.random() < 0.3:
+            lines.append(" ".join("MARKETOVERVIEW"))
+        else:
+            lines.append(" ".join(rng.choice(_WORDS).title() for _ in range(rng.randint(2, 4))))
+        for _ in range(rng.randint(4, 10)):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 25))]
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), f"${rng.randint(1, 900)}M")
+            prefix = "• " if rng.random() < 0.5 else ""
+            lines.append(prefix + " ".join(words).capitalize() + ".")
+        lines.append("Acme Inc. Confidential")
+        lines.append(f"{page_number} / 40")
+        page = "\n".join(lines) + "\n\n"
+        pages.append(page)
+        length += len(page)
+        page_number += 1
+
+    return "".join(pages)[:size]
+
+def _best_time(func, arg, repeats=3):
+    """Return the fastest of several timed calls."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _calibration_time():
+    """Time a fixed string and regex workload used to normalize timings."""
+    text = generate_deck_text(200 * 1024, seed=42)
+
+    def workload(value):
+        value.lower().split()
+        "\n".join(line.strip() for line in value.splitlines())
+        sum(c.isalpha() for c in value)
+
+    return _best_time(workload, text, repeats=5)
+
+def _load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+ADVERSARIAL_INPUTS = {
+    "clean_text": lambda n: "T h i s i s s p a c e d " * n + "\n \n" * n,
+    "remove_noise": lambda n: "1 / 2\n***\nRepeated footer\n" * n + "\n".join(f"line {i}" for i in range(n)),
+    "fix_spaced_text": lambda n: "a " * (n * 4) + "bc",
+    "insert_line_breaks": lambda n: "word " * (n * 4) + ". " * n,
+    "needs_ocr": lambda n: "!@ a" * (n * 4),
+    "is_noise_page": lambda n: "revenue 2024 " * (n * 2)
+}
+
+@pytest.mark.parametrize("name", sorted(ADVERSARIAL_INPUTS))
+def test_scaling_on_adversarial_input(name):
+    """Run time must grow roughly linearly with adversarial input size."""
+    func = FUNCTIONS[name]
+    make_input = ADVERSARIAL_INPUTS[name]
+
+    small = _best_time(func, make_input(5000))
+    large = _best_time(func, make_input(5000 * SCALE_FACTOR))
+
+    # Guard against timer noise on very fast calls
+    ratio = large / max(small, 1e-4)
+    assert ratio < MAX_SCALING_RATIO, (
+        f"{name} grew {ratio:.1f}x for a {SCALE_FACTOR}x larger adversarial input"
+    )
+
+@pytest.fixture(scope="module")
+def benchmark_session():
+    """Collect measurements and write baselines at the end when updating."""
+    session = {
+        "calibration": _calibration_time(),
+        "baselines": _load_baselines(),
+        "measured": {}
+    }
+    yield session
+
+    if UPDATE_BASELINES and session["measured"]:
+        baselines = session["baselines"]
+        baselines.update(session["measured"])
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+@pytest.mark.skipif(not RUN_BENCHMARKS and not UPDATE_BASELINES, reason="set RUN_BENCHMARKS=1 to run")
+@pytest.mark.parametrize("size", sorted(SIZES))
+@pytest.mark.parametrize("name", sorted(FUNCTIONS))
+def test_benchmark_against_baseline(benchmark_session, name, size):
+    """Run time relative to calibration must stay within tolerance of the baseline."""
+    text = generate_deck_text(SIZES[size])
+    relative = _best_time(FUNCTIONS[name], text) / benchmark_session["calibration"]
+    key = f"{name}[{size}]"
+    benchmark_session["measured"][key] = round(relative, 4)
+
+    if UPDATE_BASELINES:
+        return
+
+    baseline = benchmark_session["baselines"].get(key)
+    if baseline is None:
+        pytest.skip(f"No baseline for {key}, run with UPDATE_BENCHMARK_BASELINES=1")
+
+    assert relative <= baseline * (1 + TOLERANCE), (
+        f"{key} took {relative:.3f}x calibration, baseline is {baseline:.3f}x "
+        f"(tolerance {TOLERANCE:.0%})"
+    )
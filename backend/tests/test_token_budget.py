@@ -0,0 +1,52 @@
+"""Tests for token budget utilities."""
+
+from ..utils.token_budget import (
+    estimate_tokens,
+    estimate_prompt_tokens,
+    fit_max_tokens,
+    get_model_family,
+    truncate_to_tokens
+)
+
+def test_estimate_tokens():
+    """Test that estimates scale with text length and density."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens(None) == 0
+    
+    prose = "The company sells software to mid-market retailers. " * 100
+    estimate = estimate_tokens(prose)
+    assert len(prose) / 5 < estimate < len(prose) / 3
+    
+    # Numbers tokenize more densely than words
+    assert estimate_tokens("1234567890" * 10) > estimate_tokens("abcdefghij" * 10)
+
+def test_model_family_calibration():
+    """Test that model names map to calibration families."""
+    assert get_model_family("deepseek-r1-distill-llama-70b") == "deepseek"
+    assert get_model_family("nvidia/llama-3.1-nemotron-70b-instruct:free") == "nemotron"
+    assert get_model_family("unknown-model") == "default"
+    
+    text = "Market opportunity and competitive landscape. " * 50
+    assert estimate_tokens(text, "deepseek-r1-distill-llama-70b") > estimate_tokens(text)
+
+def test_estimate_prompt_tokens():
+    """Test that prompt estimates include both messages."""
+    prompt = {"system": "You are an analyst.", "user": "Analyze this deck."}
+    assert estimate_prompt_tokens(prompt) > estimate_tokens(prompt["user"])
+
+def test_fit_max_tokens():
+    """Test that completion budgets shrink to fit the context window."""
+    model = "deepseek-r1-distill-llama-70b"
+    assert fit_max_tokens(1000, model, 16384) == 16384
+    assert fit_max_tokens(120000, model, 16384) < 16384
+    assert fit_max_tokens(200000, model, 16384) == 0
+
+def test_truncate_to_tokens():
+    """Test that truncation respects the budget and line boundaries."""
+    text = "\n".join(f"Line number {i} of the deck." for i in range(1000))
+    truncated = truncate_to_tokens(text, 500)
+    assert estimate_tokens(truncated) <= 500
+    assert text.startswith(truncated)
+    assert truncated.endswith("deck.")
+    
+    assert truncate_to_tokens("Short text", 500) == "Short text"
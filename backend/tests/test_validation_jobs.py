@@ -0,0 +1,107 @@
+"""Tests for background validation jobs."""
+
+import copy
+import asyncio
+from unittest.mock import Mock, patch
+from flask import Flask
+from ..api.memo_controller import memo_bp
+from ..tasks import validate_claims_task
+from ..async_tasks import ASYNC_TASKS, validate_claims_task_async, _task_name
+
+CLAIMS = [
+    {"claim": "The market is $4 billion.", "type": "market_size", "query": "The market is $4 billion."},
+    {"claim": "Flexport", "type": "competitor", "query": '"Flexport"'}
+]
+
+def _found(claim):
+    return dict(claim, status="found", results=[{"title": claim["claim"], "snippet": "s", "link": claim["query"]}])
+
+def _service(validate):
+    service = Mock()
+    service.claims_to_validate.return_value = CLAIMS
+    service.validate_claims.side_effect = validate
+    return service
+
+@patch("backend.tasks.update_job")
+@patch("backend.tasks.get_memo_service")
+def test_task_updates_job_as_claims_complete(mock_get_memo_service, mock_update_job):
+    """Test that every claim starts pending and its result is written as it completes."""
+    def validate(claims, on_result):
+        results = [_found(claim) for claim in claims]
+        for index in (1, 0):
+            on_result(index, results[index])
+        return results
+    mock_get_memo_service.return_value = _service(validate)
+    # The task updates the same claims list, so keep what each update wrote
+    updates = []
+    mock_update_job.side_effect = lambda job_id, data: updates.append(copy.deepcopy(data))
+
+    result = validate_claims_task("Deck claims", "job123")
+
+    assert [c["status"] for c in updates[0]["claims"]] == ["pending", "pending"]
+    assert [c["status"] for c in updates[1]["claims"]] == ["pending", "found"]
+    assert updates[1]["progress"] == 55
+    assert updates[-1]["status"] == "completed"
+    assert [r["link"] for r in result["results"]] == ["The market is $4 billion.", '"Flexport"']
+
+@patch("backend.async_tasks.update_job")
+@patch("backend.async_tasks.get_async_memo_service")
+def test_async_task_is_registered(mock_get_service, mock_update_job):
+    """Test that the worker runs validation jobs on the event loop."""
+    async def validate(claims, on_result):
+        return [_found(claim) for claim in claims]
+    mock_get_service.return_value = _service(validate)
+
+    result = asyncio.run(validate_claims_task_async("Deck claims", "job123"))
+
+    assert ASYNC_TASKS[_task_name(validate_claims_task)] is validate_claims_task_async
+    assert [c["status"] for c in result["claims"]] == ["found", "found"]
+
+@patch("backend.api.memo_controller.get_memo_service")
+@patch("backend.api.memo_controller.validation_queue")
+@patch("backend.api.memo_controller.update_job")
+@patch("backend.api.memo_controller.create_job", return_value="job123")
+def test_async_validation_is_enqueued(mock_create_job, mock_update_job, mock_queue, mock_get_memo_service):
+    """Test that async validation returns a job without searching on the API worker."""
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    response = app.test_client().post("/api/validate-selection", json={"text": "Deck claims", "async": True})
+
+    assert response.status_code == 202
+    assert response.get_json()["job_id"] == "job123"
+    mock_queue.enqueue.assert_called_once_with(validate_claims_task, "Deck claims", "job123")
+    mock_get_memo_service.assert_not_called()
+
+@patch("backend.api.memo_controller.get_memo_service")
+@patch("backend.api.memo_controller.validation_queue")
+@patch("backend.api.memo_controller.update_job")
+@patch("backend.api.memo_controller.create_job", return_value="job123")
+def test_large_selection_is_enqueued(mock_create_job, mock_update_job, mock_queue, mock_get_memo_service):
+    """Test that a selection with more claims than the sync limit is validated in the background."""
+    mock_get_memo_service.return_value = _service(None)
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    with patch("backend.api.memo_controller.Config.VALIDATION_SYNC_MAX_CLAIMS", 1):
+        response = app.test_client().post("/api/validate-selection", json={"text": "Deck claims"})
+
+    assert response.status_code == 202
+    assert response.get_json()["job_id"] == "job123"
+    mock_queue.enqueue.assert_called_once_with(validate_claims_task, "Deck claims", "job123")
+    mock_get_memo_service.return_value.validate_claims.assert_not_called()
+
+@patch("backend.api.memo_controller.get_memo_service")
+@patch("backend.api.memo_controller.validation_queue")
+def test_small_selection_is_validated_inline(mock_queue, mock_get_memo_service):
+    """Test that a selection within the sync limit is validated on the request."""
+    mock_get_memo_service.return_value = _service(lambda claims: [_found(claim) for claim in claims])
+    app = Flask(__name__)
+    app.register_blueprint(memo_bp)
+
+    with patch("backend.api.memo_controller.Config.VALIDATION_SYNC_MAX_CLAIMS", 2):
+        response = app.test_client().post("/api/validate-selection", json={"text": "Deck claims"})
+
+    assert response.status_code == 200
+    assert [c["status"] for c in response.get_json()["claims"]] == ["found", "found"]
+    mock_queue.enqueue.assert_not_called()
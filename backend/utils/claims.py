@@ -0,0 +1,132 @@
+"""
+Extraction of checkable claims from memo text.
+This module splits a memo or a selection of it into atomic factual claims,
+such as market sizes, figures and named competitors, without calling a
+model. Each claim carries the search query used to validate it, and claims
+with the same normalized query are only validated once.
+"""
+
+import re
+import logging
+from .context_compression import split_sentences
+
+logger = logging.getLogger(__name__)
+
+# Google ignores query words beyond the 32nd
+MAX_QUERY_WORDS = 32
+
+_MARKDOWN = re.compile(r'^\s*(?:#+|[-*+>]|\d+[.)])\s+|[*_`]+')
+_CLAUSE_END = re.compile(r';\s+')
+_MONEY = re.compile(
+    r'[$€£]\s?\d[\d,.]*\s*(?:[kmbt]n?\b|thousand|million|billion|trillion)?'
+    r'|\d[\d,.]*\s*(?:thousand|million|billion|trillion)\b',
+    re.IGNORECASE
+)
+_MARKET = re.compile(r'\b(?:market|tam|sam|som|industry|addressable)\b', re.IGNORECASE)
+_FIGURE = re.compile(
+    r'\d[\d,.]*\s*(?:%|percent\b|x\b|users\b|customers\b|clients\b|employees\b|downloads\b|countries\b)'
+    r'|[$€£]\s?\d|\b(?:arr|mrr|revenue|cagr|growth|margin|valuation)\b[^.]*\d',
+    re.IGNORECASE
+)
+_COMPETITION = re.compile(
+    r'\b(?:competitors?|competes?|competing|competition|rivals?|incumbents?|alternatives?|versus|vs\.?)\b',
+    re.IGNORECASE
+)
+_NAME = re.compile(r"\b[A-Z][\w&'.\-]*(?:\s+(?:[A-Z][\w&'.\-]*|&))*")
+
+# Capitalized words that start sentences or name sections rather than companies
+_NOT_NAMES = frozenset(
+    "a an and as at but by for from in it its key main major many most of on or other our "
+    "some such that the their these they this those to unlike we while with compared "
+    "competitors competitor competition competitive landscape rivals incumbents alternatives "
+    "market vs versus like including include includes".split()
+)
+
+def normalize_query(query):
+    """
+    Normalize a search query for deduplication and caching.
+
+    Args:
+        query (str): The query
+
+    Returns:
+        str: The query lowercased, with whitespace collapsed and surrounding
+            punctuation removed
+    """
+    return " ".join(query.lower().split()).strip(" .,;:!?\"'")
+
+def _clean(sentence):
+    return " ".join(_MARKDOWN.sub("", sentence).split())
+
+def _query(text):
+    return " ".join(text.split()[:MAX_QUERY_WORDS])
+
+def _competitor_names(clause):
+    names = []
+    for match in _NAME.finditer(clause):
+        words = match.group(0).strip(".'-").split()
+        # Drop leading words such as "Unlike" or "Competitors" from the name
+        while words and words[0].lower() in _NOT_NAMES:
+            words = words[1:]
+        name = " ".join(words)
+        if name and name.lower() not in _NOT_NAMES and not _MONEY.fullmatch(name):
+            names.append(name)
+    return names
+
+def extract_claims(text, max_claims=20):
+    """
+    Split text into atomic claims worth validating.
+
+    Market sizes and other figures become one claim per clause; each named
+    competitor in a sentence about competition becomes its own claim.
+
+    Args:
+        text (str): The memo or selection text
+        max_claims (int): Maximum number of claims to return
+
+    Returns:
+        list: Claims in order of appearance, each a dict with "claim" (the
+            claim text), "type" ("market_size", "figure" or "competitor")
+            and "query" (the search query)
+    """
+    claims = []
+    seen = set()
+
+    def add(claim, kind, query):
+        key = normalize_query(query)
+        if key and key not in seen:
+            seen.add(key)
+            claims.append({"claim": claim, "type": kind, "query": query})
+
+    for sentence in split_sentences(text):
+        for clause in _CLAUSE_END.split(_clean(sentence)):
+            if not clause:
+                continue
+            if _MONEY.search(clause) and _MARKET.search(clause):
+                add(clause, "market_size", _query(clause))
+            elif _FIGURE.search(clause) or _MONEY.search(clause):
+                add(clause, "figure", _query(clause))
+            if _COMPETITION.search(clause):
+                for name in _competitor_names(clause):
+                    add(name, "competitor", f'"{name}"')
+        if len(claims) >= max_claims:
+            break
+
+    logger.debug(f"Extracted {len(claims)} claims from {len(text)} characters")
+    return claims[:max_claims]
+
+def merge_claim_results(claims):
+    """
+    Combine the search results of validated claims.
+
+    Args:
+        claims (list): Claim results from validation, each with "results"
+
+    Returns:
+        list: The search results of all claims, each source once
+    """
+    merged = {}
+    for claim in claims:
+        for result in claim.get("results") or []:
+            merged.setdefault(result["link"], result)
+    return list(merged.values())
@@ -0,0 +1,215 @@
+"""
+Extractive compression of deck text before memo generation.
+This module shortens long pitch deck text to a token budget by keeping whole
+sentences: each sentence is scored by its TF-IDF salience within the deck and
+by how well it covers the topics of the template's sections, and the best
+sentences are kept in their original order. Every section gets a share of
+the budget first, so a deck heavy on product detail still keeps its
+financials and team.
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+from .token_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Topic terms per template section, matched against sentence terms
+SECTION_TOPICS = {
+    "Executive Summary": ["company", "overview", "mission", "solution", "problem", "raising", "round", "vision"],
+    "Market Opportunity": ["market", "tam", "sam", "som", "size", "billion", "industry", "demand", "segment", "cagr"],
+    "Market Leadership": ["market", "leader", "share", "position", "category", "brand", "largest"],
+    "Competitive Landscape": ["competitor", "competitors", "competition", "alternative", "incumbent", "differentiation", "versus"],
+    "Competitive Moat": ["moat", "patent", "proprietary", "defensibility", "network", "switching", "barrier", "data"],
+    "Financial Highlights": ["revenue", "arr", "mrr", "margin", "profit", "burn", "runway", "forecast", "projection", "ebitda"],
+    "Financial Performance": ["revenue", "arr", "growth", "margin", "profit", "ebitda", "cash", "burn", "yoy"],
+    "Investment Thesis": ["opportunity", "return", "valuation", "raise", "funding", "investors", "exit", "upside"],
+    "Risks and Mitigations": ["risk", "risks", "challenge", "regulation", "regulatory", "dependency", "mitigation", "concentration"],
+    "Risk Analysis": ["risk", "risks", "challenge", "regulation", "regulatory", "dependency", "uncertainty", "concentration"],
+    "Team and Vision": ["team", "founder", "founders", "ceo", "cto", "experience", "previously", "hires", "advisors"],
+    "Team Assessment": ["team", "founder", "founders", "ceo", "cto", "experience", "previously", "leadership", "hires"],
+    "Product and Technology": ["product", "platform", "technology", "feature", "ai", "api", "architecture", "roadmap"],
+    "Go-to-Market Strategy": ["customers", "sales", "channel", "pricing", "acquisition", "partners", "marketing", "pilot"],
+    "Expansion Strategy": ["expansion", "international", "geography", "markets", "new", "launch", "partnerships"],
+    "Growth Metrics": ["growth", "users", "customers", "retention", "churn", "mom", "yoy", "traction", "active"],
+    "Unit Economics": ["cac", "ltv", "payback", "margin", "arpu", "contribution", "cohort", "churn"],
+}
+
+# Fraction of the budget reserved for the best sentences of each section
+SECTION_SHARE = 0.6
+
+# Sentences with figures carry most of the facts a memo needs
+NUMERIC_BOOST = 0.25
+
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have in into is it its of on or our that the their "
+    "this to was we were which will with you your they them than then there these those also can more".split()
+)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
+_TERM = re.compile(r'[a-z][a-z0-9\-]+|\d+')
+_HAS_FIGURE = re.compile(r'\d')
+
+def split_sentences(text):
+    """
+    Split text into sentences, treating every line as at least one unit.
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        list: The non-empty sentences, in order
+    """
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            sentences.extend(s for s in _SENTENCE_END.split(line) if s.strip())
+    return sentences
+
+def extract_terms(sentence):
+    """
+    Extract the lowercased terms of a sentence, without stopwords.
+
+    Args:
+        sentence (str): The sentence
+
+    Returns:
+        list: The terms, in order
+    """
+    return [t for t in _TERM.findall(sentence.lower()) if t not in _STOPWORDS]
+
+def _section_topics(section):
+    topics = SECTION_TOPICS.get(section)
+    if topics is None:
+        # Unknown sections fall back to the words of their heading
+        topics = extract_terms(section)
+    return set(topics)
+
+def score_sentences(sentences, sections=()):
+    """
+    Score sentences by TF-IDF salience and by coverage of each section.
+
+    Args:
+        sentences (list): The sentences of one document
+        sections (iterable): Section names of the memo template
+
+    Returns:
+        tuple: Salience per sentence (0 to 1) and, per section, a coverage
+            score per sentence
+    """
+    term_lists = [extract_terms(s) for s in sentences]
+    doc_freq = Counter(term for terms in term_lists for term in set(terms))
+    total = len(sentences)
+    idf = {term: math.log((total + 1) / (df + 1)) + 1 for term, df in doc_freq.items()}
+
+    salience = []
+    for sentence, terms in zip(sentences, term_lists):
+        if not terms:
+            salience.append(0.0)
+            continue
+        counts = Counter(terms)
+        weight = sum((count / len(terms)) * idf[term] for term, count in counts.items())
+        # Damp length so long sentences are not favoured for their size alone
+        score = weight * math.sqrt(len(counts))
+        if _HAS_FIGURE.search(sentence):
+            score *= 1 + NUMERIC_BOOST
+        salience.append(score)
+
+    top = max(salience, default=0.0) or 1.0
+    salience = [s / top for s in salience]
+
+    coverage = {}
+    for section in sections:
+        topics = _section_topics(section)
+        coverage[section] = [
+            sum(idf[term] for term in set(terms) & topics) for terms in term_lists
+        ]
+    return salience, coverage
+
+def compress_text(text, token_budget, sections=(), model=None):
+    """
+    Compress text to a token budget by keeping its most useful sentences.
+
+    Args:
+        text (str): The text to compress
+        token_budget (int): Maximum estimated tokens of the result
+        sections (iterable): Section names of the memo template, whose topics
+            the kept sentences should cover
+        model (str): Optional model name used to pick the token calibration
+
+    Returns:
+        dict: The "text" (unchanged if it already fits), "original_tokens",
+            "compressed_tokens", "tokens_saved", "ratio" (compressed over
+            original tokens), "sentences_kept" and "sentences_total"
+    """
+    original_tokens = estimate_tokens(text, model)
+    sentences = split_sentences(text)
+
+    if original_tokens <= token_budget or not sentences:
+        return {
+            "text": text,
+            "original_tokens": original_tokens,
+            "compressed_tokens": original_tokens,
+            "tokens_saved": 0,
+            "ratio": 1.0,
+            "sentences_kept": len(sentences),
+            "sentences_total": len(sentences)
+        }
+
+    sections = list(sections)
+    salience, coverage = score_sentences(sentences, sections)
+    costs = [estimate_tokens(s, model) for s in sentences]
+    kept = set()
+    seen = set()
+    used = 0
+
+    def take(index):
+        nonlocal used
+        key = sentences[index].lower()
+        if index in kept or key in seen or used + costs[index] > token_budget:
+            return False
+        kept.add(index)
+        seen.add(key)
+        used += costs[index]
+        return True
+
+    # Each section first gets its share, filled with the sentences that best
+    # cover its topics, breaking ties on salience
+    if sections:
+        quota = token_budget * SECTION_SHARE / len(sections)
+        for section in sections:
+            ranked = sorted(
+                (i for i, score in enumerate(coverage[section]) if score > 0),
+                key=lambda i: coverage[section][i] * (0.5 + salience[i]),
+                reverse=True
+            )
+            section_used = 0
+            for i in ranked:
+                if section_used >= quota:
+                    break
+                if take(i):
+                    section_used += costs[i]
+
+    # The rest of the budget goes to the most salient remaining sentences
+    for i in sorted(range(len(sentences)), key=lambda i: salience[i], reverse=True):
+        if used >= token_budget:
+            break
+        take(i)
+
+    compressed = "\n".join(sentences[i] for i in sorted(kept))
+    compressed_tokens = estimate_tokens(compressed, model)
+    logger.info(f"Compressed text from ~{original_tokens} to ~{compressed_tokens} tokens "
+                f"({len(kept)}/{len(sentences)} sentences)")
+
+    return {
+        "text": compressed,
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "tokens_saved": original_tokens - compressed_tokens,
+        "ratio": round(compressed_tokens / original_tokens, 3),
+        "sentences_kept": len(kept),
+        "sentences_total": len(sentences)
+    }
@@ -0,0 +1,240 @@
+"""
+Handling of reasoning output from R1-style models.
+This module separates the reasoning a model emits before its answer, either
+inline in <think> blocks or in a separate reasoning field, from the answer
+itself, in both streamed and complete responses. It also measures how much
+of a request's time and tokens went to reasoning.
+"""
+
+import re
+import time
+import logging
+from .token_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# Characters of a reasoning model's output held back before any tag is seen,
+# about the default reasoning budget of 4096 tokens
+REASONING_HOLD_CHARS = 16000
+
+_THINK_BLOCK = re.compile(r'<think>.*?(?:</think>|$)', re.DOTALL)
+
+def is_reasoning_model(model):
+    """
+    Check whether a model emits reasoning before its answer.
+
+    Args:
+        model (str): The model name
+
+    Returns:
+        bool: True for DeepSeek R1 models and their distillations
+    """
+    return "deepseek-r1" in (model or "").lower()
+
+def split_reasoning(text):
+    """
+    Split a complete response into its reasoning and its answer.
+
+    Handles closed and unterminated <think> blocks, and responses whose
+    opening tag was part of the prompt template so only </think> appears.
+
+    Args:
+        text (str): The response content
+
+    Returns:
+        tuple: The reasoning text and the answer text
+    """
+    if not text:
+        return "", ""
+
+    reasoning = []
+    close = text.find(THINK_CLOSE)
+    if close != -1 and THINK_OPEN not in text[:close]:
+        reasoning.append(text[:close])
+        text = text[close + len(THINK_CLOSE):]
+
+    reasoning.extend(
+        block[len(THINK_OPEN):].replace(THINK_CLOSE, "")
+        for block in _THINK_BLOCK.findall(text)
+    )
+    answer = _THINK_BLOCK.sub("", text)
+    return "".join(reasoning).strip(), answer.strip()
+
+def _partial_tag(text, tag):
+    """Length of the longest suffix of text that is a prefix of tag."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+class ReasoningFilter:
+    """
+    Stream writer that forwards only the answer of a reasoning model.
+
+    Content tokens are parsed for <think> blocks, including tags split
+    across tokens; reasoning sent in a separate field goes to reasoning().
+    Reasoning is passed to the wrapped writer's reasoning() method if it
+    has one and never to its token() method.
+
+    A reasoning model's prompt template may already open the <think> block,
+    so unless the provider was asked to send reasoning separately, its output
+    is held back until a tag or separate reasoning arrives, or until
+    REASONING_HOLD_CHARS characters are held. Call finish() once the response
+    is complete to forward a short answer that was held.
+    """
+
+    def __init__(self, stream=None, budget_tokens=0, model=None, separate=False):
+        """
+        Initialize the filter.
+
+        Args:
+            stream: Optional stream writer receiving the answer tokens
+            budget_tokens (int): Reasoning tokens after which a warning is
+                logged, 0 for no budget
+            model (str): Optional model name used for token estimates
+            separate (bool): Whether the provider was asked to send reasoning
+                in a separate field, leaving only the answer in the content
+        """
+        self.stream = stream
+        self.budget_tokens = budget_tokens
+        self.model = model
+        self.started_at = time.monotonic()
+        self.answer_started_at = None
+        self.budget_exceeded = False
+        self._reasoning = []
+        self._answer = []
+        self._reasoning_chars = 0
+        self._buffer = ""
+        self._in_think = False
+        self._holding = is_reasoning_model(model) and not separate
+        self._held = ""
+
+    def token(self, text):
+        """Handle a content delta, which may contain <think> tags."""
+        if self._holding:
+            self._held += text
+            close = self._held.find(THINK_CLOSE)
+            if close != -1 and THINK_OPEN not in self._held[:close]:
+                # The opening tag was in the prompt, so everything so far is reasoning
+                self._holding = False
+                self._add_reasoning(self._held[:close])
+                text, self._held = self._held[close + len(THINK_CLOSE):], ""
+            elif THINK_OPEN in self._held or len(self._held) > REASONING_HOLD_CHARS:
+                text = self._release()
+            else:
+                return
+        self._parse(text)
+
+    def reasoning(self, text):
+        """Handle a delta from the provider's separate reasoning field."""
+        if self._holding:
+            # Reasoning sent separately means the content is all answer
+            self._parse(self._release())
+        self._add_reasoning(text)
+
+    def finish(self):
+        """Forward what is still held once the response is complete."""
+        if self._holding:
+            self._parse(self._release())
+
+    def _release(self):
+        """Stop holding output back and return what was held."""
+        self._holding = False
+        held, self._held = self._held, ""
+        return held
+
+    def _parse(self, text):
+        """Split content into reasoning and answer at <think> tags."""
+        self._buffer += text
+        while self._buffer:
+            tag = THINK_CLOSE if self._in_think else THINK_OPEN
+            index = self._buffer.find(tag)
+            if index == -1:
+                # Hold back what could be the start of a tag split across tokens
+                keep = _partial_tag(self._buffer, tag)
+                emit, self._buffer = self._buffer[:len(self._buffer) - keep], self._buffer[len(self._buffer) - keep:]
+                self._emit(emit)
+                return
+            self._emit(self._buffer[:index])
+            self._buffer = self._buffer[index + len(tag):]
+            self._in_think = not self._in_think
+
+    def _emit(self, text):
+        if not text:
+            return
+        if self._in_think:
+            self._add_reasoning(text)
+            return
+        if self.answer_started_at is None:
+            # Drop the blank lines between the reasoning and the answer
+            text = text.lstrip()
+            if not text:
+                return
+            self.answer_started_at = time.monotonic()
+        self._answer.append(text)
+        if self.stream is not None:
+            self.stream.token(text)
+
+    def _add_reasoning(self, text):
+        self._reasoning.append(text)
+        self._reasoning_chars += len(text)
+        forward = getattr(self.stream, "reasoning", None)
+        if forward is not None:
+            forward(text)
+
+        if self.budget_tokens and not self.budget_exceeded:
+            # Estimating on every delta is wasteful, so check on a character bound first
+            if self._reasoning_chars > self.budget_tokens * 3 and \
+                    estimate_tokens("".join(self._reasoning), self.model) > self.budget_tokens:
+                self.budget_exceeded = True
+                logger.warning(f"Reasoning exceeded its budget of {self.budget_tokens} tokens")
+
+    @property
+    def answer(self):
+        """The answer text, without any reasoning."""
+        # A response whose opening tag was in the prompt only closes its block
+        return split_reasoning("".join(self._answer) + self._held + self._buffer)[1]
+
+    @property
+    def reasoning_text(self):
+        """The reasoning text."""
+        return "".join(self._reasoning).strip()
+
+    def metrics(self, usage=None, streamed=True):
+        """
+        Split the request's tokens and time between reasoning and answer.
+
+        Streamed requests are timed by when the first answer token arrived;
+        for complete responses the time is split by token counts.
+
+        Args:
+            usage (dict): Optional token usage reported by the provider
+            streamed (bool): Whether the response was streamed
+
+        Returns:
+            dict: "reasoning_tokens", "answer_tokens", "reasoning_seconds",
+                "answer_seconds" and "reasoning_budget_exceeded"
+        """
+        ended_at = time.monotonic()
+        details = (usage or {}).get("completion_tokens_details") or {}
+        reasoning_tokens = details.get("reasoning_tokens") or estimate_tokens(self.reasoning_text, self.model)
+        answer_tokens = estimate_tokens(self.answer, self.model)
+        elapsed = ended_at - self.started_at
+
+        if streamed:
+            answer_started_at = self.answer_started_at or ended_at
+            reasoning_seconds = answer_started_at - self.started_at
+        else:
+            total = reasoning_tokens + answer_tokens
+            reasoning_seconds = elapsed * reasoning_tokens / total if total else 0.0
+
+        return {
+            "reasoning_tokens": reasoning_tokens,
+            "answer_tokens": answer_tokens,
+            "reasoning_seconds": round(reasoning_seconds, 3),
+            "answer_seconds": round(elapsed - reasoning_seconds, 3),
+            "reasoning_budget_exceeded": self.budget_exceeded
+        }
@@ -0,0 +1,199 @@
+"""
+Section-targeted retrieval over deck pages.
+This module provides a small in-process BM25 index over the pages of a pitch
+deck, so that each memo section can be written from the pages relevant to it
+instead of the whole deck. An index is built once per deck and cached in
+Redis, term statistics included, under the deck's text, where later
+sectioned or re-run generations of the same deck find it.
+"""
+
+import math
+import logging
+from collections import Counter
+from .context_compression import SECTION_TOPICS, extract_terms
+
+logger = logging.getLogger(__name__)
+
+class BM25Index:
+    """Okapi BM25 index over a list of pages."""
+
+    def __init__(self, pages, k1=1.5, b=0.75):
+        """
+        Build the index.
+
+        Args:
+            pages (list): The page texts, in deck order
+            k1 (float): Term frequency saturation
+            b (float): Strength of the page length normalization
+        """
+        self.pages = [page for page in pages if page.strip()]
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(extract_terms(page)) for page in self.pages]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        doc_freq = Counter(term for counts in self.term_counts for term in counts)
+        total = len(self.pages)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def score(self, query):
+        """
+        Score every page against a query.
+
+        Args:
+            query (str or iterable): The query text, or its terms
+
+        Returns:
+            list: The BM25 score of each page
+        """
+        terms = set(extract_terms(query) if isinstance(query, str) else query)
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            scores.append(sum(
+                self.idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term in terms if term in counts
+            ))
+        return scores
+
+    def search(self, query, k=4):
+        """
+        Find the pages that best match a query.
+
+        Args:
+            query (str or iterable): The query text, or its terms
+            k (int): Maximum number of pages to return
+
+        Returns:
+            list: Indices of the matching pages, best first. Pages that share
+                no term with the query are not returned.
+        """
+        scores = self.score(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return [i for i in ranked[:k] if scores[i] > 0]
+
+    def to_dict(self):
+        """Serialize the index, including its term statistics, to a JSON-compatible dict."""
+        return {
+            "pages": self.pages,
+            "k1": self.k1,
+            "b": self.b,
+            "term_counts": self.term_counts,
+            "lengths": self.lengths,
+            "idf": self.idf
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore an index serialized with to_dict.
+
+        The stored term statistics are used as they are; indexes stored
+        without them are rebuilt from their pages.
+        """
+        if "idf" not in data:
+            return cls(data["pages"], k1=data["k1"], b=data["b"])
+
+        index = cls.__new__(cls)
+        index.pages = data["pages"]
+        index.k1 = data["k1"]
+        index.b = data["b"]
+        index.term_counts = [Counter(counts) for counts in data["term_counts"]]
+        index.lengths = data["lengths"]
+        index.avg_length = (sum(index.lengths) / len(index.lengths)) if index.lengths else 0.0
+        index.idf = data["idf"]
+        return index
+
+def section_query(section):
+    """
+    Build the retrieval query for a memo section.
+
+    Args:
+        section (str): The section name, e.g. "Unit Economics"
+
+    Returns:
+        set: The section heading terms plus its topic terms
+    """
+    return set(extract_terms(section)) | set(SECTION_TOPICS.get(section, ()))
+
+def section_context(index, section, k=4, fallback=None):
+    """
+    Get the deck content to send with one section's prompt.
+
+    Args:
+        index (BM25Index): The deck's page index
+        section (str): The section name
+        k (int): Maximum number of pages to include
+        fallback (str): Content to send if no page matches the section,
+            such as the compressed deck; the whole deck if omitted
+
+    Returns:
+        str: The top-k pages in deck order, or the fallback if no page
+            matches the section
+    """
+    hits = index.search(section_query(section), k)
+    if not hits:
+        return "\n\n".join(index.pages) if fallback is None else fallback
+    return "\n\n".join(index.pages[i] for i in sorted(hits))
+
+_index_cache = None
+
+def _deck_index_cache():
+    global _index_cache
+
+    if _index_cache is None:
+        from ..config import Config
+        from ..infrastructure.cache import RedisCache
+        _index_cache = RedisCache(Config, "deck_index", ttl=Config.MEMO_RETRIEVAL_INDEX_TTL,
+                                  max_entries=Config.MEMO_RETRIEVAL_INDEX_MAX_ENTRIES)
+    return _index_cache
+
+def _deck_key(text):
+    from ..infrastructure.cache import make_cache_key
+    return make_cache_key(" ".join(text.split()))
+
+def store_deck_index(text, index):
+    """
+    Cache a deck's page index under the deck's text, ignoring cache failures.
+
+    Args:
+        text (str): The deck text generation will be run on
+        index (BM25Index): The index of the deck's pages
+    """
+    try:
+        _deck_index_cache().set(_deck_key(text), index.to_dict())
+    except Exception as e:
+        logger.warning(f"Failed to cache deck index: {str(e)}")
+
+def get_deck_index(text):
+    """
+    Get the page index of a deck, building and caching it on a miss.
+
+    Decks uploaded as PDFs are indexed by their real pages when extracted.
+    Other text is split into pages of about MEMO_RETRIEVAL_PAGE_TOKENS.
+
+    Args:
+        text (str): The deck text
+
+    Returns:
+        BM25Index: The deck's page index
+    """
+    from ..config import Config
+    from .text_processing import split_into_chunks
+
+    key = _deck_key(text)
+    try:
+        cached = _deck_index_cache().get(key)
+        if cached is not None:
+            logger.info("Deck index cache hit")
+            return BM25Index.from_dict(cached)
+    except Exception as e:
+        logger.warning(f"Deck index lookup failed: {str(e)}")
+
+    index = BM25Index(split_into_chunks(text, Config.MEMO_RETRIEVAL_PAGE_TOKENS))
+    logger.info(f"Built deck index over {len(index.pages)} pages")
+    store_deck_index(text, index)
+    return index
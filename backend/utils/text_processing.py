@@ -11,9 +11,15 @@ import requests
 import pytesseract
 from pdf2image import convert_from_path
 import json
+from .token_budget import estimate_tokens, estimate_prompt_tokens, fit_max_tokens
+from ..infrastructure.http_client import get_http_session
+from ..infrastructure.rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+# Model used for text refinement and stage detection
+REFINEMENT_MODEL = "nvidia/llama-3.1-nemotron-70b-instruct:free"
+
 def is_noise_page(text):
     """
     Determine if a page contains only noise (e.g., page numbers, headers).
@@ -221,21 +227,42 @@ def ocr_page(image):
     custom_config = r'--oem 3 --psm 6'
     return pytesseract.image_to_string(image, config=custom_config)
 
-def refine_text_with_stage(text: str, api_key=None) -> dict:
+def _normalize_stage(stage_raw):
+    """
+    Map a stage label returned by the LLM to one of the known stage keys.
+    
+    Args:
+        stage_raw (str): The raw stage label
+        
+    Returns:
+        str: One of 'seed', 'seriesa', 'growth' or 'default'
+    """
+    stage_lower = stage_raw.lower()
+    
+    # Map to correct case format for frontend
+    if 'seed' in stage_lower:
+        return 'seed'
+    elif 'seriesa' in stage_lower or 'series a' in stage_lower or 'series_a' in stage_lower:
+        return 'seriesa'
+    elif 'growth' in stage_lower:
+        return 'growth'
+    return 'default'
+
+def refine_text_with_stage(text: str, api_key=None, pieces=None) -> dict:
     """
     Refine text and predict startup stage using an LLM API.
     
     Args:
         text (str): The text to refine
         api_key (str): API key for the LLM service
+        pieces (list): The text as cleaned (chunk, separator) pairs from
+            clean_text_chunks, used to split long decks on their page and
+            paragraph breaks
         
     Returns:
         dict: Dictionary containing cleaned text and predicted startup stage
     """
     from ..config import Config
-    import requests
-    import json
-    import re
     
     logger.info("Starting text refinement with stage prediction")
     
@@ -249,6 +276,12 @@ def refine_text_with_stage(text: str, api_key=None) -> dict:
             "startup_stage": "default"
         }
     
+    text_tokens = estimate_tokens(text, REFINEMENT_MODEL)
+    
+    # Long decks are refined in parallel chunks instead of one huge prompt
+    if Config.REFINE_CHUNKED and text_tokens > Config.REFINE_CHUNK_TOKENS:
+        return refine_text_chunked(text, api_key=api_key, pieces=pieces)
+    
     # Define the prompt for text refinement and stage prediction
     prompt = (
         "You are an assistant that processes text data. "
@@ -268,20 +301,29 @@ def refine_text_with_stage(text: str, api_key=None) -> dict:
     )
     
     
-    logger.info("Sending request to LLM API")
+    # The refined text is about as long as the input, so size the completion
+    # from the input and keep the whole request inside the context window
+    system_message = "You are a text processing assistant."
+    prompt_tokens = estimate_prompt_tokens({"system": system_message, "user": prompt}, REFINEMENT_MODEL)
+    max_tokens = fit_max_tokens(prompt_tokens, REFINEMENT_MODEL, int(text_tokens * 1.2) + 256)
+    if max_tokens < text_tokens:
+        logger.warning(f"Text of ~{text_tokens} tokens does not fit the refinement context, using chunks")
+        return refine_text_chunked(text, api_key=api_key, pieces=pieces)
+    
+    logger.info(f"Sending request to LLM API (~{prompt_tokens} prompt tokens, max_tokens={max_tokens})")
     
     # Build the request payload
-    url = "https://openrouter.ai/api/v1/chat/completions"
+    url = f"{Config.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
     data = {
-        "model": "nvidia/llama-3.1-nemotron-70b-instruct:free",
+        "model": REFINEMENT_MODEL,
         "messages": [
             {
                 "role": "system",
-                "content": "You are a text processing assistant."
+                "content": system_message
             },
             {
                 "role": "user",
@@ -289,13 +331,15 @@ def refine_text_with_stage(text: str, api_key=None) -> dict:
             }
         ],
         "temperature": 0.1,
-        "max_tokens": 130000
+        "max_tokens": max_tokens
     }
     
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        limiter = _wait_for_refinement_slot(prompt_tokens + max_tokens)
+        response = get_http_session().post(url, headers=headers, json=data, timeout=Config.REFINE_TIMEOUT)
         response.raise_for_status()
         result = response.json()
+        _settle_refinement_slot(limiter, prompt_tokens + max_tokens, result)
         
         # Extract the markdown response
         output = result["choices"][0]["message"]["content"].strip()
@@ -314,17 +358,7 @@ def refine_text_with_stage(text: str, api_key=None) -> dict:
             logger.info(f"Found stage in output: '{stage_raw}'")
             
             # Normalize stage name
-            stage_lower = stage_raw.lower()
-            
-            # Map to correct case format for frontend
-            if 'seed' in stage_lower:
-                stage = 'seed'
-            elif 'seriesa' in stage_lower or 'series a' in stage_lower or 'series_a' in stage_lower:
-                stage = 'seriesa'
-            elif 'growth' in stage_lower:
-                stage = 'growth'
-            else:
-                stage = 'default'
+            stage = _normalize_stage(stage_raw)
             
             logger.info(f"Normalized stage: '{stage}'")
             
@@ -353,30 +387,536 @@ def refine_text_with_stage(text: str, api_key=None) -> dict:
             "startup_stage": "default"
         }
 
+def _split_with_separators(text, max_tokens):
+    """
+    Split text into chunks, keeping the boundary that followed each chunk.
+    
+    Args:
+        text (str): The text to split
+        max_tokens (int): Maximum estimated tokens per chunk
+        
+    Returns:
+        list: (chunk, separator) pairs in document order; joining every
+            chunk with its separator gives back the original text
+    """
+    if estimate_tokens(text, REFINEMENT_MODEL) <= max_tokens:
+        return [(text, "")]
+    
+    for separator in ("\f", "\n\n", "\n"):
+        if separator in text:
+            break
+    else:
+        # No line breaks at all, split on the last space before the limit
+        max_chars = max_tokens * 3
+        pieces = []
+        while len(text) > max_chars:
+            cut = text.rfind(" ", 0, max_chars + 1)
+            if cut > 0:
+                pieces.append((text[:cut], " "))
+                text = text[cut + 1:]
+            else:
+                # A single word longer than a chunk has to be cut
+                pieces.append((text[:max_chars], ""))
+                text = text[max_chars:]
+        pieces.append((text, ""))
+        return pieces
+    
+    pieces = []
+    current = []
+    current_tokens = 0
+    for part in text.split(separator):
+        part_tokens = estimate_tokens(part, REFINEMENT_MODEL)
+        if part_tokens > max_tokens:
+            # Flush what we have and split the oversized part further
+            if current:
+                pieces.append((separator.join(current), separator))
+                current, current_tokens = [], 0
+            sub_pieces = _split_with_separators(part, max_tokens)
+            sub_pieces[-1] = (sub_pieces[-1][0], separator)
+            pieces.extend(sub_pieces)
+            continue
+        if current and current_tokens + part_tokens > max_tokens:
+            pieces.append((separator.join(current), separator))
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += part_tokens
+    
+    if current:
+        pieces.append((separator.join(current), separator))
+    
+    # Nothing follows the last chunk
+    pieces[-1] = (pieces[-1][0], "")
+    return pieces
+
+def split_into_chunks(text, max_tokens):
+    """
+    Split text into chunks on page, paragraph or line boundaries.
+    
+    Boundaries are tried from coarsest to finest so that a chunk never cuts
+    through a sentence unless a single line exceeds the budget on its own.
+    
+    Args:
+        text (str): The text to split
+        max_tokens (int): Maximum estimated tokens per chunk
+        
+    Returns:
+        list: The chunks, in document order
+    """
+    return [chunk for chunk, _ in _split_with_separators(text, max_tokens)]
+
+def _call_refinement_llm(prompt, api_key, max_tokens, temperature=0.1):
+    """
+    Send a refinement prompt to the LLM API and return the response text.
+    
+    Args:
+        prompt (dict): Prompt with "system" and "user" messages
+        api_key (str): API key for the LLM service
+        max_tokens (int): Maximum tokens to generate
+        temperature (float): Sampling temperature
+        
+    Returns:
+        str: The stripped response content
+        
+    Raises:
+        Exception: If the API call fails
+    """
+    from ..config import Config
+    
+    url = f"{Config.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    data = {
+        "model": REFINEMENT_MODEL,
+        "messages": [
+            {"role": "system", "content": prompt["system"]},
+            {"role": "user", "content": prompt["user"]}
+        ],
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    
+    reserved_tokens = estimate_prompt_tokens(prompt, REFINEMENT_MODEL) + max_tokens
+    limiter = _wait_for_refinement_slot(reserved_tokens)
+    response = get_http_session().post(url, headers=headers, json=data, timeout=Config.REFINE_TIMEOUT)
+    response.raise_for_status()
+    result = response.json()
+    _settle_refinement_slot(limiter, reserved_tokens, result)
+    return result["choices"][0]["message"]["content"].strip()
+
+def _wait_for_refinement_slot(tokens):
+    """
+    Wait for capacity in the refinement model's shared rate limit.
+    
+    Args:
+        tokens (int): Prompt plus completion tokens reserved for the request
+        
+    Returns:
+        RateLimiter: The limiter the tokens were taken from, or None
+        
+    Raises:
+        RateLimitTimeout: If no capacity frees up within RATE_LIMIT_MAX_WAIT
+    """
+    from ..config import Config
+    
+    limiter = get_rate_limiter("OpenRouter", REFINEMENT_MODEL)
+    if limiter:
+        limiter.acquire(tokens, Config.RATE_LIMIT_MAX_WAIT)
+    return limiter
+
+def _settle_refinement_slot(limiter, reserved_tokens, result):
+    """Return reserved tokens the refinement request did not use."""
+    usage = result.get("usage") or {}
+    if limiter and usage.get("total_tokens"):
+        limiter.refund(limiter.cost(reserved_tokens) - usage["total_tokens"])
+
+def _build_stage_summary(text, max_tokens=1500):
+    """
+    Build a compact excerpt of the deck for stage detection.
+    
+    Lines mentioning funding, revenue or traction are kept first, then the
+    opening lines of the deck fill the remaining budget.
+    
+    Args:
+        text (str): The cleaned deck text
+        max_tokens (int): Maximum estimated tokens in the summary
+        
+    Returns:
+        str: The summary text
+    """
+    signal_pattern = re.compile(
+        r'\b(seed|series\s*[a-d]|pre-seed|raising|round|revenue|arr|mrr|customers|users|'
+        r'growth|traction|valuation|funding|investors?)\b',
+        re.IGNORECASE
+    )
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    signal_lines = [line for line in lines if signal_pattern.search(line)]
+    other_lines = [line for line in lines if not signal_pattern.search(line)]
+    
+    selected = []
+    used = 0
+    for line in signal_lines + other_lines:
+        line_tokens = estimate_tokens(line, REFINEMENT_MODEL)
+        if used + line_tokens > max_tokens:
+            break
+        selected.append(line)
+        used += line_tokens
+    
+    return "\n".join(selected)
+
+def detect_startup_stage(text, api_key=None):
+    """
+    Predict the startup stage from a compact summary of the deck.
+    
+    Args:
+        text (str): The cleaned deck text
+        api_key (str): API key for the LLM service
+        
+    Returns:
+        str: The normalized startup stage
+    """
+    from ..config import Config
+    from ..prompts import build_stage_detection_prompt
+    
+    api_key = api_key or Config.HF_API_KEY
+    if not api_key:
+        return "default"
+    
+    try:
+        prompt = build_stage_detection_prompt(_build_stage_summary(text))
+        output = _call_refinement_llm(prompt, api_key, max_tokens=50)
+        stage_match = re.search(r'\*{0,2}STAGE:\*{0,2}\s*\*{0,2}([\w ]+)', output, re.IGNORECASE)
+        stage = _normalize_stage(stage_match.group(1) if stage_match else output)
+        logger.info(f"Detected startup stage: '{stage}'")
+        return stage
+    except Exception as e:
+        logger.error(f"Error in startup stage detection: {str(e)}")
+        return "default"
+
+# Round mentions per stage, most advanced stage first
+_STAGE_MENTIONS = (
+    ("growth", re.compile(r'\bseries\s*[b-e]\b|\bgrowth[- ](?:stage|round|equity)\b|\bpre-?ipo\b', re.IGNORECASE)),
+    ("seriesa", re.compile(r'\bseries\s*a\b', re.IGNORECASE)),
+    ("seed", re.compile(r'\b(?:pre-?)?seed\s+(?:round|stage|funding|investment|raise)\b|\braising\b[^.\n]*\bseed\b',
+                        re.IGNORECASE))
+)
+
+def guess_startup_stage(text):
+    """
+    Guess the startup stage from the funding rounds a deck mentions, without an LLM.
+    
+    A deck that mentions several rounds is usually raising the latest one,
+    so the most advanced stage mentioned wins.
+    
+    Args:
+        text (str): The cleaned deck text
+        
+    Returns:
+        str: One of 'seed', 'seriesa', 'growth' or 'default'
+    """
+    for stage, pattern in _STAGE_MENTIONS:
+        if pattern.search(text or ""):
+            return stage
+    return "default"
+
+def _refine_chunk(chunk, api_key):
+    """
+    Refine a single chunk of text, falling back to the input on failure.
+    
+    Args:
+        chunk (str): The chunk to refine
+        api_key (str): API key for the LLM service
+        
+    Returns:
+        str: The refined chunk
+    """
+    from ..prompts import build_text_refinement_prompt
+    
+    try:
+        prompt = build_text_refinement_prompt(chunk)
+        # Refined output should not be much longer than the input
+        chunk_tokens = estimate_tokens(chunk, REFINEMENT_MODEL)
+        max_tokens = fit_max_tokens(estimate_prompt_tokens(prompt, REFINEMENT_MODEL), REFINEMENT_MODEL,
+                                    int(chunk_tokens * 1.2) + 256)
+        refined = _call_refinement_llm(prompt, api_key, max_tokens=max_tokens)
+        return refined or chunk
+    except Exception as e:
+        logger.warning(f"Chunk refinement failed, keeping cleaned chunk: {str(e)}")
+        return chunk
+
+def clean_text_chunks(raw_text):
+    """
+    Clean and deduplicate raw text chunk by chunk.
+    
+    The raw text is split on its page, paragraph or line breaks within
+    Config.REFINE_CHUNK_TOKENS before cleaning collapses them, so chunked
+    refinement can reuse the cleaned chunks without cleaning them again.
+    
+    Args:
+        raw_text (str): The raw text to clean
+        
+    Returns:
+        tuple: The cleaned (chunk, separator) pairs in document order and
+            the deduplication stats ("removed" and "tokens_saved")
+    """
+    from ..config import Config
+    
+    pieces = []
+    index = {}
+    dedupe = {"removed": 0, "tokens_saved": 0}
+    for raw_chunk, separator in _split_with_separators(raw_text, Config.REFINE_CHUNK_TOKENS):
+        chunk = clean_text(raw_chunk)
+        if Config.DEDUPE_ENABLED:
+            # Share the band index so repeats across chunks are caught too
+            result = remove_near_duplicates(chunk, max_distance=Config.DEDUPE_MAX_DISTANCE, index=index)
+            chunk = result["text"]
+            dedupe["removed"] += result["removed"]
+            dedupe["tokens_saved"] += result["tokens_saved"]
+        pieces.append((chunk, separator))
+    return pieces, dedupe
+
+def refine_text_chunked(text: str, api_key=None, pieces=None) -> dict:
+    """
+    Refine long text in parallel chunks and predict the startup stage.
+    
+    The text is split within the configured token budget, chunks are refined
+    concurrently and reassembled in document order with the page or
+    paragraph boundary they were split on. Stage detection runs alongside
+    the chunks on a compact summary of the deck.
+    
+    Cleaning collapses the page and paragraph breaks, so when the text was
+    cleaned chunk by chunk with clean_text_chunks, those chunks are refined
+    as they are instead of splitting the cleaned text again.
+    
+    Args:
+        text (str): The cleaned text to refine
+        api_key (str): API key for the LLM service
+        pieces (list): Optional cleaned (chunk, separator) pairs of the text
+        
+    Returns:
+        dict: Dictionary containing cleaned text and predicted startup stage
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from ..config import Config
+    
+    api_key = api_key or Config.HF_API_KEY
+    if pieces is None:
+        pieces = _split_with_separators(text, Config.REFINE_CHUNK_TOKENS)
+    chunks = [chunk for chunk, _ in pieces]
+    logger.info(f"Refining text in {len(chunks)} chunks")
+    
+    max_workers = max(1, min(Config.REFINE_MAX_WORKERS, len(chunks) + 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        stage_future = executor.submit(detect_startup_stage, text, api_key)
+        refined_chunks = list(executor.map(lambda chunk: _refine_chunk(chunk, api_key), chunks))
+        stage = stage_future.result()
+    
+    parts = [
+        (chunk.strip(), separator)
+        for chunk, (_, separator) in zip(refined_chunks, pieces)
+        if chunk.strip()
+    ]
+    cleaned_text = "".join(chunk + separator for chunk, separator in parts[:-1])
+    if parts:
+        cleaned_text += parts[-1][0]
+    logger.info(f"Chunked refinement complete, length: {len(cleaned_text)} characters")
+    
+    return {
+        "cleaned_text": cleaned_text,
+        "startup_stage": stage
+    }
+
+def simhash(text, bits=64):
+    """
+    Compute a SimHash signature of a paragraph from its character 4-grams.
+    
+    Case and punctuation are normalized away first. Shingles are hashed with
+    the built-in string hash, so signatures are only comparable within one
+    process.
+    
+    Args:
+        text (str): The paragraph
+        bits (int): Signature width in bits
+        
+    Returns:
+        int: The signature
+    """
+    normalized = " ".join(re.findall(r'\w+', text.lower()))
+    mask = (1 << bits) - 1
+    
+    # Count set bits column by column over the shingle hashes as bit strings
+    digests = [
+        format(hash(normalized[i:i + 4]) & mask, f"0{bits}b")
+        for i in range(max(1, len(normalized) - 3))
+    ]
+    half = len(digests) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*digests)), 2)
+
+def remove_near_duplicates(text, max_distance=6, min_words=5, index=None):
+    """
+    Drop paragraphs that are near-duplicates of an earlier paragraph.
+    
+    Paragraphs (lines) are compared by the Hamming distance of their SimHash
+    signatures. Signatures are split into max_distance + 1 bands, so any two
+    signatures within max_distance bits share at least one identical band;
+    only paragraphs sharing a band are compared, which keeps the pass
+    roughly linear in the number of paragraphs for deck-sized inputs.
+    
+    Args:
+        text (str): The text to deduplicate
+        max_distance (int): Maximum Hamming distance to treat as a duplicate
+        min_words (int): Paragraphs with fewer words are always kept
+        index (dict): Band index to share across calls, so paragraphs that
+            repeat one from an earlier call are dropped as well
+        
+    Returns:
+        dict: The deduplicated "text", the number of paragraphs "removed"
+            and the estimated "tokens_saved"
+    """
+    bits = 64
+    bands = max_distance + 1
+    band_width = max(1, bits // bands)
+    band_mask = (1 << band_width) - 1
+    
+    if index is None:
+        index = {}
+    kept = []
+    removed = 0
+    tokens_saved = 0
+    
+    for line in text.split("\n"):
+        if len(line.split()) < min_words:
+            kept.append(line)
+            continue
+        
+        signature = simhash(line, bits)
+        keys = [(b, (signature >> (b * band_width)) & band_mask) for b in range(bands)]
+        
+        duplicate = any(
+            bin(signature ^ other).count("1") <= max_distance
+            for key in keys
+            for other in index.get(key, ())
+        )
+        if duplicate:
+            removed += 1
+            tokens_saved += estimate_tokens(line)
+            continue
+        
+        for key in keys:
+            index.setdefault(key, []).append(signature)
+        kept.append(line)
+    
+    if removed:
+        logger.info(f"Removed {removed} near-duplicate paragraphs (~{tokens_saved} tokens)")
+    
+    return {
+        "text": "\n".join(kept),
+        "removed": removed,
+        "tokens_saved": tokens_saved
+    }
+
+def text_noise_score(text):
+    """
+    Score how much formatting damage the extracted text has.
+    
+    Score the raw text before clean_text runs, since cleaning already
+    repairs part of the damage and re-splits every sentence onto its own
+    line.
+    
+    The score combines three signals, each normalized to [0, 1]:
+    - spaced letters: share of single-letter tokens left over from
+      letter-spaced headings
+    - broken hyphenation: words split across lines or spaces with a
+      trailing hyphen ("infra- structure")
+    - line length variance: coefficient of variation of line lengths
+    
+    Args:
+        text (str): The raw extracted text to score
+        
+    Returns:
+        dict: The overall "score" (0 is clean, 1 is badly damaged) and
+            the individual components
+    """
+    words = text.split() if text else []
+    if not words:
+        return {"score": 0.0, "spaced_letters": 0.0, "broken_hyphenation": 0.0, "line_variance": 0.0}
+    
+    # Single letters other than the common English words "a" and "I"
+    single_letters = sum(1 for w in words if len(w) == 1 and w.isalpha() and w not in ("a", "A", "I"))
+    spaced_letters = min(1.0, (single_letters / len(words)) * 10)
+    
+    broken = len(re.findall(r'[a-z]-\s+[a-z]', text))
+    broken_hyphenation = min(1.0, (broken / len(words)) * 50)
+    
+    line_lengths = [len(line) for line in text.splitlines() if line.strip()]
+    line_variance = 0.0
+    if len(line_lengths) > 1:
+        mean = sum(line_lengths) / len(line_lengths)
+        variance = sum((n - mean) ** 2 for n in line_lengths) / len(line_lengths)
+        line_variance = min(1.0, (variance ** 0.5 / mean) / 2) if mean else 0.0
+    
+    score = 0.5 * spaced_letters + 0.3 * broken_hyphenation + 0.2 * line_variance
+    
+    return {
+        "score": round(score, 4),
+        "spaced_letters": round(spaced_letters, 4),
+        "broken_hyphenation": round(broken_hyphenation, 4),
+        "line_variance": round(line_variance, 4)
+    }
+
 def prepare_text(raw_text, refine=False):
     """
     Prepare text by cleaning and optionally refining it.
     
+    When refinement is requested, it only runs if the noise score of the
+    raw text reaches Config.REFINE_QUALITY_THRESHOLD. The raw text is scored
+    because clean_text already repairs part of the damage (see
+    text_noise_score). Clean decks make no LLM call: their startup stage is
+    guessed from the funding rounds they mention (see guess_startup_stage).
+    
     Args:
         raw_text (str): The raw text to process
         refine (bool): Whether to use LLM refinement
         
     Returns:
-        dict: Dictionary containing cleaned text and startup stage
+        dict: Dictionary containing cleaned text, startup stage, whether
+            refinement ran, the raw text's quality score and deduplication
+            stats
     """
+    from ..config import Config
+    
     logger.info(f"Preparing text with refinement={'enabled' if refine else 'disabled'}")
     
-    # First do basic cleaning to handle major formatting issues
-    cleaned_text = clean_text(raw_text)
+    # Clean once, chunk by chunk, dropping repeated value propositions and
+    # other near-duplicate paragraphs; refinement reuses the chunks
+    pieces, dedupe = clean_text_chunks(raw_text)
+    cleaned_text = "\n".join(chunk for chunk, _ in pieces if chunk)
     
     if refine:
-        logger.info("Sending text to LLM for refinement")
-        result = refine_text_with_stage(cleaned_text)
-        logger.info(f"LLM refinement complete. Stage identified: {result['startup_stage']}")
-        return result
+        quality = text_noise_score(raw_text)
+        
+        if quality["score"] >= Config.REFINE_QUALITY_THRESHOLD:
+            logger.info(f"Sending text to LLM for refinement (noise score {quality['score']})")
+            result = refine_text_with_stage(cleaned_text, pieces=pieces)
+            logger.info(f"LLM refinement complete. Stage identified: {result['startup_stage']}")
+            result["refined"] = True
+            result["quality"] = quality
+            result["dedupe"] = dedupe
+            return result
+        
+        logger.info(f"Skipping LLM refinement, noise score {quality['score']} below threshold")
+        return {
+            "cleaned_text": cleaned_text,
+            "startup_stage": guess_startup_stage(cleaned_text),
+            "refined": False,
+            "quality": quality,
+            "dedupe": dedupe
+        }
     
     logger.info("Skipping LLM refinement")
     return {
         "cleaned_text": cleaned_text,
-        "startup_stage": "default"
-    }
\ No newline at end of file
+        "startup_stage": "default",
+        "dedupe": dedupe
+    }
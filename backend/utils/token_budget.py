@@ -0,0 +1,146 @@
+"""
+Token budget utilities for LLM prompts.
+This module provides a fast local token estimator calibrated per model family,
+along with helpers to check context limits and size completions before a
+request is sent.
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Average characters per token for English prose, by model family.
+# Calibrated against the tokenizers of the models used by the application.
+CHARS_PER_TOKEN = {
+    "deepseek": 3.6,
+    "llama": 3.8,
+    "nemotron": 3.8,
+    "default": 4.0
+}
+
+# Context window sizes (prompt + completion tokens) of the configured models
+MODEL_CONTEXT_LIMITS = {
+    "deepseek-r1-distill-llama-70b": 131072,
+    "deepseek/deepseek-r1:free": 163840,
+    "nvidia/llama-3.1-nemotron-70b-instruct:free": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "meta-llama/llama-3.3-70b-instruct:free": 131072
+}
+
+DEFAULT_CONTEXT_LIMIT = 32768
+
+# Tokens reserved for chat formatting overhead around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Digits and symbols tokenize much more densely than words
+_DENSE_CHARS = re.compile(r'[^A-Za-z\s]')
+
+def get_model_family(model):
+    """
+    Get the calibration family for a model name.
+
+    Args:
+        model (str): The model name, e.g. "deepseek-r1-distill-llama-70b"
+
+    Returns:
+        str: The family key in CHARS_PER_TOKEN
+    """
+    model_lower = (model or "").lower()
+    for family in ("deepseek", "nemotron", "llama"):
+        if family in model_lower:
+            return family
+    return "default"
+
+def estimate_tokens(text, model=None):
+    """
+    Estimate the number of tokens in a piece of text.
+
+    Letters are counted at the family's characters-per-token ratio, while
+    digits, punctuation and non-Latin characters count at roughly one and a
+    half characters per token.
+
+    Args:
+        text (str): The text to measure
+        model (str): Optional model name used to pick the calibration
+
+    Returns:
+        int: The estimated token count
+    """
+    if not text:
+        return 0
+
+    chars_per_token = CHARS_PER_TOKEN[get_model_family(model)]
+    dense = len(_DENSE_CHARS.findall(text))
+    return int((len(text) - dense) / chars_per_token + dense / 1.5) + 1
+
+def estimate_prompt_tokens(prompt, model=None):
+    """
+    Estimate the number of tokens in a prompt payload.
+
+    Args:
+        prompt (dict): Prompt with "system" and "user" messages
+        model (str): Optional model name used to pick the calibration
+
+    Returns:
+        int: The estimated token count including message overhead
+    """
+    return sum(
+        estimate_tokens(prompt.get(role, ""), model) + MESSAGE_OVERHEAD_TOKENS
+        for role in ("system", "user")
+    )
+
+def get_context_limit(model):
+    """
+    Get the context window size of a model.
+
+    Args:
+        model (str): The model name
+
+    Returns:
+        int: The context window in tokens
+    """
+    return MODEL_CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT)
+
+def fit_max_tokens(prompt_tokens, model, desired_max_tokens, safety_margin=0.05):
+    """
+    Choose max_tokens for a completion so the request fits the context window.
+
+    Args:
+        prompt_tokens (int): Estimated prompt tokens
+        model (str): The model name
+        desired_max_tokens (int): The preferred completion budget
+        safety_margin (float): Fraction of the context kept free for estimation error
+
+    Returns:
+        int: The completion budget, or 0 if the prompt alone fills the context
+    """
+    limit = get_context_limit(model)
+    available = int(limit * (1 - safety_margin)) - prompt_tokens
+    return max(0, min(desired_max_tokens, available))
+
+def truncate_to_tokens(text, max_tokens, model=None):
+    """
+    Truncate text to an estimated token budget, cutting on a line boundary.
+
+    Args:
+        text (str): The text to truncate
+        max_tokens (int): The token budget
+        model (str): Optional model name used to pick the calibration
+
+    Returns:
+        str: The truncated text (unchanged if it already fits)
+    """
+    total = estimate_tokens(text, model)
+    if total <= max_tokens:
+        return text
+
+    # Scale the character cut by the text's own token density
+    cut = int(len(text) * max_tokens / total)
+    truncated = text[:cut]
+    line_end = truncated.rfind("\n")
+    if line_end > cut // 2:
+        truncated = truncated[:line_end]
+
+    logger.info(f"Truncated text from ~{total} to ~{estimate_tokens(truncated, model)} tokens")
+    return truncated